@@ -7,10 +7,21 @@ For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
+import logging
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bitlab_portfolio.settings')
+# Views async nas leituras públicas (ver PORTFOLIO_ASYNC_VIEWS)
+os.environ.setdefault('PORTFOLIO_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
+
+# O PublishedSite do wsgi.py é WSGI (WhiteNoise): aqui as páginas publicadas
+# só saem do disco pelo nginx (ver README)
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'PORTFOLIO_PUBLISH_SERVE', False):
+    logging.getLogger(__name__).warning(
+        'PORTFOLIO_PUBLISH_SERVE não vale no ASGI; sirva published/current pelo proxy')
@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Server-Timing e log por request (PORTFOLIO_SERVER_TIMING, padrão DEBUG)
+    'portfolio_app.middleware.ServerTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -97,7 +99,17 @@ WSGI_APPLICATION = 'bitlab_portfolio.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # SQLITE_PATH permite apontar outro arquivo (ex.: o banco do benchmark)
+        'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+    }
+}
+
+# Cache compartilhado entre os workers do gunicorn (snapshots do portfólio e
+# o lock de reconstrução). Requer `python manage.py createcachetable`.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'portfolio_cache',
     }
 }
 
@@ -152,3 +164,23 @@ CORS_ALLOW_CREDENTIALS = True
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Leituras públicas (catálogo, projetos e mídia) com views async; o asgi.py
+# liga por padrão, o WSGI continua com as views síncronas
+PORTFOLIO_ASYNC_VIEWS = config('PORTFOLIO_ASYNC_VIEWS', default=False, cast=bool)
+
+# Métricas por request do ServerTimingMiddleware
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'portfolio_app.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -99,6 +99,15 @@ DATABASES = {
     }
 }
 
+# Cache compartilhado entre os workers do gunicorn (snapshots do portfólio).
+# Requer `python manage.py createcachetable`.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'portfolio_cache',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -15,18 +15,28 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from portfolio_app import views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('portfolio_app.urls')),
 ]
 
-# Servir arquivos de mídia em desenvolvimento
+# Mídia servida pelo Django com suporte a Range (ou delegada ao proxy via
+# PORTFOLIO_MEDIA_ACCEL), também em produção
+if getattr(settings, 'PORTFOLIO_SERVE_MEDIA', True):
+    urlpatterns += [
+        re_path(r'^%s/(?P<path>.*)$' % settings.MEDIA_URL.strip('/'),
+                views.serve_media_async if getattr(settings, 'PORTFOLIO_ASYNC_VIEWS', False)
+                else views.serve_media,
+                name='serve_media'),
+    ]
+
+# Servir arquivos estáticos em desenvolvimento
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bitlab_portfolio.settings')
 
 application = get_wsgi_application()
+
+# Páginas publicadas por `manage.py publish` saem direto do disco, sem passar
+# pelo Django (desnecessário com um proxy servindo a pasta publicada)
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'PORTFOLIO_PUBLISH_SERVE', False):
+    from portfolio_app.publish import PublishedSite
+
+    application = PublishedSite(application)
@@ -23,6 +23,7 @@ sleep 10
 # Executar migrações
 echo "📊 Executando migrações..."
 docker-compose exec web python manage.py migrate
+docker-compose exec web python manage.py createcachetable
 
 # Criar superusuário (opcional)
 echo "👤 Criando superusuário..."
@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
 """
 Script para popular o banco de dados com dados de exemplo
+
+Argumentos extras geram também um catálogo sintético em volume, repassados
+ao comando seed_catalog (ex.: python populate_data.py --projects 100000).
 """
 
-from portfolio_app.models import Category, Project, ProjectImage, PortfolioSettings
 import os
 import sys
 import django
 
-# Configurar Django
+# Configurar Django antes de importar os modelos
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bitlab_portfolio.settings')
 django.setup()
 
+from django.core.management import call_command  # noqa: E402
+from portfolio_app.models import Category, Project, PortfolioSettings  # noqa: E402
+
 
 def create_categories():
     """Cria categorias padrão"""
@@ -137,6 +142,11 @@ def main():
     create_portfolio_settings()
     print()
 
+    if len(sys.argv) > 1:
+        print("Gerando catalogo sintetico...")
+        call_command('seed_catalog', *sys.argv[1:])
+        print()
+
     print("Populacao do banco concluida!")
     print("\nProximos passos:")
     print("1. Execute: python manage.py runserver")
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Project, Category, ProjectImage, ProjectVideo, PortfolioSettings
+from .models import Project, Category, ProjectImage, ProjectVideo, PortfolioSettings, BackgroundJob
 
 
 @admin.register(Category)
@@ -81,3 +81,11 @@ class PortfolioSettingsAdmin(admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'status', 'attempts', 'run_after', 'updated_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = ['kind', 'payload', 'attempts',
+                       'error', 'created_at', 'updated_at']
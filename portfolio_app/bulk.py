@@ -0,0 +1,254 @@
+"""
+Operações em lote sobre projetos (POST /api/projects/bulk/).
+
+Recebe uma lista de operações create/update/delete, valida todas antes de
+escrever e aplica o lote numa única transação: categorias referenciadas
+são resolvidas numa só consulta, criações usam bulk_create e edições
+bulk_update. Se qualquer item for inválido nada é gravado e a resposta
+traz o erro de cada item; isso inclui categorias novas cujo nome (gerado a
+partir do slug) já pertence a outra categoria.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .cache import CATALOG, bump_version
+from .models import Category, Project
+from . import facets, ordering, refdata, search
+
+MAX_OPERATIONS = getattr(settings, 'PORTFOLIO_BULK_MAX_OPERATIONS', 1000)
+
+OPERATIONS = ('create', 'update', 'delete')
+# Campos editáveis e seus valores padrão na criação
+FIELDS = {
+    'title': '',
+    'description': '',
+    'short_description': '',
+    'tags': [],
+    'featured': False,
+    'status': 'draft',
+    'order': 0,
+}
+STATUSES = {value for value, _ in Project.STATUS_CHOICES}
+SHORT_DESCRIPTION_LENGTH = Project._meta.get_field('short_description').max_length
+DEFAULT_COLOR = '#ea532e'
+
+
+class BulkError(Exception):
+    def __init__(self, message, status=400, results=None):
+        super().__init__(message)
+        self.status = status
+        self.results = results
+
+
+def slugify_title(title):
+    # Mesmo slug gerado pelo POST /api/projects/
+    return title.lower().replace(' ', '-')
+
+
+def _validate_fields(data, creating):
+    if not isinstance(data, dict):
+        return 'Campo data deve ser um objeto'
+    if (creating or 'title' in data) and not (
+            isinstance(data.get('title'), str) and data['title'].strip()):
+        return 'Título obrigatório'
+    if 'category' in data and not isinstance(data['category'], str):
+        return 'Categoria inválida'
+    if 'status' in data and data['status'] not in STATUSES:
+        return f"Status inválido: {data['status']}"
+    for field in ('description', 'short_description'):
+        if field in data and not isinstance(data[field], str):
+            return f'Campo {field} deve ser texto'
+    if len(data.get('short_description') or '') > SHORT_DESCRIPTION_LENGTH:
+        return (f'Descrição curta com mais de {SHORT_DESCRIPTION_LENGTH} '
+                'caracteres')
+    if 'tags' in data:
+        try:
+            facets.validate_tags(data['tags'])
+        except ValueError as e:
+            return str(e)
+    if 'featured' in data and not isinstance(data['featured'], bool):
+        return 'Campo featured deve ser booleano'
+    if 'order' in data and (not isinstance(data['order'], int) or data['order'] < 0):
+        return 'Ordem inválida'
+    if creating and not data.get('category'):
+        return 'Categoria obrigatória'
+    return None
+
+
+def category_name(slug):
+    return slug.title()
+
+
+def find_categories(slugs):
+    """
+    Categorias existentes por slug e os slugs novos que não podem ser criados.
+
+    Um slug novo conflita quando o nome gerado para ele já pertence a outra
+    categoria ou a outro slug novo do mesmo lote (o nome é único).
+    """
+    categories = {c.slug: c for c in Category.objects.filter(slug__in=slugs)}
+    names = {}
+    for slug in slugs:
+        if slug not in categories:
+            names.setdefault(category_name(slug), []).append(slug)
+    taken = set(Category.objects.filter(name__in=names).values_list(
+        'name', flat=True)) if names else set()
+    conflicts = {slug: name for name, group in names.items()
+                 if name in taken or len(group) > 1 for slug in group}
+    return categories, conflicts
+
+
+def resolve_categories(categories, slugs):
+    """Completa `categories` (por slug) criando as que faltam"""
+    missing = [slug for slug in slugs if slug not in categories]
+    if missing:
+        Category.objects.bulk_create([
+            Category(slug=slug, name=category_name(slug), color=DEFAULT_COLOR)
+            for slug in missing
+        ])
+        # Nem todo banco devolve a PK no bulk_create
+        categories.update(
+            (c.slug, c) for c in Category.objects.filter(slug__in=missing))
+        # bulk_create não dispara os signals que invalidam as categorias
+        refdata.invalidate()
+    return categories
+
+
+def apply(operations):
+    """Valida e aplica o lote; retorna o resultado de cada item, na ordem"""
+    if not isinstance(operations, list) or not operations:
+        raise BulkError('Nenhuma operação fornecida')
+    if len(operations) > MAX_OPERATIONS:
+        raise BulkError(
+            f'Máximo de {MAX_OPERATIONS} operações por lote', status=413)
+
+    projects = Project.objects.in_bulk([
+        op['id'] for op in operations
+        if isinstance(op, dict) and isinstance(op.get('id'), int)])
+
+    results = []
+    errors = False
+    new_slugs = {}
+    touched = set()
+    for index, op in enumerate(operations):
+        result = {'index': index, 'op': op.get('op') if isinstance(op, dict) else None}
+        results.append(result)
+        error = None
+        if not isinstance(op, dict) or op.get('op') not in OPERATIONS:
+            error = 'Operação inválida'
+        elif op['op'] == 'create':
+            error = _validate_fields(op.get('data'), creating=True)
+            if not error:
+                slug = slugify_title(op['data']['title'])
+                if slug in new_slugs:
+                    error = f'Slug duplicado no lote: {slug}'
+                new_slugs.setdefault(slug, index)
+        else:
+            result['id'] = op.get('id')
+            if not isinstance(op.get('id'), int) or op['id'] not in projects:
+                error = 'Projeto não encontrado'
+            elif op['id'] in touched:
+                error = 'Projeto repetido no lote'
+            else:
+                touched.add(op['id'])
+                if op['op'] == 'update':
+                    error = _validate_fields(op.get('data'), creating=False)
+        if error:
+            result['error'] = error
+            errors = True
+
+    # Slugs de projetos removidos no mesmo lote ficam livres
+    deleted = {projects[op['id']].slug for op in operations
+               if isinstance(op, dict) and op.get('op') == 'delete'
+               and isinstance(op.get('id'), int) and op['id'] in projects}
+    taken = set(Project.objects.filter(
+        slug__in=new_slugs).values_list('slug', flat=True)) - deleted
+    for slug in taken:
+        results[new_slugs[slug]]['error'] = f'Slug já existe: {slug}'
+        errors = True
+
+    # Categorias citadas pelos itens válidos; as novas precisam de nome livre
+    wanted = {index: op['data']['category']
+              for index, (op, result) in enumerate(zip(operations, results))
+              if 'error' not in result and op['op'] != 'delete'
+              and op['data'].get('category')}
+    categories, conflicts = find_categories(set(wanted.values()))
+    for index, slug in wanted.items():
+        if slug in conflicts:
+            results[index]['error'] = (f'Categoria {slug} não pode ser criada: '
+                                       f'o nome {conflicts[slug]} já está em uso')
+            errors = True
+
+    if errors:
+        raise BulkError('Lote inválido; nenhuma alteração aplicada',
+                        results=results)
+
+    try:
+        with transaction.atomic():
+            _write(operations, results, projects,
+                   resolve_categories(categories, set(wanted.values())))
+    except IntegrityError:
+        # Outra requisição gravou o mesmo slug ou categoria depois da validação
+        raise BulkError('Conflito com uma alteração concorrente; '
+                        'nenhuma alteração aplicada', status=409)
+    return results
+
+
+def _write(operations, results, projects, categories):
+    now = timezone.now()
+    to_create, to_update, to_delete = [], [], []
+    update_fields = {'updated_at'}
+
+    for op, result in zip(operations, results):
+        if op['op'] == 'create':
+            data = op['data']
+            project = Project(
+                slug=slugify_title(data['title']),
+                category=categories[data['category']],
+                **{field: data.get(field, default)
+                   for field, default in FIELDS.items()})
+            to_create.append((project, result))
+        elif op['op'] == 'update':
+            project = projects[op['id']]
+            for field in FIELDS:
+                if field in op['data']:
+                    setattr(project, field, op['data'][field])
+                    update_fields.add(field)
+            if op['data'].get('category'):
+                project.category = categories[op['data']['category']]
+                update_fields.add('category')
+            project.updated_at = now
+            to_update.append(project)
+            result['status'] = 'updated'
+        else:
+            to_delete.append(op['id'])
+            result['status'] = 'deleted'
+
+    if to_delete:
+        # delete() comum: os signals liberam os arquivos das mídias
+        Project.objects.filter(pk__in=to_delete).delete()
+    if to_create:
+        # bulk_create não passa pelo pre_save que põe os novos no fim
+        key = ordering.next_key('project')
+        for project, _ in to_create:
+            if key and not project.order:
+                project.order = key
+                key += ordering.GAP
+        Project.objects.bulk_create([project for project, _ in to_create])
+        created = {p.slug: p.pk for p in Project.objects.filter(
+            slug__in=[project.slug for project, _ in to_create])}
+        for project, result in to_create:
+            project.pk = created[project.slug]
+            result.update(id=project.pk, slug=project.slug,
+                          status='created')
+    if to_update:
+        Project.objects.bulk_update(to_update, sorted(update_fields))
+
+    # bulk_create/bulk_update não disparam signals
+    facets.sync_tags([project for project, _ in to_create] + (
+        to_update if 'tags' in update_fields else []))
+    search.index_projects(
+        [result['id'] for _, result in to_create]
+        + [project.pk for project in to_update])
+    bump_version(CATALOG)
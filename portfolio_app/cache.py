@@ -0,0 +1,136 @@
+"""
+Cache versionado dos payloads públicos.
+
+Cada escrita nos modelos do portfólio incrementa um contador em
+`DataVersion` (ver signals.py). O snapshot serializado fica no cache do
+Django junto com a versão usada para gerá-lo; como a versão vive no banco,
+todos os workers do gunicorn enxergam a mesma invalidação.
+"""
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import DataVersion
+from .timing import record_cache
+
+CATALOG = 'catalog'
+
+SNAPSHOT_KEY = 'portfolio:snapshot:{}'
+LOCK_KEY = 'portfolio:snapshot:{}:lock'
+
+# Tempo máximo de uma reconstrução antes do lock expirar sozinho
+LOCK_TIMEOUT = getattr(settings, 'PORTFOLIO_SNAPSHOT_LOCK_TIMEOUT', 30)
+
+_local_lock = threading.Lock()
+_fresh = threading.local()
+
+# Payload e a versão (com a data da alteração) de que ele foi gerado
+Snapshot = namedtuple('Snapshot', 'version updated_at payload')
+
+# Enviado a cada bump_version (argumento `key`), inclusive pelos caminhos
+# que gravam com update() e não disparam os signals dos modelos
+version_bumped = Signal()
+
+
+def get_version(key=CATALOG):
+    """Retorna (versão, data da última alteração) da chave"""
+    row = DataVersion.objects.filter(key=key).values_list(
+        'version', 'updated_at').first()
+    return row if row else (0, None)
+
+
+def bump_version(key=CATALOG):
+    """Incrementa a versão da chave, invalidando os snapshots dependentes"""
+    now = timezone.now()
+    updated = DataVersion.objects.filter(key=key).update(
+        version=F('version') + 1, updated_at=now)
+    if not updated:
+        _, created = DataVersion.objects.get_or_create(
+            key=key, defaults={'version': 1, 'updated_at': now})
+        if not created:
+            DataVersion.objects.filter(key=key).update(
+                version=F('version') + 1, updated_at=now)
+    version_bumped.send(sender=DataVersion, key=key)
+
+
+def _acquire(key):
+    # cache.add é atômico no backend compartilhado; o lock local cobre
+    # threads do mesmo processo em backends sem essa garantia
+    with _local_lock:
+        return cache.add(LOCK_KEY.format(key), True, LOCK_TIMEOUT)
+
+
+def _release(key):
+    cache.delete(LOCK_KEY.format(key))
+
+
+def _rebuild(key, current, builder):
+    try:
+        snapshot = Snapshot(*current, builder())
+        cache.set(SNAPSHOT_KEY.format(key), snapshot._asdict(), None)
+        return snapshot
+    finally:
+        _release(key)
+
+
+@contextmanager
+def fresh_snapshots():
+    """Dentro do bloco, get_snapshot nunca devolve um snapshot antigo"""
+    previous = getattr(_fresh, 'active', False)
+    _fresh.active = True
+    try:
+        yield
+    finally:
+        _fresh.active = previous
+
+
+def get_snapshot(key, builder, current=None, fresh=False):
+    """
+    Retorna o Snapshot em cache para a versão atual (`current`, o par de
+    get_version; lido aqui se omitido).
+
+    O primeiro leitor a ver a versão nova reconstrói na hora, e só ele
+    (single-flight). Enquanto isso, os demais recebem o snapshot anterior
+    (stale-while-revalidate), com a versão dele: ETag e Last-Modified devem
+    sair de `snapshot.version`/`updated_at`, não de `current`. Só esperam a
+    reconstrução quando ainda não há snapshot algum. Com `fresh` (ou dentro
+    de fresh_snapshots) o snapshot é sempre o da versão atual: quem perde o
+    lock monta o seu sem gravar.
+    """
+    if current is None:
+        current = get_version(key)
+    version = current[0]
+
+    entry = cache.get(SNAPSHOT_KEY.format(key))
+    if entry and entry['version'] == version:
+        record_cache(hit=True)
+        return Snapshot(**entry)
+
+    record_cache(hit=False)
+    if _acquire(key):
+        return _rebuild(key, current, builder)
+    if fresh or getattr(_fresh, 'active', False):
+        # Ex.: o painel relendo o que acabou de salvar, ou a publicação
+        return Snapshot(*current, builder())
+
+    # Reconstrução em andamento em outro request
+    if entry:
+        return Snapshot(**entry)
+
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(SNAPSHOT_KEY.format(key))
+        if entry and entry['version'] >= version:
+            return Snapshot(**entry)
+        if cache.get(LOCK_KEY.format(key)) is None:
+            # A reconstrução falhou ou o snapshot foi descartado
+            break
+    return Snapshot(*current, builder())
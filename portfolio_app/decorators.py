@@ -0,0 +1,86 @@
+"""
+Decoradores para as views assíncronas (ASGI).
+
+No Django 4.2, csrf_exempt, require_http_methods, cache_control e
+condition envolvem a view numa função síncrona, e uma view async decorada
+com eles deixa de ser tratada como corrotina. Estes são os equivalentes
+assíncronos; a partir do Django 5.0 os originais já servem.
+"""
+import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def async_reads(sync_view, methods=('GET',)):
+    """
+    A view async decorada atende só `methods`; os demais métodos (escritas
+    e o 405) seguem para `sync_view`, numa thread.
+    """
+    fallback = sync_to_async(sync_view)
+
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            if request.method in methods:
+                return await view(request, *args, **kwargs)
+            return await fallback(request, *args, **kwargs)
+
+        # O CsrfViewMiddleware olha o atributo da view resolvida
+        inner.csrf_exempt = getattr(sync_view, 'csrf_exempt', False)
+        return inner
+
+    return decorator
+
+
+def async_cache_control(**kwargs):
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kw):
+            response = await view(request, *args, **kw)
+            patch_cache_control(response, **kwargs)
+            return response
+
+        return inner
+
+    return decorator
+
+
+def async_condition(etag_func=None, last_modified_func=None):
+    """
+    Igual ao `condition` do Django; as funções continuam síncronas (leem o
+    banco) e rodam juntas numa thread.
+    """
+    def validators(request, *args, **kwargs):
+        etag = etag_func(request, *args, **kwargs) if etag_func else None
+        last_modified = (last_modified_func(request, *args, **kwargs)
+                         if last_modified_func else None)
+        if last_modified:
+            if not timezone.is_aware(last_modified):
+                last_modified = timezone.make_aware(last_modified, datetime.timezone.utc)
+            last_modified = int(last_modified.timestamp())
+        return quote_etag(etag) if etag is not None else None, last_modified
+
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag, last_modified = await sync_to_async(validators)(
+                request, *args, **kwargs)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+
+            if request.method in ('GET', 'HEAD'):
+                if last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+            return response
+
+        return inner
+
+    return decorator
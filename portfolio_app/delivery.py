@@ -0,0 +1,208 @@
+"""
+Entrega dos arquivos de mídia com suporte a Range.
+
+Usado pela view `serve_media`: resolve requisições condicionais
+(ETag/Last-Modified, If-Range), responde 206 para intervalos de bytes e
+envia o arquivo com FileResponse, que o gunicorn transmite via sendfile.
+Com PORTFOLIO_MEDIA_ACCEL configurado, a entrega é delegada ao proxy na
+frente (X-Accel-Redirect do nginx ou X-Sendfile do Apache).
+
+Sob ASGI (`aserve`) o arquivo é lido em blocos numa thread e enviado por
+um iterador assíncrono: FileResponse com arquivo síncrono seria lido
+inteiro para a memória antes do envio.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from .storage import is_hashed_name
+
+# Arquivos endereçados por conteúdo nunca mudam: cache de um ano
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+MAX_AGE = getattr(settings, 'PORTFOLIO_MEDIA_MAX_AGE', 3600)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Tamanho dos blocos lidos por aserve
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class RangeFile:
+    """Expõe só `length` bytes a partir de `start` de um arquivo aberto"""
+
+    def __init__(self, f, start, length):
+        self.file = f
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # sendfile parte da posição atual do descritor e respeita o Content-Length
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def resolve(path):
+    """Caminho absoluto do arquivo dentro do MEDIA_ROOT (404 se não existir)"""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Arquivo não encontrado')
+    if not os.path.isfile(full_path):
+        raise Http404('Arquivo não encontrado')
+    return path, full_path
+
+
+def file_etag(path, stat):
+    if is_hashed_name(path):
+        # O próprio nome já é o hash do conteúdo
+        return '"%s"' % posixpath.splitext(posixpath.basename(path))[0]
+    return '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+
+
+def parse_range(header, size):
+    """
+    Converte um header Range em (início, tamanho).
+
+    Retorna None quando o header deve ser ignorado (ausente, inválido ou
+    com vários intervalos) e levanta ValueError se não for satisfatível.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Sufixo: os últimos N bytes
+        length = min(int(last), size)
+        if length == 0:
+            raise ValueError
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError
+    return start, end - start + 1
+
+
+def if_range_matches(request, etag, last_modified):
+    """If-Range: o intervalo só vale se o arquivo não mudou"""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and int(last_modified) <= since
+
+
+def _cache_headers(response, path, etag, stat):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE if is_hashed_name(path) else f'public, max-age={MAX_AGE}')
+    return response
+
+
+def _accel_response(path, full_path, content_type):
+    accel = getattr(settings, 'PORTFOLIO_MEDIA_ACCEL', None)
+    if accel == 'nginx':
+        prefix = getattr(settings, 'PORTFOLIO_MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + path
+        return response
+    if accel == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+    return None
+
+
+def serve(request, path, body=FileResponse):
+    """
+    Resposta para o arquivo `path` do MEDIA_ROOT.
+
+    `body(arquivo, content_type=..., status=...)` monta a resposta com o
+    conteúdo (padrão: FileResponse).
+    """
+    path, full_path = resolve(path)
+    stat = os.stat(full_path)
+    etag = file_etag(path, stat)
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return _cache_headers(not_modified, path, etag, stat)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    accel = _accel_response(path, full_path, content_type)
+    if accel is not None:
+        # O proxy cuida de Range e do envio dos bytes
+        return _cache_headers(accel, path, etag, stat)
+
+    byte_range = None
+    if if_range_matches(request, etag, stat.st_mtime):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return _cache_headers(response, path, etag, stat)
+
+    f = open(full_path, 'rb')
+    if byte_range is None:
+        response = body(f, content_type=content_type)
+        response['Content-Length'] = str(stat.st_size)
+    else:
+        start, length = byte_range
+        response = body(
+            RangeFile(f, start, length), content_type=content_type, status=206)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{stat.st_size}')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return _cache_headers(response, path, etag, stat)
+
+
+async def aiter_file(f, chunk_size=STREAM_CHUNK_SIZE):
+    """Lê `f` em blocos fora do event loop e o fecha no final"""
+    read = sync_to_async(f.read, thread_sensitive=False)
+    try:
+        while chunk := await read(chunk_size):
+            yield chunk
+    finally:
+        await sync_to_async(f.close, thread_sensitive=False)()
+
+
+def async_file_response(f, **kwargs):
+    return StreamingHttpResponse(aiter_file(f), **kwargs)
+
+
+async def aserve(request, path):
+    """serve() para views async: stat e open numa thread, envio assíncrono"""
+    return await sync_to_async(serve, thread_sensitive=False)(
+        request, path, body=async_file_response)
@@ -0,0 +1,119 @@
+"""
+Índice de tags e contagens por faceta.
+
+`Project.tags` continua sendo a fonte (a API expõe a lista como está); a
+tabela ProjectTag é um índice invertido tag -> projeto, mantido a cada
+save e nas operações em lote. As contagens por tag e por categoria dos
+projetos publicados saem de uma única consulta agregada, guardada no
+cache versionado junto com o catálogo.
+"""
+from django.db import connection
+
+from .cache import CATALOG, get_snapshot, get_version
+from .models import Project, ProjectTag
+
+FACETS = 'facets'
+
+TAG_MAX_LENGTH = ProjectTag._meta.get_field('tag').max_length
+
+
+def validate_tags(tags):
+    """
+    Rejeita (ValueError) listas que o índice não guardaria como estão: a
+    validação é feita na escrita, em vez de cortar as tags longas no índice.
+    """
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError('Tags devem ser uma lista de textos')
+    for tag in tags:
+        if len(tag.strip()) > TAG_MAX_LENGTH:
+            raise ValueError(
+                f'Tag com mais de {TAG_MAX_LENGTH} caracteres: {tag.strip()[:30]}…')
+
+
+def normalize_tags(tags):
+    """Tags distintas e não vazias, na ordem em que aparecem"""
+    seen = []
+    for tag in tags if isinstance(tags, list) else []:
+        if not isinstance(tag, str):
+            continue
+        # O corte só alcança dados gravados antes de validate_tags
+        tag = tag.strip()[:TAG_MAX_LENGTH]
+        if tag and tag not in seen:
+            seen.append(tag)
+    return seen
+
+
+def sync_tags(projects):
+    """Atualiza o índice de tags dos projetos informados (só as diferenças)"""
+    wanted = {project.pk: set(normalize_tags(project.tags)) for project in projects}
+    if not wanted:
+        return
+    current = {pk: set() for pk in wanted}
+    for pk, tag in ProjectTag.objects.filter(
+            project_id__in=wanted).values_list('project_id', 'tag'):
+        current[pk].add(tag)
+
+    stale = [(pk, current[pk] - tags) for pk, tags in wanted.items()
+             if current[pk] - tags]
+    for pk, tags in stale:
+        ProjectTag.objects.filter(project_id=pk, tag__in=tags).delete()
+    ProjectTag.objects.bulk_create([
+        ProjectTag(project_id=pk, tag=tag)
+        for pk, tags in wanted.items() for tag in sorted(tags - current[pk])
+    ])
+
+
+def rebuild():
+    """Reconstrói o índice inteiro a partir de Project.tags"""
+    ProjectTag.objects.all().delete()
+    ProjectTag.objects.bulk_create([
+        ProjectTag(project_id=pk, tag=tag)
+        for pk, tags in Project.objects.values_list('pk', 'tags').iterator()
+        for tag in normalize_tags(tags)
+    ], batch_size=1000)
+
+
+FACETS_SQL = """
+    SELECT 'tag', t.tag, t.tag, COUNT(*)
+    FROM portfolio_app_projecttag t
+    JOIN portfolio_app_project p ON p.id = t.project_id
+    WHERE p.status = %s
+    GROUP BY t.tag
+    UNION ALL
+    SELECT 'category', c.slug, c.name, COUNT(p.id)
+    FROM portfolio_app_category c
+    LEFT JOIN portfolio_app_project p ON p.category_id = c.id AND p.status = %s
+    GROUP BY c.id, c.slug, c.name
+"""
+
+
+def published_facets(status='published'):
+    """
+    Contagem de projetos por tag e por categoria, numa só consulta.
+
+    Retorna {'total', 'categories': [...], 'tags': [...]}; categorias sem
+    projetos aparecem com zero, tags só quando usadas.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(FACETS_SQL, [status, status])
+        rows = cursor.fetchall()
+
+    categories = sorted(
+        ({'slug': key, 'name': label, 'count': count}
+         for kind, key, label, count in rows if kind == 'category'),
+        key=lambda facet: facet['name'])
+    tags = sorted(
+        ({'tag': key, 'count': count}
+         for kind, key, _, count in rows if kind == 'tag'),
+        key=lambda facet: (-facet['count'], facet['tag']))
+    return {
+        # Cada projeto tem exatamente uma categoria
+        'total': sum(facet['count'] for facet in categories),
+        'categories': categories,
+        'tags': tags,
+    }
+
+
+def cached_facets(current=None):
+    """Snapshot das facetas dos publicados para a versão atual do catálogo"""
+    return get_snapshot(FACETS, published_facets, current or get_version(CATALOG))
@@ -0,0 +1,80 @@
+"""
+Geração das variantes responsivas (largura x formato) de ProjectImage.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from .models import ImageVariant
+
+VARIANT_WIDTHS = getattr(
+    settings, 'PORTFOLIO_IMAGE_WIDTHS', [320, 640, 960, 1280, 1920])
+
+SAVE_OPTIONS = {
+    'avif': {'quality': 60},
+    'webp': {'quality': 80, 'method': 6},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+IMAGE_FORMATS = getattr(
+    settings, 'PORTFOLIO_IMAGE_FORMATS', ['avif', 'webp', 'jpeg'])
+
+
+def available_formats():
+    """Formatos gerados; AVIF só quando o Pillow tem suporte"""
+    return [
+        fmt for fmt in IMAGE_FORMATS
+        if fmt != 'avif' or features.check('avif')
+    ]
+
+
+def target_widths(original_width):
+    """Larguras menores que a original (nunca amplia a imagem)"""
+    widths = [w for w in VARIANT_WIDTHS if w < original_width]
+    return widths or [original_width]
+
+
+def _encode(img, format):
+    if format == 'jpeg' and img.mode != 'RGB':
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        rgba = img.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        img = background
+    elif img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA')
+    buffer = io.BytesIO()
+    img.save(buffer, format=format.upper(), **SAVE_OPTIONS[format])
+    return buffer.getvalue()
+
+
+def generate_variants(project_image):
+    """(Re)gera todas as variantes de uma imagem e retorna a lista criada"""
+    with project_image.image.open('rb') as f:
+        original = Image.open(f)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    base = os.path.splitext(os.path.basename(project_image.image.name))[0]
+    variants = []
+    for width in target_widths(original.width):
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.Resampling.LANCZOS)
+        for format in available_formats():
+            ext = 'jpg' if format == 'jpeg' else format
+            variant = ImageVariant(
+                image=project_image, format=format, width=width, height=height)
+            variant.file.save(
+                f"{base}-{width}w.{ext}",
+                ContentFile(_encode(resized, format)), save=False)
+            variants.append(variant)
+
+    with transaction.atomic():
+        for old in project_image.variants.all():
+            old.delete()
+        ImageVariant.objects.bulk_create(variants)
+    return variants
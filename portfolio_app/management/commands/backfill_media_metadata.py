@@ -0,0 +1,64 @@
+from django.core.files.images import get_image_dimensions
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from portfolio_app import metadata
+from portfolio_app.cache import CATALOG, bump_version
+from portfolio_app.models import MediaFile, Project, ProjectImage, ProjectVideo
+from portfolio_app.tasks import enqueue
+
+
+class Command(BaseCommand):
+    help = 'Preenche tamanho, tipo MIME, hash e dimensões das mídias existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recalcula também as mídias que já têm metadados')
+        parser.add_argument(
+            '--no-probe', action='store_true',
+            help='Não agenda o ffprobe dos vídeos (largura, altura e duração)')
+
+    def handle(self, *args, **options):
+        updated = 0
+        projects = set()
+        for model, field in ((ProjectImage, 'image'), (ProjectVideo, 'video'),
+                             (MediaFile, 'file')):
+            rows = model.objects.all()
+            if not options['all']:
+                missing = Q(file_size__isnull=True) | Q(content_hash='')
+                if model is not ProjectVideo:
+                    missing |= Q(width__isnull=True)
+                rows = rows.filter(missing)
+
+            for row in rows.iterator():
+                field_file = getattr(row, field)
+                try:
+                    values = metadata.describe(field_file)
+                except (OSError, ValueError) as e:
+                    self.stderr.write(f'{model.__name__} {row.pk}: {e}')
+                    continue
+
+                is_video = model is ProjectVideo or (
+                    model is MediaFile and row.media_type == 'video')
+                if not is_video:
+                    try:
+                        values['width'], values['height'] = \
+                            get_image_dimensions(field_file)
+                    except Exception:
+                        pass
+                # update() para não disparar signals (refcount, capa, cache)
+                model.objects.filter(pk=row.pk).update(**values)
+                if model is not MediaFile:
+                    projects.add(row.project_id)
+                if is_video and not options['no_probe']:
+                    enqueue('probe_video', video_id=row.pk, model=model.__name__)
+                updated += 1
+
+        # A capa guarda as dimensões da imagem principal; refresh_cover também
+        # marca o projeto (updated_at) para a publicação refazer o detalhe
+        for project in Project.objects.filter(pk__in=projects):
+            project.refresh_cover()
+        if updated:
+            bump_version(CATALOG)
+        self.stdout.write(f'{updated} mídia(s) atualizada(s)')
@@ -0,0 +1,428 @@
+"""
+Benchmark de carga das APIs e páginas públicas.
+
+Para cada escala, popula um banco temporário com um catálogo sintético
+(portfolio_app.seeding) e mede as rotas no próprio processo (test Client)
+e/ou através de um gunicorn local apontado para o mesmo banco, com workers
+síncronos (WSGI) ou uvicorn (ASGI). O resultado sai em JSON para comparar
+execuções entre commits:
+
+    python manage.py benchmark --scales 10,1000,50000 --images 3 \\
+        --mode both --output bench-$(git rev-parse --short HEAD).json
+
+Com `--slow-clients N`, N conexões lentas (enviam cada request aos poucos,
+como clientes em redes ruins) ficam ativas durante as medidas: cada uma
+prende um worker síncrono inteiro, enquanto no ASGI só ocupam o event loop
+quando há bytes para ler ou mandar.
+
+    python manage.py benchmark --scales 1000 --mode gunicorn,asgi \\
+        --slow-clients 3 --concurrency 8
+"""
+import json
+import logging
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, teardown_databases)
+
+from portfolio_app import refdata, seeding
+from portfolio_app.models import Project
+
+ENDPOINTS = {
+    'portfolio_api': '/api/portfolio/',
+    'projects_api': '/api/projects/?limit=50',
+    'project_detail_api': '/api/projects/{project_id}/',
+    'generate_portfolio_html': '/api/generate-html/',
+    'portfolio_page': '/portfolio/',
+}
+
+# Projetos diferentes a cada request no detalhe, para não medir só um
+DETAIL_SAMPLE = 50
+
+MODES = ['inprocess', 'gunicorn', 'asgi']
+# Aplicação e classe de worker do gunicorn em cada modo
+SERVERS = {
+    'gunicorn': ('bitlab_portfolio.wsgi:application', 'sync'),
+    'asgi': ('bitlab_portfolio.asgi:application', 'uvicorn_worker.UvicornWorker'),
+}
+
+# Clientes lentos: cada request leva ~15s para chegar inteiro (uma linha de
+# header a cada SLOW_CLIENT_DELAY). A leitura lenta da resposta não serviria:
+# no loopback o kernel absorve megabytes dela e libera o worker na hora
+SLOW_CLIENT_URL = '/api/facets/'
+SLOW_CLIENT_HEADERS = 30
+SLOW_CLIENT_DELAY = 0.5
+
+
+def percentiles(samples):
+    """p50/p95/p99 e média (ms) de uma lista de durações em segundos"""
+    ms = sorted(sample * 1000 for sample in samples)
+    if len(ms) < 2:
+        ms = ms * 2
+    cuts = statistics.quantiles(ms, n=100, method='inclusive')
+    return {
+        'p50_ms': round(cuts[49], 2),
+        'p95_ms': round(cuts[94], 2),
+        'p99_ms': round(cuts[98], 2),
+        'mean_ms': round(statistics.fmean(ms), 2),
+        'max_ms': round(ms[-1], 2),
+    }
+
+
+def _rss_mb(kilobytes):
+    return round(kilobytes / 1024, 1)
+
+
+def peak_rss_mb():
+    """Pico de memória residente deste processo"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em KB no Linux
+    return _rss_mb(peak / 1024 if sys.platform == 'darwin' else peak)
+
+
+def process_peak_rss_mb(pid):
+    """Pico de memória (VmHWM) de outro processo; None fora do Linux"""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return _rss_mb(int(line.split()[1]))
+    except OSError:
+        pass
+    return None
+
+
+def child_pids(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class SlowClient(threading.Thread):
+    """Envia requests linha a linha, um atrás do outro"""
+
+    def __init__(self, port, stop):
+        super().__init__(daemon=True)
+        self.port = port
+        self.stop = stop
+        self.requests = 0
+
+    def run(self):
+        lines = [f'GET {SLOW_CLIENT_URL} HTTP/1.1', 'Host: 127.0.0.1',
+                 *(f'X-Slow-{i}: 1' for i in range(SLOW_CLIENT_HEADERS)),
+                 'Connection: close', '']
+        while not self.stop.is_set():
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=120) as sock:
+                    for line in lines:
+                        sock.sendall(line.encode() + b'\r\n')
+                        if self.stop.wait(SLOW_CLIENT_DELAY):
+                            return
+                    while sock.recv(65536):
+                        pass
+                    self.requests += 1
+            except OSError:
+                # Worker reiniciado pelo timeout do gunicorn: reconecta
+                self.stop.wait(SLOW_CLIENT_DELAY)
+
+
+class Command(BaseCommand):
+    help = 'Mede latência, vazão, consultas e memória das rotas públicas em catálogos sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='10,1000',
+            help='Quantidades de projetos, separadas por vírgula (padrão: 10,1000)')
+        parser.add_argument('--images', type=int, default=3,
+                            help='Imagens por projeto')
+        parser.add_argument('--videos', type=int, default=0,
+                            help='Vídeos por projeto')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Semente do catálogo sintético')
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Requests medidos por rota')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Requests descartados antes de medir')
+        parser.add_argument(
+            '--mode', default='inprocess',
+            help='Onde rodar as rotas, separados por vírgula: inprocess, gunicorn '
+                 '(WSGI), asgi (gunicorn com workers uvicorn) ou both '
+                 '(inprocess,gunicorn); padrão: inprocess')
+        parser.add_argument('--workers', type=int, default=3,
+                            help='Workers do gunicorn')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Clientes simultâneos contra o gunicorn')
+        parser.add_argument('--slow-clients', type=int, default=0,
+                            help='Conexões lentas abertas durante as medidas no gunicorn')
+        parser.add_argument(
+            '--endpoints', default=','.join(ENDPOINTS),
+            help='Rotas medidas, separadas por vírgula')
+        parser.add_argument('--output', help='Arquivo JSON (padrão: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options['scales'].split(',')]
+        except ValueError:
+            raise CommandError('--scales deve ser uma lista de inteiros')
+        endpoints = options['endpoints'].split(',')
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f'Rotas desconhecidas: {", ".join(sorted(unknown))}')
+        if options['requests'] < 1:
+            raise CommandError('--requests deve ser positivo')
+        modes = options['mode'].replace('both', 'inprocess,gunicorn').split(',')
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f'Modos desconhecidos: {", ".join(sorted(unknown))}')
+        self.options = options
+
+        report = {
+            'meta': {
+                'revision': git_revision(),
+                'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'debug': settings.DEBUG,
+                'options': {key: options[key] for key in (
+                    'images', 'videos', 'seed', 'requests', 'warmup', 'workers',
+                    'concurrency', 'slow_clients')},
+            },
+            'runs': [],
+        }
+
+        # Uma linha de log por request do ServerTimingMiddleware atrapalharia
+        # a saída e as próprias medidas
+        timing_logger = logging.getLogger('portfolio_app.timing')
+        timing_logger.disabled = True
+        with tempfile.TemporaryDirectory(prefix='portfolio-bench-') as tmp:
+            self.tmp = Path(tmp)
+            old_config = self.setup_database(self.tmp)
+            try:
+                for scale in scales:
+                    seed_seconds = self.seed(scale)
+                    for mode in modes:
+                        self.stderr.write(f'{scale} projetos, {mode}...')
+                        report['runs'].append({
+                            'projects': scale,
+                            'mode': mode,
+                            'seed_seconds': round(seed_seconds, 2),
+                            **getattr(self, f'run_{mode}')(endpoints),
+                        })
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                timing_logger.disabled = False
+
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            Path(options['output']).write_text(payload + '\n')
+            self.stderr.write(f'Resultado gravado em {options["output"]}')
+        else:
+            self.stdout.write(payload)
+
+    def setup_database(self, tmp):
+        """Cria o banco de teste; no SQLite em arquivo, para o gunicorn enxergar"""
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if connection.vendor == 'sqlite':
+            test_settings['NAME'] = str(tmp / 'benchmark.sqlite3')
+        self.stderr.write('Criando banco temporário...')
+        return setup_databases(verbosity=0, interactive=False)
+
+    def seed(self, scale):
+        call_command('flush', interactive=False, verbosity=0)
+        started = time.perf_counter()
+        seeding.seed_catalog(scale, images=self.options['images'],
+                             videos=self.options['videos'], seed=self.options['seed'])
+        elapsed = time.perf_counter() - started
+        # Versões recomeçam do zero após o flush: descarta snapshots antigos
+        cache.clear()
+        refdata.clear()
+        pks = list(Project.objects.order_by('pk').values_list('pk', flat=True))
+        step = max(1, len(pks) // DETAIL_SAMPLE)
+        self.detail_ids = pks[::step][:DETAIL_SAMPLE] or [0]
+        return elapsed
+
+    def urls(self, name):
+        """URLs de uma rota, uma por request (o detalhe alterna projetos)"""
+        template = ENDPOINTS[name]
+        total = self.options['warmup'] + self.options['requests']
+        return [template.format(project_id=self.detail_ids[i % len(self.detail_ids)])
+                for i in range(total)]
+
+    def run_inprocess(self, endpoints):
+        if 'testserver' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        client = Client()
+        warmup = self.options['warmup']
+        results = {}
+        for name in endpoints:
+            urls = self.urls(name)
+            for url in urls[:warmup]:
+                client.get(url)
+
+            samples, errors, size = [], 0, 0
+            started = time.perf_counter()
+            for url in urls[warmup:]:
+                t0 = time.perf_counter()
+                response = client.get(url)
+                body = b''.join(response) if response.streaming else response.content
+                samples.append(time.perf_counter() - t0)
+                errors += response.status_code >= 400
+                size = len(body)
+            elapsed = time.perf_counter() - started
+
+            # Contagem num request à parte, para não pesar nas medidas
+            with CaptureQueriesContext(connection) as queries:
+                client.get(urls[-1])
+            results[name] = {
+                'url': ENDPOINTS[name],
+                'requests': len(samples),
+                'errors': errors,
+                'throughput_rps': round(len(samples) / elapsed, 1),
+                'queries': len(queries.captured_queries),
+                'response_bytes': size,
+                **percentiles(samples),
+            }
+        return {'endpoints': results, 'peak_rss_mb': peak_rss_mb()}
+
+    def run_gunicorn(self, endpoints):
+        return self.run_server(endpoints, *SERVERS['gunicorn'])
+
+    def run_asgi(self, endpoints):
+        return self.run_server(endpoints, *SERVERS['asgi'])
+
+    def run_server(self, endpoints, application, worker_class):
+        port = free_port()
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'bitlab_portfolio.settings'),
+            # O banco de teste, tanto no SQLite quanto no PostgreSQL
+            'SQLITE_PATH': str(connection.settings_dict['NAME']),
+            'POSTGRES_DB': str(connection.settings_dict['NAME']),
+        }
+        log_path = self.tmp / 'gunicorn.log'
+        with open(log_path, 'wb') as log:
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', application,
+                 '--worker-class', worker_class,
+                 '--bind', f'127.0.0.1:{port}', '--workers', str(self.options['workers']),
+                 '--log-level', 'warning'],
+                cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        base = f'http://127.0.0.1:{port}'
+        stop = threading.Event()
+        slow_clients = [SlowClient(port, stop) for _ in range(self.options['slow_clients'])]
+        try:
+            try:
+                self.wait_for(base, server)
+            except CommandError:
+                self.stderr.write(log_path.read_text(errors='replace')[-4000:])
+                raise
+            for client in slow_clients:
+                client.start()
+            # Tempo para os clientes lentos chegarem aos workers
+            if slow_clients:
+                time.sleep(SLOW_CLIENT_DELAY * 2)
+            results = {name: self.drive(base, name) for name in endpoints}
+            workers = child_pids(server.pid)
+            rss = [process_peak_rss_mb(pid) for pid in workers]
+            rss = [value for value in rss if value is not None]
+            return {
+                'endpoints': results,
+                'workers': len(workers),
+                'peak_rss_mb': max(rss) if rss else None,
+                'total_peak_rss_mb': round(sum(rss), 1) if rss else None,
+                # Requests lentos concluídos durante as medidas
+                'slow_client_requests': sum(client.requests for client in slow_clients),
+            }
+        finally:
+            stop.set()
+            server.terminate()
+            server.wait(timeout=30)
+            for client in slow_clients:
+                client.join(timeout=5)
+
+    def wait_for(self, base, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('O gunicorn terminou antes de aceitar conexões')
+            try:
+                urllib.request.urlopen(base + '/api/facets/', timeout=5).read()
+                return
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.2)
+        raise CommandError('O gunicorn não respondeu a tempo')
+
+    def drive(self, base, name):
+        warmup = self.options['warmup']
+        urls = self.urls(name)
+
+        def fetch(url):
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base + url, timeout=120) as response:
+                    body = response.read()
+                    timing = response.headers.get('Server-Timing', '')
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                body, timing, status = b'', '', e.code
+            return time.perf_counter() - t0, status, len(body), timing
+
+        with ThreadPoolExecutor(self.options['concurrency']) as pool:
+            list(pool.map(fetch, urls[:warmup]))
+            started = time.perf_counter()
+            measured = list(pool.map(fetch, urls[warmup:]))
+            elapsed = time.perf_counter() - started
+
+        # Número de consultas vem do Server-Timing, se estiver ligado
+        queries = None
+        last_timing = measured[-1][3]
+        if 'queries"' in last_timing:
+            queries = int(last_timing.split('desc="', 1)[1].split(' ', 1)[0])
+        return {
+            'url': ENDPOINTS[name],
+            'requests': len(measured),
+            'errors': sum(status >= 400 for _, status, _, _ in measured),
+            'throughput_rps': round(len(measured) / elapsed, 1),
+            'queries': queries,
+            'response_bytes': measured[-1][2],
+            **percentiles([duration for duration, _, _, _ in measured]),
+        }
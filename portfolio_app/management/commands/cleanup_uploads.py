@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from portfolio_app.uploads import SESSION_MAX_AGE, cleanup
+
+
+class Command(BaseCommand):
+    help = 'Remove uploads em partes abandonados e seus arquivos temporários'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=int, default=SESSION_MAX_AGE,
+            help='Idade máxima (segundos) sem atividade de uma sessão')
+
+    def handle(self, *args, **options):
+        removed = cleanup(options['max_age'])
+        self.stdout.write(f'{removed} sessão(ões) removida(s)')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from portfolio_app.models import ProjectImage
+from portfolio_app.tasks import enqueue
+
+
+class Command(BaseCommand):
+    help = 'Agenda a geração de variantes responsivas para imagens existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Regera também as imagens que já têm variantes')
+
+    def handle(self, *args, **options):
+        images = ProjectImage.objects.all()
+        if not options['all']:
+            images = images.filter(variants__isnull=True)
+
+        count = 0
+        for image_id in images.values_list('pk', flat=True).distinct():
+            enqueue('generate_image_variants', image_id=image_id)
+            count += 1
+        self.stdout.write(f'{count} imagem(ns) agendada(s)')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from portfolio_app import publish
+
+
+class Command(BaseCommand):
+    help = 'Publica as páginas públicas como arquivos estáticos (ver portfolio_app/publish.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Renderiza todas as páginas, inclusive as que não dependem do '
+                 'banco (use após um deploy que mude templates)')
+
+    def handle(self, *args, **options):
+        result = publish.publish(full=options['full'])
+        if result is None:
+            self.stdout.write('Nada mudou desde a última publicação')
+            return
+        self.stdout.write(
+            f'Publicação {result["release"]} no ar em {publish.ROOT / "current"}: '
+            f'{result["pages"]} página(s), {result["written"]} gravada(s), '
+            f'{result["reused"]} reaproveitada(s)')
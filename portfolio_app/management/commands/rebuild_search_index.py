@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from portfolio_app.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice de busca textual dos projetos'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.install()
+        backend.rebuild()
+        self.stdout.write(f'Índice de busca recriado ({type(backend).__name__})')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from portfolio_app import facets
+from portfolio_app.cache import CATALOG, bump_version
+from portfolio_app.models import ProjectTag
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice de tags dos projetos a partir de Project.tags'
+
+    def handle(self, *args, **options):
+        facets.rebuild()
+        bump_version(CATALOG)
+        self.stdout.write(f'Índice de tags recriado ({ProjectTag.objects.count()} entradas)')
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from portfolio_app.tasks import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas em background (variantes de imagem, etc.)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Processa a fila uma vez e sai')
+        parser.add_argument(
+            '--sleep', type=float, default=2.0,
+            help='Intervalo entre verificações da fila (segundos)')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            processed = run_pending()
+            if processed:
+                self.stdout.write(f'{processed} tarefa(s) processada(s)')
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
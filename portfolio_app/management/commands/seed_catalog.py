@@ -0,0 +1,63 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio_app import seeding
+
+
+class Command(BaseCommand):
+    help = 'Popula o banco com um catálogo sintético em volume (projetos, categorias, tags e mídias)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=1000,
+                            help='Projetos a criar (padrão: 1000)')
+        parser.add_argument('--images', type=int, default=3,
+                            help='Imagens por projeto')
+        parser.add_argument('--videos', type=int, default=0,
+                            help='Vídeos por projeto')
+        parser.add_argument('--categories', type=int, default=len(seeding.CATEGORIES),
+                            help='Total de categorias')
+        parser.add_argument('--tags', type=int, default=len(seeding.WORDS),
+                            help='Tamanho do vocabulário de tags')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Semente: os mesmos parâmetros geram os mesmos dados')
+        parser.add_argument('--batch-size', type=int, default=seeding.BATCH_SIZE,
+                            help='Projetos por lote (uma transação por lote)')
+        parser.add_argument(
+            '--files', type=int, default=32,
+            help='Imagens distintas gravadas no disco e usadas em rodízio '
+                 '(0: só nomes, sem arquivos)')
+        parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                            help='Processos que renderizam as imagens')
+
+    def handle(self, *args, **options):
+        for option in ('projects', 'batch_size', 'categories'):
+            if options[option] < 1:
+                raise CommandError(f'--{option.replace("_", "-")} deve ser positivo')
+        for option in ('images', 'videos', 'files', 'tags'):
+            if options[option] < 0:
+                raise CommandError(f'--{option} não pode ser negativo')
+
+        placeholders = None
+        if options['files'] and options['images']:
+            started = time.perf_counter()
+            placeholders = seeding.make_placeholders(
+                options['files'], seed=options['seed'], jobs=options['jobs'])
+            self.stdout.write(
+                f'{len(placeholders)} imagens geradas em '
+                f'{time.perf_counter() - started:.1f}s')
+
+        started = time.perf_counter()
+
+        def progress(done, total):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'  {done}/{total} projetos ({done / elapsed:.0f}/s)')
+
+        ids = seeding.seed_catalog(
+            options['projects'], images=options['images'], videos=options['videos'],
+            seed=options['seed'], categories=options['categories'],
+            tags=max(options['tags'], 1), placeholders=placeholders,
+            batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(ids)} projetos criados em {time.perf_counter() - started:.1f}s'))
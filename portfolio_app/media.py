@@ -0,0 +1,106 @@
+"""
+Localização e exclusão de mídias por id ou hash do conteúdo.
+
+As buscas usam só colunas indexadas (pk, content_hash e o nome exato do
+arquivo). A exclusão em lote apaga as linhas numa passada e libera os
+arquivos de uma vez ao final (ver signals.deferred_media_cleanup).
+"""
+import re
+
+from django.conf import settings
+
+from .models import ProjectImage, ProjectVideo
+from .signals import deferred_media_cleanup
+
+MAX_BATCH = getattr(settings, 'PORTFOLIO_MEDIA_DELETE_MAX', 500)
+
+HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+# Tipo de mídia -> (modelo, campo do arquivo)
+MEDIA_MODELS = {
+    'image': (ProjectImage, 'image'),
+    'video': (ProjectVideo, 'video'),
+}
+
+
+class MediaError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _ids(values, label):
+    if not isinstance(values, list) or not all(
+            isinstance(value, int) for value in values):
+        raise MediaError(f'Campo {label} deve ser uma lista de ids')
+    return values
+
+
+def name_from_path(path):
+    """Nome no storage a partir da URL ou do caminho relativo ao MEDIA_ROOT"""
+    path = path.replace('%2F', '/').lstrip('/')
+    media_prefix = settings.MEDIA_URL.lstrip('/')
+    if media_prefix and path.startswith(media_prefix):
+        path = path[len(media_prefix):]
+    return path
+
+
+def find(images=(), videos=(), hashes=(), paths=(), project_id=None):
+    """
+    Mídias por id, por hash do conteúdo ou pelo caminho exato do arquivo.
+
+    Arquivos iguais são compartilhados entre projetos (mesmo hash e mesmo
+    nome no storage), então hash e caminho só valem dentro de um projeto.
+    """
+    if (hashes or paths) and project_id is None:
+        raise MediaError('project_id obrigatório para buscar por hash ou caminho')
+    found = {}
+    for media_type, ids in (('image', images), ('video', videos)):
+        model, field = MEDIA_MODELS[media_type]
+        rows = model.objects.none()
+        if ids:
+            rows |= model.objects.filter(pk__in=ids)
+        if hashes:
+            rows |= model.objects.filter(content_hash__in=hashes)
+        if paths:
+            rows |= model.objects.filter(**{f'{field}__in': paths})
+        if project_id is not None:
+            rows = rows.filter(project_id=project_id)
+        found[media_type] = list(rows) if (ids or hashes or paths) else []
+    return found
+
+
+def delete(images=(), videos=(), hashes=(), paths=(), project_id=None):
+    """
+    Exclui as mídias encontradas numa só transação.
+
+    Retorna os ids excluídos por tipo e os ids pedidos que não existiam.
+    """
+    images = _ids(list(images), 'images')
+    videos = _ids(list(videos), 'videos')
+    hashes = list(hashes)
+    if any(not isinstance(h, str) or not HASH_RE.match(h) for h in hashes):
+        raise MediaError('Hash inválido')
+    if not (images or videos or hashes or paths):
+        raise MediaError('Nenhuma mídia informada')
+    if project_id is not None and not isinstance(project_id, int):
+        raise MediaError('project_id inválido')
+    if len(images) + len(videos) + len(hashes) + len(paths) > MAX_BATCH:
+        raise MediaError(f'Máximo de {MAX_BATCH} mídias por requisição', status=413)
+
+    found = find(images, videos, hashes, paths, project_id)
+    deleted = {media_type: sorted(row.pk for row in rows)
+               for media_type, rows in found.items()}
+    with deferred_media_cleanup():
+        for media_type, rows in found.items():
+            if rows:
+                MEDIA_MODELS[media_type][0].objects.filter(
+                    pk__in=[row.pk for row in rows]).delete()
+
+    return {
+        'deleted': deleted,
+        'not_found': {
+            'image': sorted(set(images) - set(deleted['image'])),
+            'video': sorted(set(videos) - set(deleted['video'])),
+        },
+    }
@@ -0,0 +1,91 @@
+"""
+Metadados das mídias, extraídos uma única vez no upload.
+
+Tamanho, tipo MIME e hash do conteúdo ficam em colunas dos modelos de
+mídia, de modo que serializers e templates nunca consultam o storage na
+leitura. Largura, altura e duração de vídeos exigem o ffprobe e são lidas
+pelo worker (tarefa `probe_video`).
+"""
+import json
+import mimetypes
+import subprocess
+import tempfile
+
+from django.conf import settings
+
+from . import storage
+
+
+def guess_mime_type(name):
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def file_hash(field_file):
+    """SHA-256 do arquivo; nomes endereçados por conteúdo já o carregam"""
+    if storage.is_hashed_name(field_file.name):
+        return field_file.name.rsplit('/', 1)[-1].split('.', 1)[0]
+    with field_file.open('rb'):
+        return storage.content_hash(field_file)
+
+
+def capture(instance, field_file):
+    """
+    Preenche file_size, mime_type e content_hash a partir do upload.
+
+    Chamado no save() antes do arquivo ir para o storage; o hash calculado
+    aqui é reaproveitado pelo ContentAddressedStorage para não ler o
+    conteúdo duas vezes.
+    """
+    upload = field_file.file
+    digest = storage.content_hash(upload)
+    upload.content_hash = digest
+    instance.file_size = upload.size
+    instance.mime_type = guess_mime_type(field_file.name)
+    instance.content_hash = digest
+
+
+def describe(field_file):
+    """Metadados de um arquivo já gravado (usado no backfill)"""
+    return {
+        'file_size': field_file.storage.size(field_file.name),
+        'mime_type': guess_mime_type(field_file.name),
+        'content_hash': file_hash(field_file),
+    }
+
+
+class FFprobe:
+    def __init__(self, binary=None, timeout=None):
+        self.binary = binary or getattr(
+            settings, 'PORTFOLIO_FFPROBE_BINARY', 'ffprobe')
+        self.timeout = timeout or getattr(
+            settings, 'PORTFOLIO_POSTER_TIMEOUT', 60)
+
+    def probe(self, source_path):
+        """Retorna {'width', 'height', 'duration'} do primeiro stream de vídeo"""
+        cmd = [
+            self.binary, '-v', 'error', '-select_streams', 'v:0',
+            '-show_entries', 'stream=width,height:format=duration',
+            '-of', 'json', source_path,
+        ]
+        result = subprocess.run(cmd, capture_output=True, check=True,
+                                timeout=self.timeout)
+        data = json.loads(result.stdout or b'{}')
+        stream = (data.get('streams') or [{}])[0]
+        duration = (data.get('format') or {}).get('duration')
+        return {
+            'width': stream.get('width'),
+            'height': stream.get('height'),
+            'duration': float(duration) if duration not in (None, 'N/A') else None,
+        }
+
+
+def probe_video(video, field='video'):
+    """Grava largura, altura e duração do vídeo lendo o arquivo com ffprobe"""
+    from .posters import _local_copy
+
+    with tempfile.TemporaryDirectory() as tmp:
+        info = FFprobe().probe(_local_copy(getattr(video, field), tmp))
+    type(video).objects.filter(pk=video.pk).update(**info)
+    for key, value in info.items():
+        setattr(video, key, value)
+    return info
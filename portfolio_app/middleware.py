@@ -0,0 +1,95 @@
+"""
+Middleware de instrumentação dos requests.
+
+Com `PORTFOLIO_SERVER_TIMING` ligado (padrão: DEBUG), cada resposta leva um
+header `Server-Timing` com o número de consultas, o tempo no banco, a
+serialização, a renderização de templates e os acertos do cache; as mesmas
+métricas vão para o logger `portfolio_app.timing` como campos extras.
+Requests acima de `PORTFOLIO_QUERY_BUDGET` consultas geram um warning.
+"""
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import timing
+
+logger = logging.getLogger('portfolio_app.timing')
+
+ENABLED = getattr(settings, 'PORTFOLIO_SERVER_TIMING', settings.DEBUG)
+QUERY_BUDGET = getattr(settings, 'PORTFOLIO_QUERY_BUDGET', 30)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def server_timing_header(timings):
+    metrics = [
+        f'db;dur={_ms(timings.db_time)};desc="{timings.queries} queries"',
+    ]
+    metrics += [f'{name};dur={_ms(elapsed)}'
+                for name, elapsed in timings.spans.items()]
+    if timings.cache_hits or timings.cache_misses:
+        metrics.append(
+            f'cache;desc="{timings.cache_hits} hit, {timings.cache_misses} miss"')
+    metrics.append(f'total;dur={_ms(timings.elapsed)}')
+    return ', '.join(metrics)
+
+
+class ServerTimingMiddleware:
+    # Sob ASGI roda direto no event loop, sem uma thread por request
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        # Em respostas streaming o corpo é gerado depois: só entra o que já
+        # foi medido até aqui
+        response['Server-Timing'] = server_timing_header(timings)
+        self.log(request, response, timings)
+        return response
+
+    def log(self, request, response, timings):
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': _ms(timings.elapsed),
+            'db_queries': timings.queries,
+            'db_ms': _ms(timings.db_time),
+            'cache_hits': timings.cache_hits,
+            'cache_misses': timings.cache_misses,
+            **{f'{name}_ms': _ms(elapsed) for name, elapsed in timings.spans.items()},
+        }
+        message = ' '.join(f'{key}={value}' for key, value in fields.items())
+        if QUERY_BUDGET is not None and timings.queries > QUERY_BUDGET:
+            logger.warning('Orçamento de consultas excedido (%s > %s): %s',
+                           timings.queries, QUERY_BUDGET, message, extra=fields)
+        else:
+            logger.info(message, extra=fields)
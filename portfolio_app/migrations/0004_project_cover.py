@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.core.files.images import get_image_dimensions
+
+
+def populate_covers(apps, schema_editor):
+    """Mantém uma só imagem principal por projeto e preenche a capa"""
+    Project = apps.get_model('portfolio_app', 'Project')
+    ProjectImage = apps.get_model('portfolio_app', 'ProjectImage')
+
+    for project in Project.objects.all():
+        images = list(ProjectImage.objects.filter(
+            project=project).order_by('-is_main', 'order', 'uploaded_at'))
+        extra_mains = [img.pk for img in images[1:] if img.is_main]
+        if extra_mains:
+            ProjectImage.objects.filter(pk__in=extra_mains).update(is_main=False)
+
+        for img in images:
+            try:
+                img.width, img.height = get_image_dimensions(img.image)
+            except Exception:
+                continue
+            img.save(update_fields=['width', 'height'])
+
+        if images:
+            cover = images[0]
+            project.cover_image = cover
+            project.cover_url = cover.image.url
+            project.cover_width = cover.width
+            project.cover_height = cover.height
+            project.save(update_fields=[
+                'cover_image', 'cover_url', 'cover_width', 'cover_height'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio_app', '0003_project_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='cover_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='portfolio_app.projectimage'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='cover_url',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='cover_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_covers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='projectimage',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_main', True)), fields=('project',), name='unique_main_image_per_project'),
+        ),
+    ]
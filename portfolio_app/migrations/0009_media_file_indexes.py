@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:45
+
+import django.core.validators
+from django.db import migrations, models
+import portfolio_app.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio_app', '0008_media_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='projectimage',
+            name='image',
+            field=models.ImageField(db_index=True, storage=portfolio_app.storage.get_media_storage, upload_to='portfolio/images/%Y/%m/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'webp', 'gif'])]),
+        ),
+        migrations.AlterField(
+            model_name='projectvideo',
+            name='video',
+            field=models.FileField(db_index=True, storage=portfolio_app.storage.get_media_storage, upload_to='portfolio/videos/%Y/%m/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['mp4', 'webm', 'mov', 'avi'])]),
+        ),
+    ]
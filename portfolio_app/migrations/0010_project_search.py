@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:05
+
+from django.db import migrations
+
+
+def install_search(apps, schema_editor):
+    """Cria o índice de busca do banco em uso (tsvector/GIN ou FTS5) e o popula"""
+    from portfolio_app.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    backend.install()
+    backend.rebuild()
+
+
+def uninstall_search(apps, schema_editor):
+    from portfolio_app.search import get_backend
+
+    get_backend(schema_editor.connection).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio_app', '0009_media_file_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_tags(apps, schema_editor):
+    """Monta o índice a partir das tags já gravadas nos projetos"""
+    from portfolio_app.facets import normalize_tags
+
+    Project = apps.get_model('portfolio_app', 'Project')
+    ProjectTag = apps.get_model('portfolio_app', 'ProjectTag')
+    ProjectTag.objects.bulk_create([
+        ProjectTag(project_id=pk, tag=tag)
+        for pk, tags in Project.objects.values_list('pk', 'tags').iterator()
+        for tag in normalize_tags(tags)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio_app', '0010_project_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=100)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_index', to='portfolio_app.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'project'], name='project_tag_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='projecttag',
+            constraint=models.UniqueConstraint(fields=('project', 'tag'), name='unique_project_tag'),
+        ),
+        migrations.RunPython(populate_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def create_settings(apps, schema_editor):
+    """Grava as configurações padrão para o primeiro request não escrever"""
+    PortfolioSettings = apps.get_model('portfolio_app', 'PortfolioSettings')
+    PortfolioSettings.objects.get_or_create(pk=1, defaults={
+        'allowed_image_formats': ['jpg', 'jpeg', 'png', 'webp', 'gif'],
+        'allowed_video_formats': ['mp4', 'webm', 'mov', 'avi'],
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio_app', '0011_project_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_settings, migrations.RunPython.noop),
+    ]
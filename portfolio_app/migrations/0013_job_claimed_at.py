@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:42
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_claimed_at(apps, schema_editor):
+    """Tarefas já em execução: o claim foi a última atualização"""
+    BackgroundJob = apps.get_model('portfolio_app', 'BackgroundJob')
+    BackgroundJob.objects.filter(status='running').update(claimed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio_app', '0012_default_settings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_claimed_at, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,14 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.utils import timezone
+from django.core.exceptions import ValidationError
+from django.core.files.images import get_image_dimensions
 from django.core.validators import FileExtensionValidator
 
+from . import metadata
+from .storage import get_media_storage
+
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -18,6 +25,41 @@ class Category(models.Model):
         return self.name
 
 
+class ProjectQuerySet(models.QuerySet):
+    def published(self):
+        """Apenas projetos publicados"""
+        return self.filter(status='published')
+
+    def filter_params(self, params):
+        """Aplica os filtros status, category, featured e tag da API"""
+        qs = self
+        if params.get('status'):
+            qs = qs.filter(status=params['status'])
+        if params.get('category'):
+            qs = qs.filter(category__slug=params['category'])
+        if params.get('featured'):
+            qs = qs.filter(
+                featured=params['featured'].lower() in ('1', 'true', 'yes'))
+        if params.get('tag'):
+            # Índice invertido em vez de varrer o JSON de cada projeto
+            qs = qs.filter(tag_index__tag=params['tag'])
+        return qs
+
+    def with_media(self):
+        """Carrega categoria, imagens e vídeos em um número fixo de queries"""
+        return self.select_related('category').prefetch_related(
+            'images__variants', 'videos')
+
+    def touch(self):
+        """
+        Marca os projetos como alterados.
+
+        O updated_at é a versão do detail publicado (ver publish.py); quem
+        muda mídias ou a ordem com update() precisa chamar isto.
+        """
+        return self.update(updated_at=timezone.now())
+
+
 class Project(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Rascunho'),
@@ -39,16 +81,47 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Capa desnormalizada, mantida por ProjectImage (ver refresh_cover)
+    cover_image = models.ForeignKey(
+        'ProjectImage', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+')
+    cover_url = models.CharField(max_length=500, blank=True)
+    cover_width = models.PositiveIntegerField(null=True, blank=True)
+    cover_height = models.PositiveIntegerField(null=True, blank=True)
+    cover_sources = models.JSONField(default=list, blank=True)
+    cover_thumbnail = models.CharField(max_length=500, blank=True)
+
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [
+            # Paginação por cursor em (order, -created_at, id)
+            models.Index(fields=['order', '-created_at', 'id'],
+                         name='project_keyset_idx'),
+            models.Index(fields=['status', 'order', '-created_at', 'id'],
+                         name='project_status_keyset_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def clean(self):
+        from .facets import validate_tags
+        try:
+            validate_tags(self.tags)
+        except ValueError as e:
+            raise ValidationError({'tags': str(e)})
+
     @property
     def main_image(self):
         """Retorna a imagem principal do projeto"""
-        return self.images.filter(is_main=True).first() or self.images.first()
+        # Resolve em memória: sem queries extras quando `images` foi pré-carregado
+        images = self.images.all()
+        for image in images:
+            if image.is_main:
+                return image
+        return images[0] if images else None
 
     @property
     def thumbnail(self):
@@ -56,6 +129,47 @@ class Project(models.Model):
         main_img = self.main_image
         return main_img.thumbnail if main_img else None
 
+    def refresh_cover(self):
+        """Recalcula a capa a partir das imagens e grava só a capa e o updated_at"""
+        cover = self.images.order_by(
+            '-is_main', 'order', 'uploaded_at').prefetch_related('variants').first()
+        self.cover_image = cover
+        self.cover_url = cover.image.url if cover else ''
+        self.cover_width = cover.width if cover else None
+        self.cover_height = cover.height if cover else None
+        self.cover_sources = cover.sources if cover else []
+        self.cover_thumbnail = cover.thumbnail if cover else ''
+        # As imagens fazem parte do detalhe: conta como alteração do projeto
+        self.updated_at = timezone.now()
+        Project.objects.filter(pk=self.pk).update(
+            updated_at=self.updated_at,
+            cover_image=self.cover_image,
+            cover_url=self.cover_url,
+            cover_width=self.cover_width,
+            cover_height=self.cover_height,
+            cover_sources=self.cover_sources,
+            cover_thumbnail=self.cover_thumbnail,
+        )
+
+
+class ProjectTag(models.Model):
+    """Índice invertido de Project.tags (mantido pelos signals)"""
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name='tag_index')
+    tag = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'tag'], name='unique_project_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'project'], name='project_tag_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} - {self.tag}"
+
 
 class MediaFile(models.Model):
     MEDIA_TYPES = [
@@ -67,6 +181,7 @@ class MediaFile(models.Model):
         Project, on_delete=models.CASCADE, related_name='media_files')
     file = models.FileField(
         upload_to='portfolio/%Y/%m/',
+        storage=get_media_storage,
         validators=[
             FileExtensionValidator(
                 allowed_extensions=['jpg', 'jpeg', 'png',
@@ -79,6 +194,12 @@ class MediaFile(models.Model):
     description = models.TextField(blank=True)
     is_main = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    mime_type = models.CharField(max_length=100, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -87,6 +208,18 @@ class MediaFile(models.Model):
     def __str__(self):
         return f"{self.project.title} - {self.title or self.file.name}"
 
+    def save(self, *args, **kwargs):
+        file_changed = bool(self.file) and not self.file._committed
+        self._video_changed = file_changed and self.media_type == 'video'
+        if file_changed:
+            metadata.capture(self, self.file)
+            if self.media_type == 'image':
+                try:
+                    self.width, self.height = get_image_dimensions(self.file)
+                except Exception:
+                    self.width = self.height = None
+        super().save(*args, **kwargs)
+
     @property
     def thumbnail(self):
         """Retorna o thumbnail se for imagem"""
@@ -97,10 +230,7 @@ class MediaFile(models.Model):
     @property
     def file_size_mb(self):
         """Retorna o tamanho do arquivo em MB"""
-        try:
-            return round(self.file.size / (1024 * 1024), 2)
-        except:
-            return 0
+        return round((self.file_size or 0) / (1024 * 1024), 2)
 
 
 class ProjectImage(models.Model):
@@ -109,6 +239,8 @@ class ProjectImage(models.Model):
         Project, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(
         upload_to='portfolio/images/%Y/%m/',
+        storage=get_media_storage,
+        db_index=True,
         validators=[FileExtensionValidator(
             allowed_extensions=['jpg', 'jpeg', 'png', 'webp', 'gif'])]
     )
@@ -116,19 +248,121 @@ class ProjectImage(models.Model):
     alt_text = models.CharField(max_length=200, blank=True)
     is_main = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    mime_type = models.CharField(max_length=100, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['order', 'uploaded_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project'], condition=models.Q(is_main=True),
+                name='unique_main_image_per_project'),
+        ]
 
     def __str__(self):
         return f"{self.project.title} - {self.title or self.image.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Projeto de origem: se a imagem mudar de projeto, a capa dele também
+        # precisa ser recalculada (ver update_cover_on_save)
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded_project_id = getattr(self, '_loaded_project_id', None)
+        self._previous_project_id = (
+            loaded_project_id if loaded_project_id not in (None, self.project_id) else None)
+        # Usado pelo signal para agendar as variantes responsivas
+        self._image_changed = bool(self.image) and not self.image._committed
+        if self._image_changed:
+            metadata.capture(self, self.image)
+            # Dimensões lidas do upload, antes de ir para o storage
+            try:
+                self.width, self.height = self.image.width, self.image.height
+            except Exception:
+                self.width = self.height = None
+
+        with transaction.atomic():
+            if self.is_main:
+                # Só uma imagem principal por projeto
+                ProjectImage.objects.filter(
+                    project_id=self.project_id, is_main=True
+                ).exclude(pk=self.pk).update(is_main=False)
+            super().save(*args, **kwargs)
+        self._loaded_project_id = self.project_id
+
+    @property
+    def file_size_mb(self):
+        """Retorna o tamanho do arquivo em MB"""
+        return round((self.file_size or 0) / (1024 * 1024), 2)
+
     @property
     def thumbnail(self):
-        """Retorna o thumbnail da imagem"""
+        """Retorna o thumbnail da imagem (menor variante que cobre o card)"""
+        for variant in self.variants.all():
+            if (variant.format == ImageVariant.FALLBACK_FORMAT
+                    and variant.width >= ImageVariant.THUMBNAIL_WIDTH):
+                return variant.file.url
         return self.image.url
 
+    def srcset(self, format=None):
+        """srcset das variantes de um formato (padrão: o formato de fallback)"""
+        format = format or ImageVariant.FALLBACK_FORMAT
+        return ', '.join(
+            f"{variant.file.url} {variant.width}w"
+            for variant in self.variants.all() if variant.format == format)
+
+    @property
+    def sources(self):
+        """Fontes para <picture>, do formato mais eficiente para o fallback"""
+        formats = {variant.format for variant in self.variants.all()}
+        return [
+            {'type': ImageVariant.MIME_TYPES[fmt], 'srcset': self.srcset(fmt)}
+            for fmt in ImageVariant.FORMAT_PREFERENCE if fmt in formats
+        ]
+
+
+class ImageVariant(models.Model):
+    """Versão redimensionada de uma ProjectImage, gerada em background"""
+    FORMAT_CHOICES = [
+        ('avif', 'AVIF'),
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+    MIME_TYPES = {
+        'avif': 'image/avif',
+        'webp': 'image/webp',
+        'jpeg': 'image/jpeg',
+    }
+    FORMAT_PREFERENCE = ['avif', 'webp', 'jpeg']
+    FALLBACK_FORMAT = 'jpeg'
+    THUMBNAIL_WIDTH = 400
+    SIZES = '(max-width: 768px) 100vw, (max-width: 1200px) 50vw, 400px'
+
+    image = models.ForeignKey(
+        ProjectImage, on_delete=models.CASCADE, related_name='variants')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.ImageField(upload_to='portfolio/variants/%Y/%m/')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['format', 'width']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['image', 'format', 'width'], name='unique_image_variant'),
+        ]
+
+    def __str__(self):
+        return f"{self.image} - {self.width}w {self.format}"
+
 
 class ProjectVideo(models.Model):
     """Modelo específico para vídeos do projeto"""
@@ -136,6 +370,8 @@ class ProjectVideo(models.Model):
         Project, on_delete=models.CASCADE, related_name='videos')
     video = models.FileField(
         upload_to='portfolio/videos/%Y/%m/',
+        storage=get_media_storage,
+        db_index=True,
         validators=[FileExtensionValidator(
             allowed_extensions=['mp4', 'webm', 'mov', 'avi'])]
     )
@@ -147,6 +383,12 @@ class ProjectVideo(models.Model):
         null=True
     )
     order = models.PositiveIntegerField(default=0)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    mime_type = models.CharField(max_length=100, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -155,13 +397,19 @@ class ProjectVideo(models.Model):
     def __str__(self):
         return f"{self.project.title} - {self.title or self.video.name}"
 
+    def save(self, *args, **kwargs):
+        # Usado pelo signal para agendar a extração do poster
+        self._video_changed = bool(self.video) and not self.video._committed
+        if self._video_changed:
+            metadata.capture(self, self.video)
+            # Largura, altura e duração vêm do ffprobe, no worker
+            self.width = self.height = self.duration = None
+        super().save(*args, **kwargs)
+
     @property
     def file_size_mb(self):
         """Retorna o tamanho do arquivo em MB"""
-        try:
-            return round(self.video.size / (1024 * 1024), 2)
-        except:
-            return 0
+        return round((self.file_size or 0) / (1024 * 1024), 2)
 
 
 class PortfolioSettings(models.Model):
@@ -185,11 +433,86 @@ class PortfolioSettings(models.Model):
     @classmethod
     def get_settings(cls):
         """Retorna as configurações do portfólio"""
-        settings, created = cls.objects.get_or_create(pk=1)
-        if created:
-            # Configurações padrão
-            settings.allowed_image_formats = [
-                'jpg', 'jpeg', 'png', 'webp', 'gif']
-            settings.allowed_video_formats = ['mp4', 'webm', 'mov', 'avi']
-            settings.save()
+        # A migração 0012 já cria a linha; isto só cobre bancos esvaziados
+        # (flush). Um INSERT só: cada save invalida os caches do catálogo
+        settings, _ = cls.objects.get_or_create(pk=1, defaults={
+            'allowed_image_formats': ['jpg', 'jpeg', 'png', 'webp', 'gif'],
+            'allowed_video_formats': ['mp4', 'webm', 'mov', 'avi'],
+        })
         return settings
+
+
+class StoredBlob(models.Model):
+    """Arquivo do storage endereçado por conteúdo e quantas mídias o usam"""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount})"
+
+
+class UploadSession(models.Model):
+    """Upload em partes (resumível); os bytes ficam em um arquivo temporário"""
+    STATUS_CHOICES = [
+        ('active', 'Em andamento'),
+        ('complete', 'Concluído'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name='upload_sessions')
+    media_type = models.CharField(max_length=10, choices=MediaFile.MEDIA_TYPES)
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='active')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.total_size})"
+
+
+class BackgroundJob(models.Model):
+    """Tarefa executada fora do request pelo `manage.py run_worker`"""
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('running', 'Executando'),
+        ('done', 'Concluída'),
+        ('failed', 'Falhou'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    # Quando um worker pegou a tarefa (ver tasks.requeue_abandoned)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'],
+                         name='job_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class DataVersion(models.Model):
+    """Contador de versão dos dados públicos, compartilhado entre workers"""
+    key = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
@@ -0,0 +1,183 @@
+"""
+Ordenação manual com chaves esparsas.
+
+O campo `order` de Project, ProjectImage e ProjectVideo guarda chaves com
+intervalos (múltiplos de GAP); itens novos entram no fim (next_key). Mover
+um item para entre A e B grava só o ponto médio das chaves vizinhas, uma
+linha por movimento. Quando o intervalo fica pequeno, a redistribuição das
+chaves do grupo é agendada no worker (tarefa `rebalance_order`); só se não
+houver espaço algum ela roda na hora.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .cache import CATALOG, bump_version
+from .models import BackgroundJob, Project, ProjectImage, ProjectVideo
+from .tasks import enqueue
+
+GAP = getattr(settings, 'PORTFOLIO_ORDER_GAP', 1024)
+MIN_GAP = getattr(settings, 'PORTFOLIO_ORDER_MIN_GAP', 8)
+
+# Modelos ordenáveis: (ordenação completa, campo que delimita o grupo)
+ORDERED_MODELS = {
+    'project': (Project, ('order', '-created_at', 'id'), None),
+    'image': (ProjectImage, ('order', 'uploaded_at', 'id'), 'project_id'),
+    'video': (ProjectVideo, ('order', 'uploaded_at', 'id'), 'project_id'),
+}
+
+
+class MoveError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _kind(obj):
+    for kind, (model, _, _) in ORDERED_MODELS.items():
+        if isinstance(obj, model):
+            return kind
+    raise TypeError(f'Modelo sem ordenação: {type(obj).__name__}')
+
+
+def siblings(kind, scope=None):
+    """Itens do mesmo grupo de ordenação (todos os projetos, ou as mídias de um projeto)"""
+    model, ordering, scope_field = ORDERED_MODELS[kind]
+    qs = model.objects.all()
+    if scope_field:
+        qs = qs.filter(**{scope_field: scope})
+    return qs.order_by(*ordering)
+
+
+def _scope(kind, obj):
+    scope_field = ORDERED_MODELS[kind][2]
+    return getattr(obj, scope_field) if scope_field else None
+
+
+def _has_tie(qs, key, exclude):
+    return qs.filter(order=key).exclude(pk__in=exclude).exists()
+
+
+def key_between(qs, obj, after=None, before=None):
+    """
+    Chave para `obj` logo depois de `after` e antes de `before`.
+
+    Retorna None quando não há espaço entre as chaves vizinhas (ou elas
+    empatam com outro item), caso em que o grupo precisa ser redistribuído.
+    """
+    return _placement(qs, obj, after, before)[0]
+
+
+def _placement(qs, obj, after, before):
+    """key_between() mais as chaves vizinhas de fato usadas (lo, hi)"""
+    others = qs.exclude(pk=obj.pk)
+    lo = after.order if after else None
+    hi = before.order if before else None
+
+    if after and before is None:
+        before = others.filter(order__gt=lo).order_by('order').first()
+        hi = before.order if before else None
+    elif before and after is None:
+        after = others.filter(order__lt=hi).order_by('-order').first()
+        lo = after.order if after else None
+
+    # Os próprios vizinhos não contam como empate com a chave deles
+    ignore = [obj.pk] + [item.pk for item in (after, before) if item]
+    if lo is not None and _has_tie(others, lo, ignore):
+        return None, lo, hi
+    if hi is not None and _has_tie(others, hi, ignore):
+        return None, lo, hi
+
+    if lo is None and hi is None:
+        key = GAP
+    elif hi is None:
+        key = lo + GAP
+    elif lo is None:
+        key = hi - GAP if hi > GAP else (hi // 2 if hi > 0 else None)
+    else:
+        key = (lo + hi) // 2 if hi - lo >= 2 else None
+    return key, lo, hi
+
+
+def rebalance(kind, scope=None):
+    """Redistribui as chaves do grupo em múltiplos de GAP, mantendo a ordem"""
+    model = ORDERED_MODELS[kind][0]
+    with transaction.atomic():
+        items = list(siblings(kind, scope).select_for_update().only('pk', 'order'))
+        changed = []
+        for position, item in enumerate(items, start=1):
+            if item.order != position * GAP:
+                item.order = position * GAP
+                changed.append(item)
+        if changed:
+            model.objects.bulk_update(changed, ['order'], batch_size=500)
+            _touch(kind, scope, changed)
+    return len(changed)
+
+
+def _touch(kind, scope, items):
+    # A ordem aparece no detalhe publicado: do projeto ou das suas mídias
+    if kind == 'project':
+        pks = [item.pk for item in items]
+        for i in range(0, len(pks), 500):
+            Project.objects.filter(pk__in=pks[i:i + 500]).touch()
+    else:
+        Project.objects.filter(pk=scope).touch()
+
+
+def next_key(kind, scope=None):
+    """Chave para um item novo no fim do grupo (0 enquanto o grupo não tem chaves)"""
+    last = siblings(kind, scope).exclude(order=0).order_by('-order').values_list(
+        'order', flat=True).first()
+    return last + GAP if last else 0
+
+
+def schedule_rebalance(kind, scope=None):
+    payload = {'group': kind, 'scope': scope}
+    if not BackgroundJob.objects.filter(
+            kind='rebalance_order', status='pending', payload=payload).exists():
+        enqueue('rebalance_order', **payload)
+
+
+def move(obj, after=None, before=None):
+    """
+    Coloca `obj` entre `after` e `before` (itens do mesmo grupo).
+
+    Normalmente grava uma única linha; retorna a nova chave.
+    """
+    kind = _kind(obj)
+    scope = _scope(kind, obj)
+    if after is None and before is None:
+        raise MoveError('Informe after ou before')
+    for item in (after, before):
+        if item is not None and (item.pk == obj.pk or _scope(kind, item) != scope):
+            raise MoveError('Vizinho inválido')
+
+    model = ORDERED_MODELS[kind][0]
+    with transaction.atomic():
+        qs = siblings(kind, scope)
+        key, lo, hi = _placement(qs, obj, after, before)
+        if key is None:
+            # Sem espaço entre as chaves: redistribui agora e recalcula
+            rebalance(kind, scope)
+            for item in (after, before):
+                if item is not None:
+                    item.refresh_from_db(fields=['order'])
+            key, lo, hi = _placement(qs, obj, after, before)
+        if key is None:
+            raise MoveError('Vizinhos fora de ordem', status=409)
+
+        model.objects.filter(pk=obj.pk).update(order=key)
+        obj.order = key
+
+        # Distância até os vizinhos reais, não só até o item informado
+        gaps = [abs(key - bound) for bound in (lo, hi) if bound is not None]
+        if gaps and min(gaps) < MIN_GAP:
+            schedule_rebalance(kind, scope)
+
+        # update() não dispara signals
+        if kind == 'image':
+            obj.project.refresh_cover()
+        else:
+            _touch(kind, scope, [obj])
+        bump_version(CATALOG)
+    return key
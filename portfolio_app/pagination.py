@@ -0,0 +1,82 @@
+"""
+Paginação por cursor (keyset) na ordenação padrão dos projetos.
+
+O cursor codifica (order, created_at, id) do último item da página; a
+próxima página começa logo depois dele, sem OFFSET, então o custo é o mesmo
+na primeira página e na milésima.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+PAGE_SIZE = getattr(settings, 'PORTFOLIO_API_PAGE_SIZE', 50)
+MAX_PAGE_SIZE = getattr(settings, 'PORTFOLIO_API_MAX_PAGE_SIZE', 200)
+
+KEYSET_ORDERING = ('order', '-created_at', 'id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(project):
+    raw = json.dumps(
+        [project.order, project.created_at.isoformat(), project.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        order, created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError
+        return int(order), created_at, int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Cursor inválido')
+
+
+def parse_limit(value, default=PAGE_SIZE):
+    """Tamanho da página, limitado a MAX_PAGE_SIZE"""
+    if not value:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('Parâmetro limit inválido')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def page_queryset(queryset, limit, cursor=None):
+    """A página depois de `cursor`, com um item a mais para saber se há outra"""
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    if cursor:
+        order, created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(order__gt=order)
+            | Q(order=order, created_at__lt=created_at)
+            | Q(order=order, created_at=created_at, id__gt=pk)
+        )
+    return queryset[:limit + 1]
+
+
+def paginate(queryset, limit, cursor=None):
+    """Retorna (itens da página, cursor da próxima página ou None)"""
+    return _split(list(page_queryset(queryset, limit, cursor)), limit)
+
+
+async def apaginate(queryset, limit, cursor=None):
+    """paginate() com o ORM assíncrono"""
+    return _split([item async for item in page_queryset(queryset, limit, cursor)], limit)
+
+
+def _split(items, limit):
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1])
+    return items, next_cursor
@@ -0,0 +1,84 @@
+"""
+Extração do frame de capa (poster) dos vídeos.
+
+O extrator é configurável em PORTFOLIO_POSTER_EXTRACTOR (caminho de uma
+classe com `extract(source_path, output_path)`); o padrão chama o ffmpeg,
+cujo binário pode ser trocado em PORTFOLIO_FFMPEG_BINARY, por exemplo por
+um script local nos testes.
+"""
+import abc
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.utils.module_loading import import_string
+
+
+class PosterExtractor(abc.ABC):
+    """Interface dos extratores de poster"""
+
+    @abc.abstractmethod
+    def extract(self, source_path, output_path):
+        """Grava em `output_path` um frame do vídeo em `source_path`"""
+
+
+class FFmpegPosterExtractor(PosterExtractor):
+    def __init__(self, binary=None, timestamp=None, width=None, timeout=None):
+        self.binary = binary or getattr(
+            settings, 'PORTFOLIO_FFMPEG_BINARY', 'ffmpeg')
+        self.timestamp = timestamp or getattr(
+            settings, 'PORTFOLIO_POSTER_TIMESTAMP', '00:00:01')
+        self.width = width or getattr(settings, 'PORTFOLIO_POSTER_WIDTH', 1280)
+        self.timeout = timeout or getattr(
+            settings, 'PORTFOLIO_POSTER_TIMEOUT', 60)
+
+    def _run(self, source_path, output_path, timestamp):
+        cmd = [
+            self.binary, '-y', '-ss', timestamp, '-i', source_path,
+            '-frames:v', '1', '-vf', f"scale='min({self.width},iw)':-2",
+            output_path,
+        ]
+        subprocess.run(cmd, capture_output=True, check=True,
+                       timeout=self.timeout)
+
+    def extract(self, source_path, output_path):
+        self._run(source_path, output_path, self.timestamp)
+        if not os.path.exists(output_path) or not os.path.getsize(output_path):
+            # Vídeos mais curtos que o timestamp: usa o primeiro frame
+            self._run(source_path, output_path, '0')
+        if not os.path.exists(output_path) or not os.path.getsize(output_path):
+            raise RuntimeError('Nenhum frame extraído')
+
+
+def get_extractor():
+    path = getattr(settings, 'PORTFOLIO_POSTER_EXTRACTOR',
+                   'portfolio_app.posters.FFmpegPosterExtractor')
+    return import_string(path)()
+
+
+def _local_copy(field_file, directory):
+    """Caminho local do arquivo, baixando do storage se ele não for em disco"""
+    try:
+        return field_file.path
+    except NotImplementedError:
+        target = os.path.join(directory, os.path.basename(field_file.name))
+        with field_file.open('rb') as src, open(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        return target
+
+
+def extract_poster(video, extractor=None):
+    """Gera e grava o poster do vídeo em `video.thumbnail`"""
+    extractor = extractor or get_extractor()
+    with tempfile.TemporaryDirectory() as tmp:
+        source = _local_copy(video.video, tmp)
+        output = os.path.join(tmp, 'poster.jpg')
+        extractor.extract(source, output)
+
+        name = os.path.splitext(os.path.basename(video.video.name))[0]
+        with open(output, 'rb') as f:
+            video.thumbnail.save(f"{name}-poster.jpg", File(f), save=False)
+    video.save(update_fields=['thumbnail'])
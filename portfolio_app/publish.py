@@ -0,0 +1,305 @@
+"""
+Publicação estática das páginas públicas.
+
+`manage.py publish` (ou a tarefa `publish_site`, agendada a cada mudança do
+catálogo com PORTFOLIO_PUBLISH_ON_SAVE) renderiza `/`, `/portfolio/`,
+`/api/portfolio/`, `/api/generate-html/` e o detalhe de cada projeto
+publicado em arquivos, com irmãos `.gz` e `.br` pré-comprimidos. Cada
+publicação vira um diretório novo em `releases/`, e o link simbólico
+`current` passa a apontar para ele de uma vez só (os.replace): quem serve
+os arquivos nunca vê uma publicação pela metade.
+
+A publicação é incremental: cada página declara as versões de que depende
+(a de DataVersion para as listas, o `updated_at` do projeto para o
+detalhe), e só as páginas com alguma versão alterada desde a última
+publicação são renderizadas. Os arquivos iguais aos anteriores (mesmo
+SHA-256) e as páginas não afetadas são hard links da publicação anterior,
+o que também mantém o ETag de quem já os tem em cache.
+
+Os arquivos podem ser servidos por um proxy (ver README) ou pelo
+`PublishedSite` abaixo, na frente da aplicação WSGI (o WhiteNoise não tem
+versão ASGI; sob ASGI, só o proxy).
+"""
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import secrets
+import shutil
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+from whitenoise import WhiteNoise
+
+from . import streaming
+from .cache import CATALOG, fresh_snapshots, get_version
+from .models import BackgroundJob, Project
+from .serializers import ProjectSerializer
+from .tasks import enqueue
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli é opcional
+    brotli = None
+
+ROOT = Path(getattr(settings, 'PORTFOLIO_PUBLISH_ROOT', settings.BASE_DIR / 'published'))
+ON_SAVE = getattr(settings, 'PORTFOLIO_PUBLISH_ON_SAVE', False)
+# Publicações antigas mantidas além da atual (para requests em andamento)
+KEEP = getattr(settings, 'PORTFOLIO_PUBLISH_KEEP', 3)
+
+MANIFEST = 'manifest.json'
+# Versão comprimida só é gravada se economizar pelo menos 5%
+MIN_SAVING = 0.95
+
+COMPRESSORS = [('.gz', lambda content: gzip.compress(content, 9, mtime=0))]
+if brotli is not None:
+    COMPRESSORS.append(('.br', brotli.compress))
+
+# Rota pelo nome, arquivo gravado no diretório da URL e versões de que depende
+Page = namedtuple('Page', 'name filename depends')
+
+PAGES = [
+    Page('home', 'index.html', ()),
+    Page('portfolio', 'index.html', (CATALOG,)),
+    Page('portfolio_api', 'index.json', (CATALOG,)),
+    Page('generate_portfolio_html', 'index.html', (CATALOG,)),
+]
+# Detalhe de cada projeto publicado (/api/projects/<id>/): depende só do
+# próprio projeto, versionado pelo updated_at (ver ProjectQuerySet.touch)
+PROJECT_KEY = 'project:{}'
+
+
+def project_versions():
+    """Versão de cada projeto publicado, pela chave usada no manifest"""
+    return {PROJECT_KEY.format(pk): updated_at.isoformat()
+            for pk, updated_at in Project.objects.published().values_list(
+                'pk', 'updated_at')}
+
+
+class PublishError(Exception):
+    pass
+
+
+def release_dir():
+    """Diretório da publicação no ar (None antes da primeira)"""
+    current = ROOT / 'current'
+    return current.resolve() if current.is_symlink() else None
+
+
+def _read_manifest(release):
+    if release is None:
+        return None
+    try:
+        with open(release / MANIFEST) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _exclusive():
+    """Uma publicação por vez, entre processos (comando e worker)"""
+    ROOT.mkdir(parents=True, exist_ok=True)
+    with open(ROOT / '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def render(url):
+    """Corpo da resposta de `url` a um GET anônimo"""
+    request = RequestFactory().get(url)
+    match = request.resolver_match = resolve(url)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise PublishError(f'{url} respondeu {response.status_code}')
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def iter_pages(stale, full=False):
+    """
+    (url, arquivo, depends, conteúdo) das páginas que dependem das versões
+    em `stale`, ou de todas com `full`
+    """
+    for page in PAGES:
+        if full or stale.intersection(page.depends):
+            url = reverse(page.name)
+            yield url, page.filename, page.depends, render(url)
+
+    # Mesma resposta de project_detail_api, em blocos em vez de 5 consultas
+    # por projeto
+    projects = Project.objects.published().with_media().order_by('pk')
+    if full:
+        chunks = [projects]
+    else:
+        prefix = PROJECT_KEY.format('')
+        pks = sorted(int(key[len(prefix):]) for key in stale if key.startswith(prefix))
+        chunks = [projects.filter(pk__in=pks[i:i + streaming.CHUNK_SIZE])
+                  for i in range(0, len(pks), streaming.CHUNK_SIZE)]
+    for chunk in chunks:
+        for project in streaming.iterate(chunk):
+            yield (reverse('project_detail_api', args=[project.pk]), 'index.json',
+                   (PROJECT_KEY.format(project.pk),),
+                   JsonResponse(ProjectSerializer.serialize(project)).content)
+
+
+def _link(source, target):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        # Sistema de arquivos sem hard link
+        shutil.copy2(source, target)
+
+
+def _copy_entry(previous, release, entry):
+    for suffix in ['', *entry['encodings']]:
+        _link(previous / (entry['file'] + suffix), release / (entry['file'] + suffix))
+
+
+def _write_entry(release, path, content, depends):
+    """Grava o arquivo e as versões comprimidas; retorna a entrada do manifest"""
+    target = release / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(content)
+    encodings = []
+    for suffix, compress in COMPRESSORS:
+        compressed = compress(content)
+        if len(compressed) < len(content) * MIN_SAVING:
+            target.with_name(target.name + suffix).write_bytes(compressed)
+            encodings.append(suffix)
+    return {'file': path, 'sha256': hashlib.sha256(content).hexdigest(),
+            'size': len(content), 'encodings': encodings, 'depends': list(depends)}
+
+
+def publish(full=False):
+    """
+    Gera e põe no ar uma nova publicação.
+
+    Sem `full`, só renderiza as páginas cujas versões mudaram desde a
+    publicação atual. Retorna um resumo, ou None se nada mudou.
+    """
+    with _exclusive():
+        previous = release_dir()
+        manifest = _read_manifest(previous)
+        # Lidas antes de renderizar: uma escrita durante a publicação deixa a
+        # versão gravada para trás e a próxima publicação a refaz
+        versions = {CATALOG: get_version(CATALOG)[0], **project_versions()}
+        full = full or manifest is None
+        # Inclui os projetos que saíram (excluídos ou despublicados): as
+        # páginas deles não são copiadas nem refeitas
+        old_versions = {} if full else manifest['versions']
+        stale = {key for key in versions.keys() | old_versions.keys()
+                 if full or old_versions.get(key) != versions.get(key)}
+        if not full and not stale:
+            return None
+
+        old_pages = manifest['pages'] if manifest else {}
+        name = f'{timezone.now():%Y%m%dT%H%M%S}-{secrets.token_hex(3)}'
+        release = ROOT / 'releases' / name
+        release.mkdir(parents=True)
+        try:
+            with fresh_snapshots():
+                pages, written = _build(release, previous, old_pages, stale, full)
+            with open(release / MANIFEST, 'w') as f:
+                json.dump({'versions': versions, 'created_at': timezone.now().isoformat(),
+                           'pages': pages}, f, indent=1, sort_keys=True)
+            _activate(release)
+        except BaseException:
+            shutil.rmtree(release, ignore_errors=True)
+            raise
+        _prune(release)
+    return {'release': name, 'pages': len(pages), 'written': written,
+            'reused': len(pages) - written}
+
+
+def _build(release, previous, old_pages, stale, full):
+    pages = {}
+    written = 0
+    # Páginas não afetadas pela mudança: iguais às da publicação anterior
+    for url, entry in old_pages.items():
+        if not full and not stale.intersection(entry['depends']):
+            _copy_entry(previous, release, entry)
+            pages[url] = entry
+
+    # Páginas sem dependência (a home) só são refeitas numa publicação completa
+    for url, filename, depends, content in iter_pages(stale, full):
+        path = posixpath.join(url.strip('/'), filename)
+        old = old_pages.get(url)
+        if old and old['file'] == path and old['sha256'] == hashlib.sha256(content).hexdigest():
+            _copy_entry(previous, release, old)
+            pages[url] = {**old, 'depends': list(depends)}
+        else:
+            pages[url] = _write_entry(release, path, content, depends)
+            written += 1
+    return pages, written
+
+
+def _activate(release):
+    """Troca o link `current` atomicamente"""
+    link = ROOT / f'.current-{release.name}'
+    os.symlink(os.path.relpath(release, ROOT), link)
+    os.replace(link, ROOT / 'current')
+
+
+def _prune(current):
+    releases = sorted(path for path in (ROOT / 'releases').iterdir()
+                      if path.is_dir() and path != current)
+    for path in releases[:max(len(releases) - KEEP, 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def schedule():
+    """Agenda uma publicação incremental para depois do commit"""
+    transaction.on_commit(_enqueue_once)
+
+
+def _enqueue_once():
+    # Várias escritas seguidas viram uma publicação só
+    if not BackgroundJob.objects.filter(kind='publish_site', status='pending').exists():
+        enqueue('publish_site')
+
+
+class PublishedSite(WhiteNoise):
+    """
+    Serve a publicação atual antes da aplicação WSGI, sem passar pelo Django.
+
+    Só GET e HEAD sem query string em URLs publicadas; o resto (e tudo antes
+    da primeira publicação) segue para a aplicação. A publicação guarda a
+    resposta sem parâmetros e fica atrás do banco até o worker rodar: quem
+    precisa ler o que acabou de gravar (o painel, em static/js/admin.js)
+    pede a URL com `?fresh=1`.
+    """
+
+    def __init__(self, application, root=None):
+        # autorefresh: procura o arquivo a cada request, já que `current`
+        # muda a cada publicação (ver find_file)
+        super().__init__(application, autorefresh=True, max_age=0)
+        self.current = os.path.join(root or ROOT, 'current')
+
+    def __call__(self, environ, start_response):
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD') or environ.get('QUERY_STRING'):
+            return self.application(environ, start_response)
+        return super().__call__(environ, start_response)
+
+    def find_file(self, url):
+        if not url.endswith('/') or not self.url_is_canonical(url):
+            return None
+        # O link é resolvido uma vez por request: os stats e o open() caem
+        # na mesma publicação mesmo se ela for trocada no meio
+        release = os.path.realpath(self.current)
+        for filename in ('index.html', 'index.json'):
+            path = os.path.join(release, url.lstrip('/'), filename)
+            if os.path.isfile(path):
+                return self.get_static_file(path, url)
+        return None
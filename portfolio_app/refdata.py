@@ -0,0 +1,106 @@
+"""
+Cache em memória dos dados de referência (PortfolioSettings e categorias).
+
+São tabelas pequenas, lidas em quase todo request e alteradas raramente
+(em geral pelo admin). Cada processo guarda uma cópia e confere a versão
+`reference` em DataVersion no máximo uma vez a cada CHECK_INTERVAL
+segundos, uma leitura pela chave única. Os signals sobem essa versão a
+cada escrita e limpam a cópia do próprio processo na hora; os demais
+workers enxergam a mudança em até CHECK_INTERVAL segundos. Escritas que
+não disparam signals (update() direto no banco) aparecem em até MAX_AGE;
+as em lote (bulk.py) chamam invalidate() elas mesmas. O snapshot do
+catálogo, que vive até a próxima alteração, confere a versão ao ser
+montado (check).
+
+Os objetos retornados são compartilhados entre requests: só leitura.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import bump_version, get_version
+from .models import Category, PortfolioSettings
+
+REFERENCE = 'reference'
+
+CHECK_INTERVAL = getattr(settings, 'PORTFOLIO_REFDATA_CHECK_INTERVAL', 2)
+MAX_AGE = getattr(settings, 'PORTFOLIO_REFDATA_MAX_AGE', 300)
+
+_lock = threading.Lock()
+_state = {'version': None, 'checked_at': 0.0, 'loaded_at': 0.0, 'values': {}}
+
+
+def _load_categories():
+    return tuple(Category.objects.order_by('name'))
+
+
+LOADERS = {
+    'settings': PortfolioSettings.get_settings,
+    'categories': _load_categories,
+}
+
+
+def _current_values():
+    now = time.monotonic()
+    state = _state
+    if now - state['checked_at'] < CHECK_INTERVAL:
+        return state['values']
+
+    with _lock:
+        if now - _state['checked_at'] < CHECK_INTERVAL:
+            return _state['values']
+        version, _ = get_version(REFERENCE)
+        values = _state['values']
+        if version != _state['version'] or now - _state['loaded_at'] >= MAX_AGE:
+            values = {}
+            _state['loaded_at'] = now
+        _state.update(version=version, checked_at=now, values=values)
+        return values
+
+
+def get(name):
+    """Valor em cache de `name` ('settings' ou 'categories')"""
+    values = _current_values()
+    if name not in values:
+        # Dicionário novo a cada carga: leitores concorrentes nunca veem
+        # uma cópia pela metade
+        value = LOADERS[name]()
+        with _lock:
+            if _state['values'] is values:
+                _state['values'] = {**values, name: value}
+        return value
+    return values[name]
+
+
+def portfolio_settings():
+    return get('settings')
+
+
+def categories():
+    return get('categories')
+
+
+def check():
+    """
+    Confere a versão no banco já na próxima leitura, sem esperar o
+    CHECK_INTERVAL (a cópia só é recarregada se a versão mudou). Usado por
+    quem guarda o resultado além do request, como o snapshot do catálogo.
+    """
+    with _lock:
+        _state['checked_at'] = 0.0
+
+
+def clear():
+    """Descarta a cópia local; a próxima leitura confere a versão no banco"""
+    with _lock:
+        _state.update(version=None, checked_at=0.0, values={})
+
+
+def invalidate():
+    """Marca os dados de referência como alterados em todos os processos"""
+    bump_version(REFERENCE)
+    clear()
+    # Até o commit, outro thread ainda pode recarregar os dados antigos
+    transaction.on_commit(clear)
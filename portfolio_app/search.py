@@ -0,0 +1,317 @@
+"""
+Busca textual nos projetos.
+
+O índice fica numa tabela própria, `portfolio_app_projectsearch`, mantida
+pelos signals de Project e Category:
+
+- PostgreSQL: coluna tsvector (título peso A, tags e categoria B, resumo C,
+  descrição D) com índice GIN; ranking por ts_rank_cd e trechos por
+  ts_headline.
+- SQLite: tabela virtual FTS5 com índice de prefixos; ranking por bm25 e
+  trechos montados em Python sobre os projetos retornados.
+
+Nos demais bancos a busca cai para icontains, sem ranking. O último termo
+da consulta é tratado como prefixo, o que serve também de autocomplete.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db.models import Q
+from django.utils.html import escape
+
+TABLE = 'portfolio_app_projectsearch'
+CONFIG = getattr(settings, 'PORTFOLIO_SEARCH_CONFIG', 'portuguese')
+MAX_TERMS = 8
+HIGHLIGHT = ('<mark>', '</mark>')
+SNIPPET_SIZE = 120
+DEFAULT_LIMIT = 20
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def terms(query):
+    """Termos da consulta, sem operadores nem aspas"""
+    return TERM_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+# Letras acentuadas -> sem acento, preservando o tamanho do texto
+_FOLD = str.maketrans(
+    'áàâãäåéèêëíìîïóòôõöúùûüçñýÿ',
+    'aaaaaaeeeeiiiiooooouuuucnyy')
+
+
+def _fold(text):
+    """Minúsculas e sem acentos, como o tokenizer do FTS5"""
+    return text.lower().translate(_FOLD)
+
+
+def highlight(text, query, size=SNIPPET_SIZE):
+    """
+    Trecho de `text` (cerca de `size` caracteres) em torno do primeiro termo
+    encontrado, com os termos marcados. O texto é escapado; retorna '' se
+    nenhum termo aparece.
+    """
+    words = [_fold(word) for word in terms(query)]
+    if not words or not text:
+        return ''
+    folded = _fold(text)
+    if len(folded) != len(text):
+        folded = text
+    exact = '|'.join(re.escape(word) for word in words[:-1])
+    pattern = rf'(?<!\w)(?:{re.escape(words[-1])}\w*' + (
+        rf'|(?:{exact})(?!\w)' if exact else '') + ')'
+    matches = list(re.finditer(pattern, folded))
+    if not matches:
+        return ''
+
+    start = max(0, min(matches[0].start() - size // 4, len(text) - size))
+    end = min(len(text), start + size)
+    # Ajusta as bordas para não cortar palavras
+    if start:
+        start = text.find(' ', start, matches[0].start()) + 1 or start
+    if end < len(text):
+        space = text.rfind(' ', matches[0].end(), end)
+        if space > 0:
+            end = space
+
+    parts = ['…'] if start else []
+    cursor = start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        parts.append(escape(text[cursor:match.start()]))
+        parts.append(f'{HIGHLIGHT[0]}{escape(text[match.start():match.end()])}{HIGHLIGHT[1]}')
+        cursor = match.end()
+    parts.append(escape(text[cursor:end]))
+    if end < len(text):
+        parts.append('…')
+    return ''.join(parts)
+
+
+def project_snippet(project, query):
+    """Trecho destacado do primeiro campo do projeto que contém a busca"""
+    for text in (project.short_description, project.description, project.title,
+                 ' '.join(project.tags or []), project.category.name):
+        snippet = highlight(text, query)
+        if snippet:
+            return snippet
+    return escape(project.short_description)
+
+
+class SearchBackend:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self):
+        pass
+
+    def uninstall(self):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def index(self, project_ids):
+        pass
+
+    def remove(self, project_ids):
+        pass
+
+    def search(self, query, limit, status='published'):
+        """
+        Lista de (project_id, rank, snippet), da mais relevante.
+
+        snippet None indica que o trecho deve ser montado com project_snippet.
+        """
+        from .models import Project
+
+        words = terms(query)
+        if not words:
+            return []
+        qs = Project.objects.all()
+        if status:
+            qs = qs.filter(status=status)
+        for word in words:
+            qs = qs.filter(
+                Q(title__icontains=word) | Q(short_description__icontains=word)
+                | Q(description__icontains=word) | Q(tags__icontains=word)
+                | Q(category__name__icontains=word))
+        return [(pk, 0.0, None) for pk in qs.order_by(
+            'order', '-created_at').values_list('pk', flat=True)[:limit]]
+
+    def execute(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall() if cursor.description else None
+
+
+class SQLiteBackend(SearchBackend):
+    SELECT = f"""
+        SELECT p.id, p.title, p.short_description, p.description, p.tags, c.name
+        FROM portfolio_app_project p
+        JOIN portfolio_app_category c ON c.id = p.category_id
+    """
+
+    def install(self):
+        self.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+                title, short_description, description, tags, category,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3 4'
+            )
+        """)
+
+    def uninstall(self):
+        self.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def rebuild(self):
+        self.execute(f'DELETE FROM {TABLE}')
+        self.execute(f"""
+            INSERT INTO {TABLE}
+                (rowid, title, short_description, description, tags, category)
+            {self.SELECT}
+        """)
+
+    def index(self, project_ids):
+        ids = list(project_ids)
+        if not ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ids))
+        self.remove(ids)
+        self.execute(f"""
+            INSERT INTO {TABLE}
+                (rowid, title, short_description, description, tags, category)
+            {self.SELECT} WHERE p.id IN ({placeholders})
+        """, ids)
+
+    def remove(self, project_ids):
+        ids = list(project_ids)
+        if ids:
+            placeholders = ', '.join(['%s'] * len(ids))
+            self.execute(
+                f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})', ids)
+
+    def search(self, query, limit, status='published'):
+        words = terms(query)
+        if not words:
+            return []
+        # Termos entre aspas (sem sintaxe FTS5); o último como prefixo
+        match = ' '.join(f'"{word}"' for word in words) + '*'
+
+        status_sql = 'AND p.status = %s' if status else ''
+        params = [match] + ([status] if status else []) + [limit]
+        # Todos os projetos que casam (e têm o status pedido) entram no
+        # ranking; o LIMIT vale sobre a ordem do bm25. Pesos na ordem das
+        # colunas; menor valor = mais relevante
+        ranked = self.execute(f"""
+            SELECT s.rowid, bm25({TABLE}, 10.0, 4.0, 1.0, 5.0, 3.0) AS rank
+            FROM {TABLE} s
+            JOIN portfolio_app_project p ON p.id = s.rowid
+            WHERE {TABLE} MATCH %s {status_sql}
+            ORDER BY rank
+            LIMIT %s
+        """, params)
+        # O trecho destacado é montado depois, a partir do projeto carregado
+        # (snippet() refaria o MATCH inteiro para cada linha)
+        return [(pk, -rank, None) for pk, rank in ranked]
+
+
+class PostgresBackend(SearchBackend):
+    DOCUMENT = """
+        setweight(to_tsvector(%(config)s::regconfig, p.title), 'A')
+        || setweight(to_tsvector(%(config)s::regconfig, p.tags::text), 'B')
+        || setweight(to_tsvector(%(config)s::regconfig, c.name), 'B')
+        || setweight(to_tsvector(%(config)s::regconfig, p.short_description), 'C')
+        || setweight(to_tsvector(%(config)s::regconfig, p.description), 'D')
+    """
+
+    def install(self):
+        self.execute(f"""
+            CREATE TABLE IF NOT EXISTS {TABLE} (
+                project_id bigint PRIMARY KEY
+                    REFERENCES portfolio_app_project (id) ON DELETE CASCADE,
+                document tsvector NOT NULL
+            )
+        """)
+        self.execute(f"""
+            CREATE INDEX IF NOT EXISTS {TABLE}_document_gin
+            ON {TABLE} USING gin (document)
+        """)
+
+    def uninstall(self):
+        self.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def _upsert(self, where='', params=None):
+        self.execute(f"""
+            INSERT INTO {TABLE} (project_id, document)
+            SELECT p.id, {self.DOCUMENT}
+            FROM portfolio_app_project p
+            JOIN portfolio_app_category c ON c.id = p.category_id
+            {where}
+            ON CONFLICT (project_id) DO UPDATE SET document = EXCLUDED.document
+        """, {'config': CONFIG, **(params or {})})
+
+    def rebuild(self):
+        self.execute(f'TRUNCATE {TABLE}')
+        self._upsert()
+
+    def index(self, project_ids):
+        ids = list(project_ids)
+        if ids:
+            self._upsert('WHERE p.id = ANY(%(ids)s)', {'ids': ids})
+
+    def remove(self, project_ids):
+        ids = list(project_ids)
+        if ids:
+            self.execute(
+                f'DELETE FROM {TABLE} WHERE project_id = ANY(%s)', [ids])
+
+    def search(self, query, limit, status='published'):
+        words = terms(query)
+        if not words:
+            return []
+        tsquery = ' & '.join(words) + ':*'
+        status_sql = 'AND p.status = %(status)s' if status else ''
+        # ts_headline é caro: só roda nas linhas que sobraram do LIMIT
+        return self.execute(f"""
+            SELECT r.project_id, r.rank,
+                   ts_headline(%(config)s::regconfig,
+                               coalesce(nullif(p.short_description, ''), p.description),
+                               r.query,
+                               'StartSel={HIGHLIGHT[0]}, StopSel={HIGHLIGHT[1]}, MaxWords=24, MinWords=10')
+            FROM (
+                -- O status é filtrado antes do ranking, sobre todos os que casam
+                SELECT s.project_id, ts_rank_cd(s.document, q) AS rank, q AS query
+                FROM {TABLE} s
+                JOIN portfolio_app_project p ON p.id = s.project_id,
+                     to_tsquery(%(config)s::regconfig, %(tsquery)s) q
+                WHERE s.document @@ q {status_sql}
+                ORDER BY rank DESC
+                LIMIT %(limit)s
+            ) r
+            JOIN portfolio_app_project p ON p.id = r.project_id
+            ORDER BY r.rank DESC
+        """, {'config': CONFIG, 'tsquery': tsquery, 'status': status,
+              'limit': limit})
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        return PostgresBackend(connection)
+    if connection.vendor == 'sqlite':
+        return SQLiteBackend(connection)
+    return SearchBackend(connection)
+
+
+def index_projects(project_ids):
+    get_backend().index(project_ids)
+
+
+def remove_projects(project_ids):
+    get_backend().remove(project_ids)
+
+
+def search_projects(query, limit=20, status='published'):
+    return get_backend().search(query, limit, status)
@@ -0,0 +1,213 @@
+"""
+Catálogos sintéticos para benchmarks e testes de carga.
+
+Tudo é gravado com bulk_create em lotes, cada lote numa transação, sem
+passar pelos signals; os dados derivados (capa, índice de tags, busca e
+refcount dos arquivos) são atualizados junto com cada lote, e a versão do
+catálogo sobe uma vez no final. O conteúdo depende só de `seed`, então
+duas execuções com os mesmos parâmetros geram o mesmo catálogo.
+"""
+import io
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from . import facets, refdata, search, storage
+from .cache import CATALOG, bump_version
+from .models import Category, Project, ProjectImage, ProjectVideo
+from .ordering import GAP
+
+WORDS = (
+    'marca site design loja app branding vídeo ilustração editorial '
+    'campanha produto digital cliente identidade sistema painel motion '
+    'interface experiência conteúdo estratégia lançamento plataforma'
+).split()
+
+CATEGORIES = [
+    ('Web Design', 'web-design', '#ea532e'),
+    ('Branding', 'branding', '#0096ff'),
+    ('E-commerce', 'e-commerce', '#00ff88'),
+    ('Sistemas', 'sistemas', '#ff6b35'),
+    ('UI/UX', 'ui-ux', '#8b5cf6'),
+    ('Motion', 'motion', '#f59e0b'),
+]
+
+BATCH_SIZE = 1000
+TAGS_PER_PROJECT = 3
+
+# Arquivo de imagem referenciado pelas mídias sintéticas
+Placeholder = namedtuple(
+    'Placeholder', 'name width height size content_hash mime_type')
+
+IMAGE_SIZE = (1600, 1000)
+PLACEHOLDER_VIDEO = 'portfolio/videos/seed/placeholder-{}.mp4'
+
+# Sem arquivos no disco: nomes fictícios (os endpoints só montam as URLs)
+DEFAULT_PLACEHOLDERS = [
+    Placeholder(f'portfolio/images/seed/placeholder-{i}.jpg', *IMAGE_SIZE,
+                None, '', 'image/jpeg')
+    for i in range(16)
+]
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def tag_vocabulary(size):
+    """`size` tags distintas (palavras da lista, depois palavra-número)"""
+    if size <= len(WORDS):
+        return WORDS[:size]
+    return WORDS + [f'{WORDS[i % len(WORDS)]}-{i // len(WORDS)}'
+                    for i in range(len(WORDS), size)]
+
+
+def ensure_categories(count=len(CATEGORIES)):
+    """As categorias padrão e, acima delas, 'Categoria N' até somar `count`"""
+    wanted = CATEGORIES[:count] + [
+        (f'Categoria {i + 1}', f'categoria-{i + 1}', '#ea532e')
+        for i in range(len(CATEGORIES), count)
+    ]
+    existing = set(Category.objects.values_list('slug', flat=True))
+    Category.objects.bulk_create([
+        Category(name=name, slug=slug, color=color)
+        for name, slug, color in wanted if slug not in existing
+    ], batch_size=BATCH_SIZE)
+    return list(Category.objects.filter(slug__in=[slug for _, slug, _ in wanted]))
+
+
+def render_placeholder(args):
+    """JPEG determinístico (cor e faixas a partir de `seed`); roda nos workers"""
+    from PIL import Image, ImageDraw
+
+    index, seed, width, height = args
+    rng = random.Random(f'{seed}-{index}')
+    image = Image.new('RGB', (width, height), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(6):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        draw.rectangle(
+            [x0, y0, x0 + rng.randrange(width // 2), y0 + rng.randrange(height // 2)],
+            fill=tuple(rng.randrange(256) for _ in range(3)))
+    draw.text((width // 20, height // 20), f'#{index}', fill=(255, 255, 255))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=80)
+    return buffer.getvalue()
+
+
+def make_placeholders(count, seed=0, size=IMAGE_SIZE, jobs=None):
+    """
+    Gera `count` imagens no storage de mídia, renderizadas em paralelo.
+
+    Os nomes vêm do hash do conteúdo: repetir a chamada com os mesmos
+    parâmetros reaproveita os arquivos já gravados. Cada gravação conta uma
+    referência própria, então os placeholders continuam no storage depois
+    que os projetos de seed são apagados.
+    """
+    media = ProjectImage._meta.get_field('image').storage
+    tasks = [(index, seed, *size) for index in range(count)]
+    placeholders = []
+    with ProcessPoolExecutor(jobs) as pool:
+        for index, data in enumerate(pool.map(render_placeholder, tasks, chunksize=4)):
+            content = ContentFile(data)
+            content.content_hash = storage.content_hash(content)
+            name = media.save(f'portfolio/images/seed/placeholder-{index}.jpg', content)
+            placeholders.append(Placeholder(
+                name, *size, len(data), content.content_hash, 'image/jpeg'))
+    return placeholders
+
+
+def seed_catalog(projects, images=3, videos=0, seed=0, categories=len(CATEGORIES),
+                 tags=len(WORDS), published_ratio=0.9, placeholders=None,
+                 batch_size=BATCH_SIZE, progress=None):
+    """
+    Cria `projects` projetos com `images` imagens e `videos` vídeos cada.
+
+    As imagens usam os arquivos de `placeholders` em rodízio (padrão: nomes
+    sem arquivo). `progress(feitos, total)` é chamado após cada lote.
+    Retorna os ids criados.
+    """
+    rng = random.Random(seed)
+    placeholders = placeholders or DEFAULT_PLACEHOLDERS
+    sizes = {file.name: file.size for file in placeholders if file.size}
+    vocabulary = tag_vocabulary(tags)
+    category_rows = ensure_categories(categories)
+    start = Project.objects.count()
+    last_order = Project.objects.order_by('-order').values_list(
+        'order', flat=True).first() or 0
+
+    def placeholder(i, j):
+        return placeholders[(i * images + j) % len(placeholders)]
+
+    ids = []
+    for offset in range(0, projects, batch_size):
+        with transaction.atomic():
+            batch = [
+                Project(
+                    title=f'{_text(rng, 3).title()} {start + i}',
+                    slug=f'seed-{seed}-{start + i}',
+                    category=rng.choice(category_rows),
+                    description=_text(rng, 80),
+                    short_description=_text(rng, 12),
+                    tags=rng.sample(vocabulary, min(TAGS_PER_PROJECT, len(vocabulary))),
+                    featured=rng.random() < 0.1,
+                    status='published' if rng.random() < published_ratio else 'draft',
+                    order=last_order + (i + 1) * GAP,
+                    **_cover(placeholder(i, 0) if images else None),
+                )
+                for i in range(offset, min(offset + batch_size, projects))
+            ]
+            Project.objects.bulk_create(batch)
+            if batch[0].pk is None:
+                # Banco sem RETURNING no bulk_create: busca as chaves pelo slug
+                pks = dict(Project.objects.filter(
+                    slug__in=[p.slug for p in batch]).values_list('slug', 'pk'))
+                for project in batch:
+                    project.pk = pks[project.slug]
+            batch_ids = [project.pk for project in batch]
+
+            image_rows = [
+                ProjectImage(
+                    project_id=pk, image=file.name, title=f'Imagem {j + 1}',
+                    is_main=j == 0, order=(j + 1) * GAP, width=file.width,
+                    height=file.height, file_size=file.size,
+                    content_hash=file.content_hash, mime_type=file.mime_type)
+                for i, pk in enumerate(batch_ids, start=offset)
+                for j in range(images) for file in [placeholder(i, j)]
+            ]
+            ProjectImage.objects.bulk_create(image_rows)
+            ProjectVideo.objects.bulk_create([
+                ProjectVideo(
+                    project_id=pk, video=PLACEHOLDER_VIDEO.format(j),
+                    title=f'Vídeo {j + 1}', order=(j + 1) * GAP,
+                    mime_type='video/mp4')
+                for pk in batch_ids for j in range(videos)
+            ])
+
+            # bulk_create não dispara signals: capa, tags, busca e refcount à mão
+            Project.objects.filter(pk__in=batch_ids).update(cover_image=Subquery(
+                ProjectImage.objects.filter(
+                    project_id=OuterRef('pk'), is_main=True).values('pk')[:1]))
+            facets.sync_tags(batch)
+            search.index_projects(batch_ids)
+            storage.retain_many([row.image.name for row in image_rows], sizes)
+        ids += batch_ids
+        if progress:
+            progress(len(ids), projects)
+
+    bump_version(CATALOG)
+    refdata.invalidate()
+    return ids
+
+
+def _cover(file):
+    """Campos da capa para a imagem principal `file` (ver refresh_cover)"""
+    if file is None:
+        return {}
+    url = ProjectImage._meta.get_field('image').storage.url(file.name)
+    return {'cover_url': url, 'cover_thumbnail': url,
+            'cover_width': file.width, 'cover_height': file.height}
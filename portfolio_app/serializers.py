@@ -1,4 +1,6 @@
-from .models import Project, Category, ProjectImage, ProjectVideo
+import os
+
+from .models import Project, Category, ProjectImage, ProjectVideo, ImageVariant
 
 
 class CategorySerializer:
@@ -23,6 +25,13 @@ class ProjectImageSerializer:
             'alt_text': image.alt_text,
             'is_main': image.is_main,
             'order': image.order,
+            'width': image.width,
+            'height': image.height,
+            'mime_type': image.mime_type,
+            'file_size_mb': image.file_size_mb,
+            'srcset': image.srcset(),
+            'sources': image.sources,
+            'sizes': ImageVariant.SIZES,
             'uploaded_at': image.uploaded_at.isoformat()
         }
 
@@ -38,6 +47,10 @@ class ProjectVideoSerializer:
             'thumbnail': video.thumbnail.url if video.thumbnail else None,
             'order': video.order,
             'file_size_mb': video.file_size_mb,
+            'mime_type': video.mime_type,
+            'width': video.width,
+            'height': video.height,
+            'duration': video.duration,
             'uploaded_at': video.uploaded_at.isoformat()
         }
 
@@ -60,6 +73,141 @@ class ProjectSerializer:
             'updated_at': project.updated_at.isoformat(),
             'images': [ProjectImageSerializer.serialize(img) for img in project.images.all()],
             'videos': [ProjectVideoSerializer.serialize(vid) for vid in project.videos.all()],
-            'main_image': project.main_image.image.url if project.main_image else None,
-            'thumbnail': project.thumbnail
+            'main_image': project.cover_url or None,
+            'thumbnail': project.cover_thumbnail or project.cover_url or None
+        }
+
+
+class PortfolioSerializer:
+    """Formato usado por /api/portfolio/ (consumido pelo painel admin)"""
+
+    @staticmethod
+    def serialize_image(img):
+        return {
+            'id': str(img.id),
+            'filename': os.path.basename(img.image.name),
+            'path': img.image.url,
+            'title': img.title,
+            'alt_text': img.alt_text,
+            'is_main': img.is_main,
+            'order': img.order,
+            'width': img.width,
+            'height': img.height,
+            'mime_type': img.mime_type,
+            'file_size_mb': img.file_size_mb,
+            'srcset': img.srcset(),
+            'sources': img.sources,
+            'sizes': ImageVariant.SIZES,
+            'uploaded_at': img.uploaded_at.isoformat()
+        }
+
+    @staticmethod
+    def serialize_video(vid):
+        return {
+            'id': str(vid.id),
+            'filename': os.path.basename(vid.video.name),
+            'path': vid.video.url,
+            'title': vid.title,
+            'description': vid.description,
+            'thumbnail': vid.thumbnail.url if vid.thumbnail else None,
+            'order': vid.order,
+            'file_size_mb': vid.file_size_mb,
+            'mime_type': vid.mime_type,
+            'width': vid.width,
+            'height': vid.height,
+            'duration': vid.duration,
+            'uploaded_at': vid.uploaded_at.isoformat()
+        }
+
+    @staticmethod
+    def serialize_project(project):
+        return {
+            'id': str(project.id),
+            'title': project.title,
+            'slug': project.slug,
+            'category': project.category.slug,
+            'description': project.description,
+            'short_description': project.short_description,
+            'tags': project.tags,
+            'featured': project.featured,
+            'status': project.status,
+            'order': project.order,
+            'created_at': project.created_at.isoformat(),
+            'updated_at': project.updated_at.isoformat(),
+            'images': [PortfolioSerializer.serialize_image(img) for img in project.images.all()],
+            'videos': [PortfolioSerializer.serialize_video(vid) for vid in project.videos.all()],
+            'main_image': project.cover_url or None,
+            'thumbnail': project.cover_thumbnail or project.cover_url or None
+        }
+
+    @staticmethod
+    def serialize_settings(settings):
+        return {
+            'auto_generate_thumbnails': settings.auto_generate_thumbnails,
+            'max_file_size_mb': settings.max_file_size_mb,
+            'allowed_image_formats': settings.allowed_image_formats,
+            'allowed_video_formats': settings.allowed_video_formats
+        }
+
+    @staticmethod
+    def serialize(projects, categories, settings):
+        return {
+            'projects': [PortfolioSerializer.serialize_project(p) for p in projects],
+            'categories': [CategorySerializer.serialize(cat) for cat in categories],
+            'settings': PortfolioSerializer.serialize_settings(settings)
+        }
+
+
+class SearchResultSerializer:
+    """Projeto resumido nos resultados da busca"""
+
+    @staticmethod
+    def serialize(project):
+        return {
+            'id': str(project.id),
+            'title': project.title,
+            'slug': project.slug,
+            'category': project.category.slug,
+            'category_name': project.category.name,
+            'short_description': project.short_description,
+            'tags': project.tags,
+            'thumbnail': project.cover_thumbnail or project.cover_url or None
+        }
+
+
+class UploadSerializer:
+    """Resposta dos endpoints de upload"""
+
+    @staticmethod
+    def serialize(media):
+        if isinstance(media, ProjectImage):
+            return {
+                'id': str(media.id),
+                'filename': os.path.basename(media.image.name),
+                'path': media.image.url,
+                'title': media.title,
+                'is_main': media.is_main,
+                'content_hash': media.content_hash,
+                'uploaded_at': media.uploaded_at.isoformat()
+            }
+        return {
+            'id': str(media.id),
+            'filename': os.path.basename(media.video.name),
+            'path': media.video.url,
+            'title': media.title,
+            'file_size_mb': media.file_size_mb,
+            'content_hash': media.content_hash,
+            'uploaded_at': media.uploaded_at.isoformat()
+        }
+
+    @staticmethod
+    def serialize_session(session):
+        return {
+            'id': str(session.id),
+            'project_id': str(session.project_id),
+            'type': session.media_type,
+            'filename': session.filename,
+            'size': session.total_size,
+            'offset': session.received,
+            'status': session.status,
         }
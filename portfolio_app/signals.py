@@ -0,0 +1,269 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import CATALOG, bump_version, version_bumped
+from .models import (
+    Project, Category, ProjectImage, ProjectVideo, PortfolioSettings, ImageVariant,
+    MediaFile)
+from . import facets, ordering, publish, refdata, search, storage
+from .tasks import enqueue
+
+
+_batch = threading.local()
+
+
+@contextmanager
+def deferred_media_cleanup():
+    """
+    Agrupa os efeitos de exclusões em lote de mídias.
+
+    Dentro do bloco, os signals só anotam os arquivos liberados e os
+    projetos afetados; ao sair, o refcount é atualizado de uma vez, as
+    capas são recalculadas uma vez por projeto, os projetos que perderam
+    vídeos são marcados numa consulta só e a versão do catálogo sobe uma
+    única vez.
+    """
+    batch = {'names': [], 'projects': set(), 'touched': set(), 'dirty': False}
+    previous = getattr(_batch, 'current', None)
+    _batch.current = batch
+    try:
+        with transaction.atomic():
+            yield batch
+            _batch.current = previous
+            storage.release_many(batch['names'])
+            for project in Project.objects.filter(pk__in=batch['projects']):
+                project.refresh_cover()
+            if batch['touched']:
+                Project.objects.filter(pk__in=batch['touched']).touch()
+            if batch['dirty']:
+                bump_version(CATALOG)
+    finally:
+        _batch.current = previous
+
+
+def _current_batch():
+    return getattr(_batch, 'current', None)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=ProjectImage)
+@receiver(post_save, sender=ProjectVideo)
+@receiver(post_save, sender=PortfolioSettings)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=ProjectImage)
+@receiver(post_delete, sender=ProjectVideo)
+@receiver(post_delete, sender=PortfolioSettings)
+def invalidate_catalog(sender, **kwargs):
+    """Qualquer escrita no portfólio invalida o snapshot público"""
+    if kwargs.get('raw'):
+        return
+    batch = _current_batch()
+    if batch is not None:
+        batch['dirty'] = True
+        return
+    bump_version(CATALOG)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=PortfolioSettings)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=PortfolioSettings)
+def invalidate_reference_data(sender, **kwargs):
+    """Configurações e categorias ficam em cache em cada processo"""
+    if kwargs.get('raw'):
+        return
+    refdata.invalidate()
+
+
+@receiver(post_save, sender=ProjectVideo)
+@receiver(post_delete, sender=ProjectVideo)
+def touch_video_project(sender, instance, raw=False, origin=None, **kwargs):
+    """O detalhe publicado do projeto lista os vídeos"""
+    # As imagens já marcam o projeto em refresh_cover
+    if raw or isinstance(origin, Project):
+        return
+    batch = _current_batch()
+    if batch is not None:
+        batch['touched'].add(instance.project_id)
+        return
+    Project.objects.filter(pk=instance.project_id).touch()
+
+
+@receiver(post_save, sender=Category)
+def touch_category_projects(sender, instance, raw=False, created=False, **kwargs):
+    # A categoria vai embutida no detalhe de cada projeto
+    if raw or created:
+        return
+    instance.projects.touch()
+
+
+@receiver(version_bumped)
+def schedule_publish(sender, key, **kwargs):
+    """Republica as páginas estáticas depois de cada mudança no catálogo"""
+    if key == CATALOG and publish.ON_SAVE:
+        publish.schedule()
+
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, raw=False, **kwargs):
+    """Mantém o índice de busca textual em dia"""
+    if raw:
+        return
+    search.index_projects([instance.pk])
+
+
+@receiver(post_save, sender=Project)
+def index_project_tags(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Mantém o índice invertido de tags em dia"""
+    if raw or (update_fields is not None and 'tags' not in update_fields):
+        return
+    facets.sync_tags([instance])
+
+
+@receiver(post_save, sender=Category)
+def index_category_projects(sender, instance, raw=False, created=False, **kwargs):
+    # O nome da categoria faz parte do documento indexado
+    if raw or created:
+        return
+    search.index_projects(instance.projects.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Project)
+def unindex_project(sender, instance, **kwargs):
+    search.remove_projects([instance.pk])
+
+
+@receiver(post_save, sender=ProjectImage)
+def update_cover_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance.project.refresh_cover()
+    # Imagem movida para outro projeto: o de origem perde a capa antiga
+    previous = getattr(instance, '_previous_project_id', None)
+    if previous is not None:
+        for project in Project.objects.filter(pk=previous):
+            project.refresh_cover()
+
+
+@receiver(post_save, sender=ProjectImage)
+def schedule_image_variants(sender, instance, raw=False, **kwargs):
+    """Agenda as variantes responsivas quando um novo arquivo é enviado"""
+    if raw or not getattr(instance, '_image_changed', False):
+        return
+    if refdata.portfolio_settings().auto_generate_thumbnails:
+        enqueue('generate_image_variants', image_id=instance.pk)
+
+
+@receiver(post_save, sender=ProjectVideo)
+def schedule_video_poster(sender, instance, raw=False, **kwargs):
+    """Agenda a extração do poster quando um vídeo novo chega sem thumbnail"""
+    if raw or instance.thumbnail or not getattr(instance, '_video_changed', False):
+        return
+    if refdata.portfolio_settings().auto_generate_thumbnails:
+        enqueue('extract_video_poster', video_id=instance.pk)
+
+
+@receiver(post_save, sender=ProjectVideo)
+@receiver(post_save, sender=MediaFile)
+def schedule_video_probe(sender, instance, raw=False, **kwargs):
+    """Lê largura, altura e duração de vídeos novos no worker"""
+    if raw or not getattr(instance, '_video_changed', False):
+        return
+    enqueue('probe_video', video_id=instance.pk, model=sender.__name__)
+
+
+@receiver(post_delete, sender=ImageVariant)
+def delete_variant_file(sender, instance, **kwargs):
+    # Variantes são derivadas: o arquivo não é compartilhado com ninguém.
+    # Só após o commit: num rollback a linha volta e o arquivo precisa existir
+    if instance.file:
+        storage, name = instance.file.storage, instance.file.name
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_delete, sender=ProjectImage)
+def update_cover_on_delete(sender, instance, origin=None, **kwargs):
+    # Na exclusão do projeto inteiro não há capa para manter
+    if isinstance(origin, Project):
+        return
+    batch = _current_batch()
+    if batch is not None:
+        batch['projects'].add(instance.project_id)
+        return
+    project = Project.objects.filter(pk=instance.project_id).first()
+    if project:
+        project.refresh_cover()
+
+
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender=ProjectImage)
+@receiver(pre_save, sender=ProjectVideo)
+def assign_order_key(sender, instance, raw=False, **kwargs):
+    """Projetos novos entram no fim da lista; mídias novas, no fim do projeto"""
+    if raw or not instance._state.adding or instance.order:
+        return
+    if sender is Project:
+        instance.order = ordering.next_key('project')
+        return
+    kind = 'image' if sender is ProjectImage else 'video'
+    instance.order = ordering.next_key(kind, instance.project_id)
+
+
+# Campo de arquivo (no storage endereçado por conteúdo) de cada modelo de mídia
+MEDIA_FILE_FIELDS = {
+    ProjectImage: 'image',
+    ProjectVideo: 'video',
+    MediaFile: 'file',
+}
+
+
+@receiver(pre_save, sender=ProjectImage)
+@receiver(pre_save, sender=ProjectVideo)
+@receiver(pre_save, sender=MediaFile)
+def remember_previous_file(sender, instance, raw=False, **kwargs):
+    field = MEDIA_FILE_FIELDS[sender]
+    instance._previous_file = None
+    # Arquivo novo: o _save do storage já conta a referência desta mídia
+    instance._file_retained = not getattr(instance, field)._committed
+    if raw or instance.pk is None or not instance._file_retained:
+        return
+    instance._previous_file = sender.objects.filter(
+        pk=instance.pk).values_list(field, flat=True).first()
+
+
+@receiver(post_save, sender=ProjectImage)
+@receiver(post_save, sender=ProjectVideo)
+@receiver(post_save, sender=MediaFile)
+def count_file_reference(sender, instance, created, raw=False, **kwargs):
+    """Mantém o refcount dos arquivos compartilhados entre as mídias"""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_file', None)
+    field_file = getattr(instance, MEDIA_FILE_FIELDS[sender])
+    current = field_file.name
+    if created or (previous is not None and previous != current):
+        if (storage.is_hashed_name(current)
+                and not getattr(instance, '_file_retained', False)):
+            storage.retain(current, instance.file_size or field_file.size)
+        if previous:
+            storage.release(previous)
+    instance._previous_file = None
+    instance._file_retained = False
+
+
+@receiver(post_delete, sender=ProjectImage)
+@receiver(post_delete, sender=ProjectVideo)
+@receiver(post_delete, sender=MediaFile)
+def release_file_reference(sender, instance, **kwargs):
+    name = getattr(instance, MEDIA_FILE_FIELDS[sender]).name
+    batch = _current_batch()
+    if batch is not None:
+        batch['names'].append(name)
+        return
+    storage.release(name)
@@ -0,0 +1,172 @@
+"""
+Storage endereçado por conteúdo para as mídias enviadas.
+
+O nome final do arquivo é o SHA-256 do conteúdo, em diretórios
+particionados pelo próprio hash (`cas/ab/cd/<hash>.<ext>`). Uploads
+idênticos resolvem para o mesmo nome e não são gravados de novo; quantas
+linhas de ProjectImage, ProjectVideo e MediaFile apontam para cada arquivo
+fica em StoredBlob.refcount, e o arquivo é apagado quando ninguém mais o
+referencia. A própria gravação pelo storage já conta a referência de
+quem gravou (ver ContentAddressedStorage._save). Como o nome muda sempre
+que o conteúdo muda, as URLs podem ser servidas com cache permanente.
+"""
+import hashlib
+import os
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.functional import LazyObject
+from django.utils.module_loading import import_string
+
+CAS_PREFIX = 'cas'
+
+
+def content_hash(content):
+    """SHA-256 do conteúdo, lido em blocos"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+    return digest.hexdigest()
+
+
+def hashed_name(digest, original_name):
+    ext = os.path.splitext(original_name)[1].lower()
+    return f"{CAS_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def is_hashed_name(name):
+    return bool(name) and name.startswith(CAS_PREFIX + '/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # O nome definitivo vem do hash em _save; não há colisão a resolver
+        return name
+
+    def _save(self, name, content):
+        # O hash pode já ter sido calculado na captura de metadados
+        digest = getattr(content, 'content_hash', None) or content_hash(content)
+        name = hashed_name(digest, name)
+
+        # A referência é contada antes de olhar o disco e na mesma
+        # transação: a linha do StoredBlob fica travada até o arquivo
+        # existir, então um release() concorrente não o apaga no meio
+        with transaction.atomic():
+            retain(name, content.size)
+            if not self.exists(name):
+                self._write(name, content)
+        return name
+
+    def _write(self, name, content):
+        # Grava com nome temporário único e renomeia: se dois uploads do
+        # mesmo conteúdo correrem juntos, o resultado final é idêntico
+        directory = os.path.dirname(name)
+        tmp_name = super()._save(
+            f"{directory}/.{uuid.uuid4().hex}.tmp", content)
+        os.replace(self.path(tmp_name), self.path(name))
+
+
+class MediaStorage(LazyObject):
+    def _setup(self):
+        path = getattr(settings, 'PORTFOLIO_MEDIA_STORAGE',
+                       'portfolio_app.storage.ContentAddressedStorage')
+        self._wrapped = import_string(path)()
+
+
+media_storage = MediaStorage()
+
+
+def get_media_storage():
+    """Storage dos arquivos de mídia (callable usado nos FileFields)"""
+    return media_storage
+
+
+def retain(name, size=0):
+    """
+    Registra mais uma referência ao arquivo.
+
+    O UPDATE trava a linha (e espera uma coleta em andamento); sem linha,
+    ela é criada já com a referência.
+    """
+    from .models import StoredBlob
+
+    if not is_hashed_name(name):
+        return
+    with transaction.atomic():
+        if StoredBlob.objects.filter(name=name).update(refcount=F('refcount') + 1):
+            return
+        try:
+            with transaction.atomic():
+                StoredBlob.objects.create(name=name, size=size, refcount=1)
+        except IntegrityError:
+            # Outro retain criou a linha primeiro
+            StoredBlob.objects.filter(name=name).update(refcount=F('refcount') + 1)
+
+
+def release(name):
+    """Remove uma referência; apaga o arquivo quando não sobra nenhuma"""
+    release_many([name])
+
+
+def retain_many(names, sizes=None):
+    """retain() de vários nomes de uma vez (um nome pode se repetir)"""
+    from .models import StoredBlob
+
+    counts = Counter(name for name in names if is_hashed_name(name))
+    if not counts:
+        return
+    sizes = sizes or {}
+    with transaction.atomic():
+        for count, group in _by_count(counts).items():
+            StoredBlob.objects.filter(name__in=group).update(
+                refcount=F('refcount') + count)
+        existing = set(StoredBlob.objects.filter(
+            name__in=counts).values_list('name', flat=True))
+        StoredBlob.objects.bulk_create([
+            StoredBlob(name=name, size=sizes.get(name, 0), refcount=counts[name])
+            for name in counts if name not in existing
+        ])
+
+
+def release_many(names):
+    """release() de vários nomes de uma vez (um nome pode se repetir)"""
+    from .models import StoredBlob
+
+    counts = Counter(name for name in names if is_hashed_name(name))
+    if not counts:
+        return
+    with transaction.atomic():
+        for count, group in _by_count(counts).items():
+            StoredBlob.objects.filter(name__in=group).update(
+                refcount=Greatest(F('refcount') - count, 0))
+        # Só apaga os arquivos se a transação de fato confirmar a liberação
+        transaction.on_commit(lambda: collect(list(counts)))
+
+
+def collect(names):
+    """
+    Apaga os arquivos de `names` que estão sem nenhuma referência.
+
+    A linha sai antes do arquivo e na mesma transação: um retain()
+    concorrente espera o DELETE e, encontrando a linha já removida, conta
+    a referência numa linha nova e grava o arquivo de novo.
+    """
+    from .models import StoredBlob
+
+    with transaction.atomic():
+        for name in names:
+            if StoredBlob.objects.filter(name=name, refcount=0).delete()[0]:
+                media_storage.delete(name)
+
+
+def _by_count(counts):
+    """Agrupa os nomes pela quantidade, para um UPDATE por quantidade"""
+    groups = {}
+    for name, count in counts.items():
+        groups.setdefault(count, []).append(name)
+    return groups
@@ -0,0 +1,106 @@
+"""
+Geração incremental de JSON para respostas grandes.
+
+Os projetos são lidos do banco em blocos (`iterator(chunk_size=...)`) e
+cada item é codificado e enviado assim que fica pronto, então a memória do
+worker não cresce com o tamanho do catálogo. Usa orjson quando instalado.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+CHUNK_SIZE = getattr(settings, 'PORTFOLIO_STREAM_CHUNK_SIZE', 200)
+# Agrupa itens pequenos antes de enviar para não fazer um write por item
+BUFFER_SIZE = 64 * 1024
+
+_django_encoder = DjangoJSONEncoder()
+
+
+def dumps(obj):
+    """Codifica `obj` em bytes JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_django_encoder.default)
+    return json.dumps(obj, cls=DjangoJSONEncoder).encode()
+
+
+def iter_array(items, serialize):
+    """Gera um array JSON item a item"""
+    yield b'['
+    for i, item in enumerate(items):
+        chunk = dumps(serialize(item))
+        yield b',' + chunk if i else chunk
+    yield b']'
+
+
+def iter_object(fields):
+    """
+    Gera um objeto JSON a partir de pares (chave, valor).
+
+    O valor pode ser um gerador de bytes (ex.: `iter_array`), que é
+    repassado sem ser materializado.
+    """
+    yield b'{'
+    for i, (key, value) in enumerate(fields):
+        yield (b',' if i else b'') + dumps(key) + b':'
+        if hasattr(value, '__next__'):
+            yield from value
+        else:
+            yield dumps(value)
+    yield b'}'
+
+
+def buffered(chunks, size=BUFFER_SIZE):
+    """Junta pedaços pequenos em blocos de até `size` bytes"""
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def iterate(queryset, chunk_size=CHUNK_SIZE):
+    """Percorre o queryset em blocos, mantendo os prefetches por bloco"""
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def streaming_json_response(chunks, **kwargs):
+    return StreamingHttpResponse(
+        buffered(chunks), content_type='application/json', **kwargs)
+
+
+async def aiterate(chunks):
+    """
+    Consome um iterador síncrono sem bloquear o event loop.
+
+    Cada next() roda na thread do request (thread_sensitive), a mesma que
+    mantém o cursor aberto do iterator() do queryset.
+    """
+    step = sync_to_async(next)
+    done = object()
+    try:
+        while (chunk := await step(chunks, done)) is not done:
+            yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def async_streaming_json_response(chunks, **kwargs):
+    """streaming_json_response para views async (ASGI)"""
+    return StreamingHttpResponse(
+        aiterate(buffered(chunks)), content_type='application/json', **kwargs)
@@ -0,0 +1,182 @@
+"""
+Fila de tarefas simples sobre o banco (BackgroundJob).
+
+Trabalho pesado, como gerar variantes de imagem ou posters de vídeo, é
+agendado com `enqueue` e executado pelo `manage.py run_worker`, fora dos
+workers do gunicorn.
+Com PORTFOLIO_TASKS_EAGER = True as tarefas rodam logo após o commit, no
+próprio processo (útil em desenvolvimento sem worker).
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, 'PORTFOLIO_TASKS_MAX_ATTEMPTS', 3)
+RETRY_DELAY = getattr(settings, 'PORTFOLIO_TASKS_RETRY_DELAY', 30)
+# Tarefa em execução há mais que isso (segundos) é de um worker que morreu
+CLAIM_TIMEOUT = getattr(settings, 'PORTFOLIO_TASKS_CLAIM_TIMEOUT', 15 * 60)
+
+_handlers = {}
+
+
+def task(kind):
+    """Registra uma função como handler de um tipo de tarefa"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, **payload):
+    """Agenda uma tarefa; ela só fica visível ao worker após o commit"""
+    job = BackgroundJob.objects.create(kind=kind, payload=payload)
+    if getattr(settings, 'PORTFOLIO_TASKS_EAGER', False):
+        transaction.on_commit(lambda: _claim(job) and run_job(job))
+    return job
+
+
+def _claim(job):
+    """Marca a tarefa como em execução se ninguém a pegou antes (compare-and-set)"""
+    now = timezone.now()
+    claimed = BackgroundJob.objects.filter(
+        pk=job.pk, status='pending').update(
+            status='running', attempts=job.attempts + 1, claimed_at=now,
+            updated_at=now)
+    if claimed:
+        job.status = 'running'
+        job.attempts += 1
+        job.claimed_at = now
+    return bool(claimed)
+
+
+def requeue_abandoned(timeout=CLAIM_TIMEOUT):
+    """
+    Devolve à fila as tarefas presas em 'running' há mais de `timeout`
+    segundos (o worker caiu no meio). A tentativa perdida já foi contada no
+    claim; acima de MAX_ATTEMPTS a tarefa falha.
+    """
+    now = timezone.now()
+    abandoned = BackgroundJob.objects.filter(
+        status='running', claimed_at__lt=now - timedelta(seconds=timeout))
+    error = 'Worker interrompido durante a execução'
+    failed = abandoned.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status='failed', error=error, updated_at=now)
+    requeued = abandoned.update(
+        status='pending', error=error, run_after=now, updated_at=now)
+    return requeued + failed
+
+
+def claim_next():
+    """Reserva a próxima tarefa pendente"""
+    requeue_abandoned()
+    for job in BackgroundJob.objects.filter(
+            status='pending', run_after__lte=timezone.now())[:10]:
+        if _claim(job):
+            return job
+    return None
+
+
+def run_job(job):
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'Tarefa desconhecida: {job.kind}')
+        handler(**job.payload)
+    except Exception:
+        logger.exception('Falha na tarefa %s', job)
+        job.error = traceback.format_exc()
+        if job.attempts < MAX_ATTEMPTS and handler is not None:
+            job.status = 'pending'
+            job.run_after = timezone.now() + timedelta(
+                seconds=RETRY_DELAY * job.attempts)
+        else:
+            job.status = 'failed'
+    else:
+        job.status = 'done'
+        job.error = ''
+    job.save(update_fields=['status', 'error', 'run_after', 'updated_at'])
+    return job
+
+
+def run_pending(limit=None):
+    """Executa tarefas pendentes até esvaziar a fila ou atingir `limit`"""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+@task('generate_image_variants')
+def generate_image_variants(image_id):
+    from . import imaging
+    from .cache import CATALOG, bump_version
+    from .models import ProjectImage
+
+    image = ProjectImage.objects.select_related('project').filter(
+        pk=image_id).first()
+    if image is None:
+        return
+    imaging.generate_variants(image)
+    image.project.refresh_cover()
+    bump_version(CATALOG)
+
+
+@task('publish_site')
+def publish_site():
+    from . import publish
+
+    publish.publish()
+
+
+@task('extract_video_poster')
+def extract_video_poster(video_id):
+    from . import posters
+    from .models import ProjectVideo
+
+    video = ProjectVideo.objects.filter(pk=video_id).first()
+    if video is None or video.thumbnail:
+        return
+    posters.extract_poster(video)
+
+
+@task('probe_video')
+def probe_video(video_id, model='ProjectVideo'):
+    from . import metadata
+    from .cache import CATALOG, bump_version
+    from . import models
+
+    video = getattr(models, model).objects.filter(pk=video_id).first()
+    if video is None:
+        return
+    field = 'file' if model == 'MediaFile' else 'video'
+    metadata.probe_video(video, field)
+    if model == 'ProjectVideo':
+        models.Project.objects.filter(pk=video.project_id).touch()
+    bump_version(CATALOG)
+
+
+@task('rebalance_order')
+def rebalance_order(group, scope=None):
+    from . import ordering
+    from .cache import CATALOG, bump_version
+    from .models import Project
+
+    if not ordering.rebalance(group, scope):
+        return
+    if group == 'image':
+        project = Project.objects.filter(pk=scope).first()
+        if project:
+            project.refresh_cover()
+    bump_version(CATALOG)
@@ -1,3 +1,1230 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed, ValidationError
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.http import Http404
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import (
+    cache as snapshots, facets, middleware, ordering, publish, refdata, search, seeding,
+    tasks, uploads, views)
+from .models import (
+    BackgroundJob, Category, ImageVariant, PortfolioSettings, Project, ProjectImage,
+    ProjectVideo, StoredBlob, UploadSession)
+from .upload_handlers import MULTIPART_OVERHEAD
+
+SIZES = (2, 10, 40)
+
+# Teto por request, folgado para máquinas de CI lentas
+LATENCY_CEILING = 1.0
+
+# SAVEPOINTs vêm do atomic() do TestCase, não da rota
+IGNORED_SQL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def png_bytes(color=(234, 83, 46)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def format_queries(queries):
+    return '\n'.join(f'{i}. {query["sql"]}' for i, query in enumerate(queries, start=1))
+
+
+# O orçamento conta as consultas da aplicação; as do DatabaseCache de
+# settings.py (uma por get/set) dependem só do backend configurado
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class PortfolioTestCase(TestCase):
+    """Caches vazios e MEDIA_ROOT temporário (`self.media_root`) em cada teste"""
+
+    def setUp(self):
+        # Caches de processo sobrevivem ao rollback entre os testes
+        cache.clear()
+        refdata.clear()
+        self.media_root = tempfile.mkdtemp(prefix='portfolio-test-media-')
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class QueryBudgetTestCase(PortfolioTestCase):
+    """
+    Orçamento de consultas e teto de latência das rotas de portfolio_app/urls.py.
+
+    Cada rota é medida com o catálogo em vários tamanhos (SIZES); o teste
+    falha se passar do orçamento, se passar do teto de latência ou se o número
+    de consultas mudar com o tamanho do catálogo (sinal de N+1). A mensagem de
+    falha traz o SQL executado. Ficam de fora `test/` (o template não existe)
+    e `admin/`, que o admin do Django atende antes desta rota.
+
+        python manage.py test portfolio_app
+    """
+
+    def setUp(self):
+        super().setUp()
+        temp_dir = mock.patch.object(uploads, 'TEMP_DIR', self.media_root + '/tmp')
+        temp_dir.start()
+        self.addCleanup(temp_dir.stop)
+        # Contagens determinísticas: os dados de referência só são
+        # conferidos após clear()
+        patch = mock.patch.object(refdata, 'CHECK_INTERVAL', float('inf'))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def grow(self, size):
+        """Completa o catálogo até `size` projetos e descarta os snapshots"""
+        missing = size - Project.objects.count()
+        if missing > 0:
+            seeding.seed_catalog(missing, images=3, videos=1, seed=size)
+        cache.clear()
+        refdata.clear()
+
+    def project(self):
+        return Project.objects.order_by('-pk').first()
+
+    def post_json(self, name, data, args=()):
+        return self.client.post(reverse(name, args=args), json.dumps(data),
+                                content_type='application/json')
+
+    def measure(self, request):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request()
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        queries = [query for query in captured.captured_queries
+                   if not query['sql'].startswith(IGNORED_SQL)]
+        return response, queries, elapsed
+
+    def assertQueryBudget(self, budget, request, status=200, prepare=None,
+                          ceiling=LATENCY_CEILING):
+        """
+        Roda `request(*prepare())` em cada tamanho de SIZES e confere
+        orçamento, latência e número constante de consultas. `prepare` roda
+        fora da medição: buscas de ids e requests auxiliares ficam nele.
+        """
+        counts = {}
+        for size in SIZES:
+            self.grow(size)
+            args = prepare() if prepare else ()
+            response, queries, elapsed = self.measure(lambda: request(*args))
+            self.assertEqual(
+                response.status_code, status,
+                f'{size} projetos: status {response.status_code}\n'
+                f'{getattr(response, "content", b"")[:500]!r}')
+            if len(queries) > budget:
+                self.fail(f'{size} projetos: {len(queries)} consultas, '
+                          f'orçamento {budget}\n{format_queries(queries)}')
+            if elapsed > ceiling:
+                self.fail(f'{size} projetos: {elapsed * 1000:.0f}ms, '
+                          f'teto {ceiling * 1000:.0f}ms\n{format_queries(queries)}')
+            counts[size] = queries
+
+        if len({len(queries) for queries in counts.values()}) > 1:
+            first, last = SIZES[0], SIZES[-1]
+            self.fail(
+                'O número de consultas cresce com o catálogo: '
+                + ', '.join(f'{size} projetos = {len(queries)}'
+                            for size, queries in counts.items())
+                + f'\n--- {first} projetos\n{format_queries(counts[first])}'
+                + f'\n--- {last} projetos\n{format_queries(counts[last])}')
+
+
+class PageQueryBudgetTests(QueryBudgetTestCase):
+    def test_home(self):
+        self.assertQueryBudget(0, lambda: self.client.get(reverse('home')))
+
+    def test_portfolio_page(self):
+        self.assertQueryBudget(3, lambda: self.client.get(reverse('portfolio')))
+
+    def test_generate_portfolio_html(self):
+        self.assertQueryBudget(
+            1, lambda: self.client.get(reverse('generate_portfolio_html')))
+
+
+class CatalogApiQueryBudgetTests(QueryBudgetTestCase):
+    def test_portfolio_api_cold(self):
+        self.assertQueryBudget(7, lambda: self.client.get(reverse('portfolio_api')))
+
+    def test_portfolio_api_warm(self):
+        url = reverse('portfolio_api')
+
+        def prepare():
+            self.client.get(url)
+            return ()
+
+        self.assertQueryBudget(1, lambda: self.client.get(url), prepare=prepare)
+
+    def test_portfolio_api_not_modified(self):
+        url = reverse('portfolio_api')
+        self.assertQueryBudget(
+            1, lambda etag: self.client.get(url, HTTP_IF_NONE_MATCH=etag),
+            status=304, prepare=lambda: (self.client.get(url)['ETag'],))
+
+    def test_portfolio_api_stream(self):
+        self.assertQueryBudget(
+            7, lambda: self.client.get(reverse('portfolio_api'), {'stream': 1}))
+
+    def test_projects_api_list(self):
+        self.assertQueryBudget(
+            5, lambda: self.client.get(reverse('projects_api'), {'limit': 20}))
+
+    def test_projects_api_next_page(self):
+        url = reverse('projects_api')
+        self.assertQueryBudget(
+            5, lambda cursor: self.client.get(url, {'limit': 20, 'cursor': cursor}),
+            prepare=lambda: (self.client.get(url, {'limit': 1}).json()['next_cursor'],))
+
+    def test_projects_api_filters(self):
+        self.assertQueryBudget(5, lambda: self.client.get(reverse('projects_api'), {
+            'category': 'branding', 'tag': 'marca', 'status': 'published',
+            'limit': 20}))
+
+    def test_projects_api_stream(self):
+        self.assertQueryBudget(
+            5, lambda: self.client.get(reverse('projects_api'), {'stream': 1}))
+
+    def test_search_api(self):
+        self.assertQueryBudget(
+            2, lambda: self.client.get(reverse('search_api'), {'q': 'marca'}))
+
+    def test_facets_api(self):
+        self.assertQueryBudget(2, lambda: self.client.get(reverse('facets_api')))
+
+    def test_project_detail(self):
+        self.assertQueryBudget(
+            5, lambda pk: self.client.get(reverse('project_detail_api', args=[pk])),
+            prepare=lambda: (self.project().pk,))
+
+
+class WriteApiQueryBudgetTests(QueryBudgetTestCase):
+    def test_project_create(self):
+        self.assertQueryBudget(10, lambda count: self.post_json('projects_api', {
+            'title': f'Novo {count}', 'category': 'branding',
+            'description': 'Descrição', 'tags': ['a', 'b'],
+        }), status=201, prepare=lambda: (Project.objects.count(),))
+
+    def test_project_update(self):
+        self.assertQueryBudget(12, lambda pk: self.client.put(
+            reverse('project_detail_api', args=[pk]),
+            json.dumps({'title': 'Alterado', 'tags': ['x'], 'category': 'motion'}),
+            content_type='application/json'), prepare=lambda: (self.project().pk,))
+
+    def test_project_delete(self):
+        self.assertQueryBudget(20, lambda pk: self.client.delete(
+            reverse('project_detail_api', args=[pk])),
+            prepare=lambda: (self.project().pk,))
+
+    def test_projects_bulk(self):
+        def prepare():
+            return Project.objects.order_by('pk')[0].pk, self.project().pk
+
+        self.assertQueryBudget(40, lambda first, last: self.post_json(
+            'projects_bulk_api', {'operations': [
+                {'op': 'create', 'data': {'title': f'Lote {last}', 'category': 'branding'}},
+                {'op': 'update', 'id': first, 'data': {'tags': [f'lote-{last}']}},
+                {'op': 'delete', 'id': last},
+            ]}), prepare=prepare)
+
+    def test_project_move(self):
+        def prepare():
+            first, second = Project.objects.order_by('order')[:2]
+            return first.pk, second.pk
+
+        self.assertQueryBudget(7, lambda before, pk: self.post_json(
+            'project_move_api', {'before': before}, args=[pk]), prepare=prepare)
+
+    def test_image_move(self):
+        def prepare():
+            project = self.project()
+            first, second = project.images.order_by('order')[:2]
+            return project.pk, first.pk, second.pk
+
+        self.assertQueryBudget(10, lambda pk, before, image: self.post_json(
+            'image_move_api', {'before': before}, args=[pk, image]),
+            prepare=prepare)
+
+    def test_video_move(self):
+        def prepare():
+            project = self.project()
+            after = ProjectVideo.objects.create(
+                project=project, video='portfolio/videos/seed/extra.mp4')
+            return project.pk, after.pk, project.videos.exclude(pk=after.pk)[0].pk
+
+        self.assertQueryBudget(7, lambda pk, after, video: self.post_json(
+            'video_move_api', {'after': after}, args=[pk, video]), prepare=prepare)
+
+
+class MediaApiQueryBudgetTests(QueryBudgetTestCase):
+    def image_file(self, name='capa.png'):
+        """PNG com conteúdo único para o tamanho atual do catálogo"""
+        upload = io.BytesIO(png_bytes((Project.objects.count(), 0, 0)))
+        upload.name = name
+        return upload
+
+    def upload(self):
+        """Envia uma imagem nova e retorna o nome dela no storage"""
+        response = self.client.post(reverse('upload_media_api'), {
+            'file': self.image_file(), 'project_id': self.project().pk,
+            'type': 'image'})
+        self.assertEqual(response.status_code, 200, response.content)
+        return ProjectImage.objects.get(pk=response.json()['id']).image.name
+
+    def test_upload_image(self):
+        self.assertQueryBudget(12, lambda pk, upload: self.client.post(
+            reverse('upload_media_api'),
+            {'file': upload, 'project_id': pk, 'type': 'image'}),
+            prepare=lambda: (self.project().pk, self.image_file()))
+
+    def test_upload_session(self):
+        def prepare():
+            data = self.image_file().getvalue()
+            session = self.client.post(
+                reverse('upload_session_create_api'),
+                json.dumps({'project_id': self.project().pk, 'type': 'image',
+                            'filename': 'parte.png', 'size': len(data)}),
+                content_type='application/json').json()['id']
+            self.client.put(
+                reverse('upload_session_api', args=[session]), data,
+                content_type='application/offset+octet-stream',
+                HTTP_UPLOAD_OFFSET='0')
+            return (session,)
+
+        self.assertQueryBudget(12, lambda session: self.client.post(
+            reverse('upload_session_complete_api', args=[session])),
+            status=201, prepare=prepare)
+
+    def test_upload_session_offset(self):
+        def prepare():
+            return (UploadSession.objects.create(
+                project=self.project(), media_type='image', filename='a.png',
+                total_size=10).pk,)
+
+        self.assertQueryBudget(1, lambda session: self.client.get(
+            reverse('upload_session_api', args=[session])), prepare=prepare)
+
+    def test_delete_image_by_id(self):
+        self.assertQueryBudget(10, lambda pk: self.client.delete(
+            reverse('image_detail_api', args=[pk])),
+            prepare=lambda: (ProjectImage.objects.order_by('-pk')[0].pk,))
+
+    def test_delete_video_by_id(self):
+        self.assertQueryBudget(5, lambda pk: self.client.delete(
+            reverse('video_detail_api', args=[pk])),
+            prepare=lambda: (ProjectVideo.objects.order_by('-pk')[0].pk,))
+
+    def test_delete_image_by_path(self):
+        # As imagens do seeder compartilham arquivos; a enviada é só de um projeto
+        def prepare():
+            name = self.upload()
+            return name, ProjectImage.objects.get(image=name).project_id
+
+        self.assertQueryBudget(13, lambda name, project: self.client.delete(
+            reverse('delete_media_api', args=[name]) + f'?project_id={project}'),
+            prepare=prepare)
+
+    def test_batch_delete(self):
+        def prepare():
+            return (list(ProjectImage.objects.order_by('-pk').values_list('pk', flat=True)[:3]),
+                    list(ProjectVideo.objects.order_by('-pk').values_list('pk', flat=True)[:2]))
+
+        self.assertQueryBudget(13, lambda images, videos: self.post_json(
+            'media_batch_delete_api', {'images': images, 'videos': videos}),
+            prepare=prepare)
+
+    def test_serve_media(self):
+        self.assertQueryBudget(0, lambda name: self.client.get(
+            reverse('serve_media', args=[name])), prepare=lambda: (self.upload(),))
+
+
+class TaskTests(PortfolioTestCase):
+    def test_abandoned_jobs_are_requeued(self):
+        old = timezone.now() - timedelta(seconds=tasks.CLAIM_TIMEOUT + 60)
+        crashed = BackgroundJob.objects.create(
+            kind='publish_site', status='running', attempts=1, claimed_at=old)
+        exhausted = BackgroundJob.objects.create(
+            kind='publish_site', status='running', attempts=tasks.MAX_ATTEMPTS,
+            claimed_at=old)
+        running = BackgroundJob.objects.create(
+            kind='publish_site', status='running', attempts=1,
+            claimed_at=timezone.now())
+
+        self.assertEqual(tasks.requeue_abandoned(), 2)
+        crashed.refresh_from_db()
+        self.assertEqual((crashed.status, crashed.attempts), ('pending', 1))
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, 'failed')
+        running.refresh_from_db()
+        self.assertEqual(running.status, 'running')
+
+    def test_variant_files_survive_rollback(self):
+        category = Category.objects.create(name='Web', slug='web')
+        project = Project.objects.create(title='A', slug='a', category=category,
+                                         description='')
+        image = ProjectImage.objects.create(project=project, image='portfolio/images/a.jpg')
+        variant = ImageVariant(image=image, format='jpeg', width=320, height=200)
+        variant.file.save('a-320w.jpg', ContentFile(png_bytes()), save=True)
+        path, pk = Path(variant.file.path), variant.pk
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                variant.delete()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertTrue(path.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ImageVariant.objects.get(pk=pk).delete()
+        self.assertFalse(path.exists())
+
+
+class PosterTests(PortfolioTestCase):
+    def test_stub_binary_extracts_poster(self):
+        frame = Path(self.media_root, 'frame.jpg')
+        Image.new('RGB', (16, 9), (0, 150, 255)).save(frame, 'JPEG')
+        # Faz o papel do ffmpeg: grava o frame no último argumento
+        stub = Path(self.media_root, 'ffmpeg-stub')
+        stub.write_text(f'#!{sys.executable}\nimport shutil, sys\n'
+                        f'shutil.copy({str(frame)!r}, sys.argv[-1])\n')
+        stub.chmod(0o755)
+
+        with override_settings(PORTFOLIO_FFMPEG_BINARY=str(stub)):
+            category = Category.objects.create(name='Web', slug='web')
+            project = Project.objects.create(title='A', slug='a', category=category,
+                                             description='')
+            video = ProjectVideo.objects.create(project=project,
+                                                video='portfolio/videos/a.mp4')
+            version, _ = snapshots.get_version()
+            tasks.extract_video_poster(video.pk)
+
+            video.refresh_from_db()
+            self.assertTrue(video.thumbnail.name.endswith('a-poster.jpg'))
+            self.assertEqual(Path(video.thumbnail.path).read_bytes(), frame.read_bytes())
+            self.assertGreater(snapshots.get_version()[0], version)
+
+
+class StorageTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(name='Web', slug='web')
+        self.project = Project.objects.create(title='A', slug='a', category=category,
+                                              description='')
+
+    def add_image(self, data, name='a.png'):
+        return ProjectImage.objects.create(project=self.project,
+                                           image=ContentFile(data, name=name))
+
+    def refcount(self, image):
+        return StoredBlob.objects.filter(name=image.image.name).values_list(
+            'refcount', flat=True).first()
+
+    def test_refcount_follows_retain_replace_and_delete(self):
+        first = self.add_image(png_bytes())
+        second = self.add_image(png_bytes(), name='b.png')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(self.refcount(first), 2)
+        shared = Path(first.image.path)
+
+        # Troca o arquivo da primeira: o antigo perde uma referência
+        first.image = ContentFile(png_bytes((0, 0, 0)), name='c.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+        self.assertEqual(self.refcount(first), 1)
+        self.assertEqual(self.refcount(second), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(shared.exists())
+        self.assertFalse(StoredBlob.objects.filter(name=second.image.name).exists())
+        self.assertTrue(Path(first.image.path).exists())
+
+    def test_release_rolled_back_keeps_file(self):
+        image = self.add_image(png_bytes())
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                image.delete()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.refcount(image), 1)
+
+    def test_upload_during_pending_release_keeps_file(self):
+        first = self.add_image(png_bytes())
+        path = Path(first.image.path)
+        with self.captureOnCommitCallbacks() as callbacks:
+            first.delete()
+
+        # O mesmo conteúdo chega antes da coleta do arquivo liberado
+        second = self.add_image(png_bytes(), name='b.png')
+        for callback in callbacks:
+            callback()
+        self.assertTrue(path.exists())
+        self.assertEqual(self.refcount(second), 1)
+
+    def test_upload_after_collection_rewrites_file(self):
+        first = self.add_image(png_bytes())
+        path = Path(first.image.path)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertFalse(path.exists())
+
+        second = self.add_image(png_bytes(), name='b.png')
+        self.assertTrue(path.exists())
+        self.assertEqual(self.refcount(second), 1)
+
+
+class MediaDeleteTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(name='Web', slug='web')
+        # O mesmo arquivo em dois projetos: um só blob no storage
+        self.images = [
+            ProjectImage.objects.create(
+                project=Project.objects.create(title=title, slug=title.lower(),
+                                               category=category, description=''),
+                image=ContentFile(png_bytes(), name=f'{title}.png'))
+            for title in ('A', 'B')
+        ]
+        self.assertEqual(self.images[0].image.name, self.images[1].image.name)
+
+    def test_hash_and_path_require_project(self):
+        image = self.images[0]
+        response = self.client.post(reverse('media_batch_delete_api'),
+                                    {'hashes': [image.content_hash]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.delete(reverse('delete_media_api', args=[image.image.name]))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ProjectImage.objects.count(), 2)
+
+    def test_delete_by_hash_stays_in_project(self):
+        first, second = self.images
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('media_batch_delete_api'),
+                {'hashes': [first.content_hash], 'project_id': first.project_id},
+                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['deleted']['image'], [first.pk])
+        self.assertEqual(list(ProjectImage.objects.values_list('pk', flat=True)),
+                         [second.pk])
+        self.assertTrue(Path(second.image.path).exists())
+
+    def test_delete_by_path_stays_in_project(self):
+        first, second = self.images
+        response = self.client.delete(
+            reverse('delete_media_api', args=[second.image.name])
+            + f'?project_id={second.project_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['deleted']['image'], [second.pk])
+        self.assertTrue(ProjectImage.objects.filter(pk=first.pk).exists())
+
+
+class DeliveryTests(PortfolioTestCase):
+    CONTENT = b'0123456789'
+
+    def setUp(self):
+        super().setUp()
+        Path(self.media_root, 'docs').mkdir()
+        Path(self.media_root, 'docs', 'a.txt').write_bytes(self.CONTENT)
+
+    def get(self, **headers):
+        response = self.client.get(reverse('serve_media', args=['docs/a.txt']),
+                                   **headers)
+        if response.streaming:
+            return response, b''.join(response.streaming_content)
+        return response, response.content
+
+    def test_full_file(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_ranges(self):
+        cases = {
+            'bytes=2-5': ('2345', 'bytes 2-5/10'),
+            'bytes=7-': ('789', 'bytes 7-9/10'),
+            'bytes=8-20': ('89', 'bytes 8-9/10'),
+            'bytes=-3': ('789', 'bytes 7-9/10'),
+            'bytes=-50': ('0123456789', 'bytes 0-9/10'),
+        }
+        for header, (expected, content_range) in cases.items():
+            with self.subTest(header):
+                response, body = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, expected.encode())
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(response['Content-Length'], str(len(expected)))
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=10-', 'bytes=5-2', 'bytes=-0'):
+            with self.subTest(header):
+                response, _ = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_multiple_ranges_fall_back_to_full_file(self):
+        response, body = self.get(HTTP_RANGE='bytes=0-1,4-5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.CONTENT)
+
+    def test_if_range(self):
+        etag = self.get()[0]['ETag']
+        response, body = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag)
+        self.assertEqual((response.status_code, body), (206, b'01'))
+        response, body = self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"outro"')
+        self.assertEqual((response.status_code, body), (200, self.CONTENT))
+
+    def test_not_modified(self):
+        etag = self.get()[0]['ETag']
+        response, body = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(body, b'')
+        self.assertEqual(response['ETag'], etag)
+
+
+class BulkTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='Web', slug='web')
+        self.project = Project.objects.create(
+            title='A', slug='a', category=self.category, description='')
+
+    def post(self, *operations):
+        return self.client.post(reverse('projects_bulk_api'),
+                                {'operations': list(operations)},
+                                content_type='application/json')
+
+    def test_results_per_item(self):
+        response = self.post(
+            {'op': 'create', 'data': {'title': 'Novo', 'category': 'mobile',
+                                      'tags': ['react'], 'featured': True}},
+            {'op': 'update', 'id': self.project.pk, 'data': {'status': 'published'}})
+        self.assertEqual(response.status_code, 200)
+        created, updated = response.json()['results']
+        self.assertEqual((created['index'], created['status'], created['slug']),
+                         (0, 'created', 'novo'))
+        project = Project.objects.get(pk=created['id'])
+        self.assertEqual((project.category.name, project.tags, project.featured),
+                         ('Mobile', ['react'], True))
+        self.assertEqual((updated['index'], updated['status'], updated['id']),
+                         (1, 'updated', self.project.pk))
+
+    def test_invalid_item_rolls_back_batch(self):
+        invalid = [
+            {'featured': 'sim'},
+            {'tags': 'react'},
+            {'tags': [1]},
+            {'short_description': ['texto']},
+            {'short_description': 'x' * 301},
+        ]
+        for data in invalid:
+            with self.subTest(data):
+                response = self.post(
+                    {'op': 'create', 'data': {'title': 'Novo', 'category': 'web'}},
+                    {'op': 'update', 'id': self.project.pk, 'data': data})
+                self.assertEqual(response.status_code, 400)
+                first, second = response.json()['results']
+                self.assertNotIn('error', first)
+                self.assertIn('error', second)
+                self.assertFalse(Project.objects.filter(slug='novo').exists())
+
+    def test_new_category_reaches_catalog(self):
+        self.project.status = 'published'
+        self.project.save()
+        # Cópia local já carregada e que não seria conferida tão cedo
+        with mock.patch.object(refdata, 'CHECK_INTERVAL', float('inf')):
+            refdata.categories()
+            response = self.post(
+                {'op': 'create', 'data': {'title': 'Novo', 'category': 'mobile',
+                                          'status': 'published'}})
+            self.assertEqual(response.status_code, 200)
+            catalog = self.client.get(reverse('portfolio_api')).json()
+        self.assertIn('Novo', [project['title'] for project in catalog['projects']])
+        self.assertIn('mobile', [category['slug'] for category in catalog['categories']])
+
+    def test_category_name_conflict(self):
+        # O slug novo geraria o nome "Web", que já é de outra categoria
+        Category.objects.filter(pk=self.category.pk).update(slug='web-dev')
+        response = self.post(
+            {'op': 'create', 'data': {'title': 'Novo', 'category': 'web'}},
+            {'op': 'update', 'id': self.project.pk, 'data': {'title': 'B'}})
+        self.assertEqual(response.status_code, 400)
+        first, second = response.json()['results']
+        self.assertIn('Web', first['error'])
+        self.assertNotIn('error', second)
+        self.assertFalse(Category.objects.filter(slug='web').exists())
+        self.assertEqual(Project.objects.get(pk=self.project.pk).title, 'A')
+
+
+class OrderingTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Web', slug='web')
+
+    def create(self, title, **fields):
+        return Project.objects.create(title=title, slug=title.lower(),
+                                      category=self.category, description='', **fields)
+
+    def keys(self):
+        return list(ordering.siblings('project').values_list('title', 'order'))
+
+    def test_new_projects_go_last(self):
+        first = self.create('A', order=ordering.GAP)
+        second = self.create('B')
+        self.assertEqual(second.order, first.order + ordering.GAP)
+
+        response = self.client.post(
+            reverse('projects_bulk_api'),
+            {'operations': [{'op': 'create', 'data': {'title': 'C', 'category': 'web'}},
+                            {'op': 'create', 'data': {'title': 'D', 'category': 'web'}}]},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([title for title, _ in self.keys()], ['A', 'B', 'C', 'D'])
+
+    def test_key_between(self):
+        a, b, c = (self.create(title, order=key)
+                   for title, key in (('A', 1024), ('B', 2048), ('C', 2049)))
+        qs = ordering.siblings('project')
+        self.assertEqual(ordering.key_between(qs, c, after=a, before=b), 1536)
+        # Só after (ou só before): o outro limite é o vizinho real
+        self.assertEqual(ordering.key_between(qs, c, after=a), 1536)
+        self.assertEqual(ordering.key_between(qs, a, after=c), 2049 + ordering.GAP)
+        self.assertEqual(ordering.key_between(qs, c, before=a), 512)
+        self.assertEqual(ordering.key_between(qs, a, before=b), 1024)
+        # Chaves coladas: sem espaço, o grupo precisa ser redistribuído
+        self.assertIsNone(ordering.key_between(qs, a, after=b, before=c))
+        self.assertIsNone(ordering.key_between(qs, a, after=b))
+
+    def test_exhausted_gap_rebalances_in_place(self):
+        a = self.create('A', order=1)
+        b = self.create('B', order=2)
+        c = self.create('C', order=3)
+        self.assertEqual(ordering.move(c, after=a, before=b), ordering.GAP + ordering.GAP // 2)
+        self.assertEqual([title for title, _ in self.keys()], ['A', 'C', 'B'])
+        self.assertEqual([key for _, key in self.keys()],
+                         [ordering.GAP, ordering.GAP + ordering.GAP // 2, 2 * ordering.GAP])
+
+    def test_small_gap_schedules_rebalance(self):
+        a = self.create('A', order=1000)
+        self.create('B', order=1010)
+        c = self.create('C', order=5000)
+        # Só after: a distância que conta é até B, o vizinho real
+        ordering.move(c, after=a)
+        self.assertTrue(BackgroundJob.objects.filter(
+            kind='rebalance_order', payload={'group': 'project', 'scope': None}).exists())
+
+    def test_rebalance(self):
+        for title, key in (('A', 5), ('B', 5), ('C', 6)):
+            self.create(title, order=key)
+        self.assertEqual(ordering.rebalance('project'), 3)
+        keys = [key for _, key in self.keys()]
+        self.assertEqual(keys, [ordering.GAP, 2 * ordering.GAP, 3 * ordering.GAP])
+        self.assertEqual(ordering.rebalance('project'), 0)
+
+
+class CoverTests(TestCase):
+    def test_moving_image_refreshes_both_covers(self):
+        category = Category.objects.create(name='Web', slug='web')
+        source, target = (
+            Project.objects.create(title=title, slug=title, category=category,
+                                   description='', status='published')
+            for title in ('origem', 'destino'))
+        ProjectImage.objects.create(project=source, image='portfolio/images/b.jpg', order=2)
+        image = ProjectImage.objects.create(
+            project=source, image='portfolio/images/a.jpg', is_main=True, order=1)
+        source.refresh_from_db()
+        self.assertEqual(source.cover_image_id, image.pk)
+
+        image = ProjectImage.objects.get(pk=image.pk)
+        image.project = target
+        image.save()
+        source.refresh_from_db()
+        target.refresh_from_db()
+        self.assertEqual(target.cover_image_id, image.pk)
+        self.assertNotEqual(source.cover_image_id, image.pk)
+        self.assertTrue(source.cover_url.endswith('b.jpg'))
+
+
+class SnapshotTests(PortfolioTestCase):
+    def test_readers_never_wait_on_a_rebuild(self):
+        key = snapshots.CATALOG
+        snapshots.bump_version(key)
+        snapshots.get_snapshot(key, lambda: b'antigo')
+        snapshots.bump_version(key)
+        # Outro request está reconstruindo
+        self.assertTrue(snapshots._acquire(key))
+        self.addCleanup(snapshots._release, key)
+
+        with mock.patch.object(snapshots, 'LOCK_TIMEOUT', 5):
+            started = time.monotonic()
+            self.assertEqual(snapshots.get_snapshot(key, lambda: b'novo').payload, b'antigo')
+            self.assertLess(time.monotonic() - started, 1)
+        # Quem pede explicitamente a versão atual monta a sua
+        self.assertEqual(
+            snapshots.get_snapshot(key, lambda: b'novo', fresh=True).payload, b'novo')
+
+    def test_stale_body_keeps_its_own_etag(self):
+        seeding.seed_catalog(2, images=1)
+        old = self.client.get(reverse('portfolio_api'))
+        project = Project.objects.published().first()
+        project.title = 'Editado agora'
+        project.save()
+        snapshots._acquire(snapshots.CATALOG)
+        self.addCleanup(snapshots._release, snapshots.CATALOG)
+
+        # Reconstrução em andamento: corpo anterior, com os validadores dele
+        stale = self.client.get(reverse('portfolio_api'))
+        self.assertNotIn(b'Editado agora', stale.content)
+        self.assertEqual(stale['ETag'], old['ETag'])
+        self.assertEqual(stale['Last-Modified'], old['Last-Modified'])
+        # Nenhum 304 com o ETag da versão nova para o corpo antigo
+        revalidated = self.client.get(reverse('portfolio_api'),
+                                      HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertEqual(revalidated['ETag'], old['ETag'])
+
+        snapshots._release(snapshots.CATALOG)
+        fresh = self.client.get(reverse('portfolio_api'), HTTP_IF_NONE_MATCH=old['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn(b'Editado agora', fresh.content)
+        self.assertNotEqual(fresh['ETag'], old['ETag'])
+
+    def test_fresh_read_after_change(self):
+        seeding.seed_catalog(2, images=1)
+        self.client.get(reverse('portfolio_api'))
+        project = Project.objects.published().first()
+        project.title = 'Editado agora'
+        project.save()
+        snapshots._acquire(snapshots.CATALOG)
+        self.addCleanup(snapshots._release, snapshots.CATALOG)
+        # O painel relê com ?fresh=1 logo depois de salvar
+        response = self.client.get(reverse('portfolio_api'), {'fresh': 1})
+        self.assertIn(b'Editado agora', response.content)
+
+
+class UploadHandlerTests(QueryBudgetTestCase):
+    """LimitedUploadHandler: recusas sem deixar arquivo temporário para trás"""
+
+    def setUp(self):
+        super().setUp()
+        self.grow(1)
+        PortfolioSettings.objects.filter(pk=1).update(max_file_size_mb=1)
+        refdata.clear()
+        self.upload_tmp = tempfile.mkdtemp(prefix='portfolio-test-upload-')
+        self.addCleanup(shutil.rmtree, self.upload_tmp, ignore_errors=True)
+        # Todo upload vai para um arquivo temporário, não para a memória
+        upload_settings = override_settings(
+            FILE_UPLOAD_TEMP_DIR=self.upload_tmp, FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+        upload_settings.enable()
+        self.addCleanup(upload_settings.disable)
+
+    def upload(self, content, name='capa.png'):
+        upload = io.BytesIO(content)
+        upload.name = name
+        images = ProjectImage.objects.count()
+        response = self.client.post(reverse('upload_media_api'), {
+            'file': upload, 'project_id': self.project().pk, 'type': 'image'})
+        self.assertEqual(ProjectImage.objects.count(), images)
+        self.assertEqual(os.listdir(self.upload_tmp), [])
+        return response
+
+    def test_content_length_over_limit(self):
+        response = self.upload(png_bytes() + bytes(2 * 1024 * 1024))
+        self.assertEqual(response.status_code, 413)
+
+    def test_streamed_body_over_limit(self):
+        # Cabe na folga do Content-Length; é barrado enquanto chega
+        size = 1024 * 1024 + MULTIPART_OVERHEAD // 2
+        response = self.upload(png_bytes() + bytes(size))
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('muito grande', response.json()['error'])
+
+    def test_wrong_magic_bytes(self):
+        response = self.upload(b'GIF89a' + bytes(1024), name='capa.png')
+        self.assertEqual(response.status_code, 415)
+
+
+class UploadSessionTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.grow(1)
+        self.data = png_bytes() * 4
+
+    def start(self):
+        response = self.post_json('upload_session_create_api', {
+            'project_id': self.project().pk, 'type': 'image',
+            'filename': 'parte.png', 'size': len(self.data)})
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def put(self, session, start, end, **headers):
+        return self.client.put(
+            reverse('upload_session_api', args=[session]), self.data[start:end],
+            content_type='application/offset+octet-stream', **headers)
+
+    def complete(self, session):
+        return self.client.post(reverse('upload_session_complete_api', args=[session]))
+
+    def test_chunks_resume_and_double_complete(self):
+        session = self.start()
+        half = len(self.data) // 2
+        self.assertEqual(self.put(session, 0, half, HTTP_UPLOAD_OFFSET='0').status_code, 200)
+
+        # Parte fora de ordem: 409 com o offset certo para retomar
+        response = self.put(session, 10, 20, HTTP_UPLOAD_OFFSET='10')
+        self.assertEqual((response.status_code, response.json()['offset']), (409, half))
+        self.assertEqual(self.complete(session).status_code, 409)
+
+        offset = self.client.get(reverse('upload_session_api', args=[session])).json()['offset']
+        self.assertEqual(offset, half)
+        response = self.put(session, offset, None, HTTP_CONTENT_RANGE=(
+            f'bytes {offset}-{len(self.data) - 1}/{len(self.data)}'))
+        self.assertEqual(response.status_code, 200)
+
+        images = ProjectImage.objects.count()
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            ProjectImage.objects.get(pk=response.json()['id']).image.read(), self.data)
+        self.assertEqual(self.complete(session).status_code, 409)
+        self.assertEqual(ProjectImage.objects.count(), images + 1)
+
+    def test_racing_put_is_conflict(self):
+        session = self.start()
+        data = self.data
+
+        class Racing(io.BytesIO):
+            # Outro PUT do mesmo offset termina enquanto este ainda lê o corpo
+            raced = False
+
+            def read(stream, size=-1):
+                if not stream.raced:
+                    stream.raced = True
+                    uploads.write_chunk(session, 0, io.BytesIO(data), len(data))
+                return super().read(size)
+
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.write_chunk(session, 0, Racing(data), len(data))
+        self.assertEqual((raised.exception.status, raised.exception.extra),
+                         (409, {'offset': len(data)}))
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            ProjectImage.objects.get(pk=response.json()['id']).image.read(), data)
+
+    def test_concurrent_complete_creates_one_media(self):
+        session = self.start()
+        self.put(session, 0, None, HTTP_UPLOAD_OFFSET='0')
+        # Os dois requests leram a sessão ainda ativa
+        first, second = (UploadSession.objects.select_related('project').get(pk=session)
+                         for _ in range(2))
+        images = ProjectImage.objects.count()
+        uploads.finalize(first)
+        with self.assertRaises(uploads.UploadError) as raised:
+            uploads.finalize(second)
+        self.assertEqual(raised.exception.status, 409)
+        self.assertEqual(ProjectImage.objects.count(), images + 1)
+
+    def test_missing_temp_file_is_conflict(self):
+        session = self.start()
+        self.put(session, 0, None, HTTP_UPLOAD_OFFSET='0')
+        os.remove(uploads.temp_path(UploadSession.objects.get(pk=session)))
+        self.assertEqual(self.complete(session).status_code, 409)
+        self.assertEqual(UploadSession.objects.get(pk=session).status, 'active')
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Web', slug='web')
+
+    def create(self, title, description='', status='published'):
+        return Project.objects.create(title=title, slug=title.lower().replace(' ', '-'),
+                                      category=self.category, description=description,
+                                      status=status)
+
+    def titles(self, query, limit=20):
+        return [Project.objects.get(pk=pk).title
+                for pk, _, _ in search.search_projects(query, limit=limit)]
+
+    def test_title_outranks_description(self):
+        self.create('Blog pessoal', description='Um site sobre identidade visual')
+        self.create('Identidade visual', description='Marca de uma padaria')
+        self.create('Loja', description='Nada a ver')
+        self.assertEqual(self.titles('identidade'), ['Identidade visual', 'Blog pessoal'])
+
+    def test_drafts_do_not_take_ranking_slots(self):
+        # O publicado é o mais antigo; os rascunhos casam melhor e são mais novos
+        published = self.create('Logo', description='logo')
+        for index in range(5):
+            self.create(f'Logo logo {index}', description='logo logo', status='draft')
+        self.assertEqual(self.titles('logo', limit=1), [published.title])
+
+    def test_limit_keeps_best_ranked(self):
+        best = self.create('Aplicativo mobile', description='Aplicativo para aplicativo')
+        for index in range(5):
+            self.create(f'Projeto {index}', description=f'Menciona aplicativo {index}')
+        self.assertEqual(self.titles('aplicativo', limit=1), [best.title])
+
+
+class FacetsTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def test_counts_follow_tag_changes(self):
+        category = Category.objects.create(name='Web', slug='web')
+        project = Project.objects.create(
+            title='A', slug='a', category=category, description='',
+            tags=['react', 'django'], status='published')
+        Project.objects.create(title='B', slug='b', category=category,
+                               description='', tags=['react'], status='draft')
+
+        response = self.client.get(reverse('facets_api')).json()
+        self.assertEqual(response['total'], 1)
+        self.assertEqual(
+            {facet['tag']: facet['count'] for facet in response['tags']},
+            {'react': 1, 'django': 1})
+
+        project.tags = ['vue']
+        project.save()
+        response = self.client.get(reverse('facets_api')).json()
+        self.assertEqual([facet['tag'] for facet in response['tags']], ['vue'])
+
+    def test_long_tags_rejected_on_write(self):
+        category = Category.objects.create(name='Web', slug='web')
+        project = Project.objects.create(title='A', slug='a', category=category,
+                                         description='', tags=['react'])
+        long_tag = 'x' * (facets.TAG_MAX_LENGTH + 1)
+
+        response = self.client.post(
+            reverse('projects_api'),
+            {'title': 'B', 'category': 'web', 'tags': [long_tag]},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(
+            reverse('project_detail_api', args=[project.pk]),
+            {'tags': ['vue', long_tag]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse('projects_bulk_api'),
+            {'operations': [{'op': 'update', 'id': project.pk,
+                             'data': {'tags': [long_tag]}}]},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json()['results'][0])
+
+        project.tags = [long_tag]
+        with self.assertRaises(ValidationError):
+            project.full_clean()
+        self.assertFalse(Project.objects.filter(slug='b').exists())
+        self.assertEqual(list(project.tag_index.values_list('tag', flat=True)), ['react'])
+
+
+class PublishTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.mkdtemp(prefix='portfolio-test-publish-')
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        patch = mock.patch.object(publish, 'ROOT', Path(root))
+        patch.start()
+        self.addCleanup(patch.stop)
+        seeding.seed_catalog(3, images=1)
+
+    def published(self, url, filename='index.json'):
+        return publish.release_dir() / url.lstrip('/') / filename
+
+    def test_incremental_publish(self):
+        first = publish.publish()
+        self.assertEqual(first['written'], first['pages'])
+        self.assertIsNone(publish.publish())
+
+        home = self.published('/', 'index.html').stat().st_ino
+        project = Project.objects.published().first()
+        project.title = 'Alterado'
+        project.save()
+        result = publish.publish()
+
+        # Catálogo e detalhe do projeto alterado; a home não depende do banco
+        self.assertEqual(result['written'], 4)
+        self.assertEqual(self.published('/', 'index.html').stat().st_ino, home)
+        detail = self.published(reverse('project_detail_api', args=[project.pk]))
+        self.assertIn(b'Alterado', detail.read_bytes())
+        self.assertTrue(detail.with_name('index.json.gz').exists())
+        self.assertEqual(
+            self.published(reverse('portfolio_api')).read_bytes(),
+            self.client.get(reverse('portfolio_api')).content)
+
+    def test_detail_depends_only_on_its_project(self):
+        publish.publish()
+        edited, other, removed = Project.objects.published().order_by('pk')[:3]
+
+        def detail(project):
+            return self.published(reverse('project_detail_api', args=[project.pk]))
+
+        other_inode = detail(other).stat().st_ino
+
+        edited.title = 'Alterado'
+        edited.save()
+        Project.objects.filter(pk=removed.pk).update(status='draft')
+        result = publish.publish()
+
+        # As três listas e só o detalhe do projeto alterado
+        self.assertEqual(result['written'], 4)
+        self.assertIn(b'Alterado', detail(edited).read_bytes())
+        self.assertEqual(detail(other).stat().st_ino, other_inode)
+        self.assertFalse(detail(removed).exists())
+
+        # Mudanças que chegam por update() também marcam o projeto
+        edited_inode = detail(edited).stat().st_ino
+        ordering.move(other, after=edited)
+        publish.publish()
+        self.assertEqual(detail(edited).stat().st_ino, edited_inode)
+        self.assertIn(f'"order": {other.order}'.encode(), detail(other).read_bytes())
+
+    def test_published_site_passes_fresh_reads_to_django(self):
+        publish.publish()
+        calls = []
+
+        def app(environ, start_response):
+            calls.append(environ['QUERY_STRING'])
+            start_response('200 OK', [('Content-Type', 'application/json')])
+            return [b'{}']
+
+        site = publish.PublishedSite(app, root=publish.ROOT)
+
+        def get(query=''):
+            environ = {}
+            setup_testing_defaults(environ)
+            environ.update(PATH_INFO=reverse('portfolio_api'), QUERY_STRING=query)
+            return b''.join(site(environ, lambda status, headers: None))
+
+        self.assertEqual(get(), self.published(reverse('portfolio_api')).read_bytes())
+        self.assertEqual(calls, [])
+        # O painel relê com ?fresh=1 depois de salvar: vai direto ao Django
+        self.assertEqual(get('fresh=1'), b'{}')
+        self.assertEqual(calls, ['fresh=1'])
+
+
+class AsyncViewsTests(PortfolioTestCase):
+    """As views async (ASGI) respondem igual às síncronas"""
+
+    def setUp(self):
+        super().setUp()
+        Path(self.media_root, 'arquivo.bin').write_bytes(bytes(range(256)) * 4096)
+        seeding.seed_catalog(3, images=1)
+
+    async def call(self, view, url, *args, method='get', **extra):
+        response = await view(getattr(AsyncRequestFactory(), method)(url, **extra), *args)
+        if response.streaming:
+            return response, b''.join([chunk async for chunk in response])
+        return response, response.content
+
+    def call_sync(self, view, url, *args, **extra):
+        response = view(RequestFactory().get(url, **extra), *args)
+        if response.streaming:
+            return response, b''.join(response.streaming_content)
+        return response, response.content
+
+    async def test_matches_sync_views(self):
+        project = await Project.objects.published().afirst()
+        cases = [
+            (views.portfolio_api_async, views.portfolio_api, '/api/portfolio/', ()),
+            (views.portfolio_api_async, views.portfolio_api, '/api/portfolio/?stream=1', ()),
+            (views.projects_api_async, views.projects_api, '/api/projects/?limit=2', ()),
+            (views.projects_api_async, views.projects_api, '/api/projects/?stream=1', ()),
+            (views.project_detail_api_async, views.project_detail_api,
+             f'/api/projects/{project.pk}/', (project.pk,)),
+            (views.serve_media_async, views.serve_media, '/media/arquivo.bin',
+             ('arquivo.bin',), {'headers': {'Range': 'bytes=100-199999'}}),
+        ]
+        for async_view, sync_view, url, args, *extra in cases:
+            with self.subTest(url=url):
+                extra = extra[0] if extra else {}
+                response, body = await self.call(async_view, url, *args, **extra)
+                expected, expected_body = await sync_to_async(self.call_sync)(
+                    sync_view, url, *args, **extra)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.get('ETag'), expected.get('ETag'))
+                self.assertEqual(response.get('Content-Length'), expected.get('Content-Length'))
+                self.assertEqual(body, expected_body)
+
+    async def test_conditional_and_writes(self):
+        project = await Project.objects.afirst()
+        url = f'/api/projects/{project.pk}/'
+        response, _ = await self.call(views.project_detail_api_async, url, project.pk)
+        not_modified, _ = await self.call(views.project_detail_api_async, url, project.pk,
+                                          headers={'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+
+        # Escritas seguem para a view síncrona
+        updated, body = await self.call(
+            views.project_detail_api_async, url, project.pk, method='put',
+            data=json.dumps({'title': 'Via ASGI'}), content_type='application/json')
+        self.assertEqual(updated.status_code, 200)
+        self.assertEqual(json.loads(body)['title'], 'Via ASGI')
+        refreshed, _ = await self.call(views.project_detail_api_async, url, project.pk,
+                                       headers={'If-None-Match': response['ETag']})
+        self.assertEqual(refreshed.status_code, 200)
+
+        with self.assertRaises(Http404):
+            await self.call(views.project_detail_api_async, '/api/projects/0/', 0)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ServerTimingTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        seeding.seed_catalog(2, images=1)
+        # O middleware lê a configuração na importação (padrão: DEBUG)
+        patch = mock.patch.object(middleware, 'ENABLED', True)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_header(self):
+        url = reverse('portfolio_api')
+        self.client.get(url)
+        header = self.client.get(url)['Server-Timing']
+        self.assertRegex(header, r'^db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('cache;desc="1 hit, 0 miss"', header)
+        self.assertRegex(header, r', total;dur=[\d.]+$')
+
+    def test_query_budget_warning(self):
+        url = reverse('portfolio_api')
+        with mock.patch.object(middleware, 'QUERY_BUDGET', 1000), \
+                self.assertLogs('portfolio_app.timing', 'INFO') as logs:
+            self.client.get(url)
+        self.assertEqual([record.levelname for record in logs.records], ['INFO'])
+
+        with mock.patch.object(middleware, 'QUERY_BUDGET', 0), \
+                self.assertLogs('portfolio_app.timing', 'WARNING') as logs:
+            self.client.get(url)
+        self.assertIn('Orçamento de consultas excedido', logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].path, url)
+
+    def test_disabled(self):
+        with mock.patch.object(middleware, 'ENABLED', False):
+            with self.assertRaises(MiddlewareNotUsed):
+                middleware.ServerTimingMiddleware(lambda request: None)
+            response = self.client.get(reverse('portfolio_api'))
+        self.assertNotIn('Server-Timing', response)
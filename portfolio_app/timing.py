@@ -0,0 +1,101 @@
+"""
+Medição do tempo gasto em cada request.
+
+O ServerTimingMiddleware (middleware.py) abre um `Timings` por request; as
+consultas ao banco são contadas por um execute_wrapper instalado uma vez
+em cada conexão, e o código marca os trechos caros com `span('serialize')`
+ou `span('render')`. Fora de um request medido tudo aqui é no-op.
+"""
+import time
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_current = ContextVar('portfolio_timings', default=None)
+
+
+class Timings:
+    """Métricas acumuladas de um request"""
+    __slots__ = ('started', 'queries', 'db_time', 'spans', 'cache_hits',
+                 'cache_misses')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.spans = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def start():
+    """Começa a medir o request atual; retorna (timings, token)"""
+    timings = Timings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+class span(ContextDecorator):
+    """Soma o tempo do bloco (ou da função decorada) na métrica `name`"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def _recreate_cm(self):
+        # Como decorador, cada chamada precisa do próprio cronômetro
+        return type(self)(self.name)
+
+    def __enter__(self):
+        self.timings = _current.get()
+        if self.timings is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.timings is not None:
+            spans = self.timings.spans
+            spans[self.name] = (spans.get(self.name, 0.0)
+                                + time.perf_counter() - self.started)
+        return False
+
+
+def record_cache(hit):
+    """Anota um acerto ou falha de cache no request atual"""
+    timings = _current.get()
+    if timings is not None:
+        if hit:
+            timings.cache_hits += 1
+        else:
+            timings.cache_misses += 1
+
+
+def _count_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.db_time += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    # A conexão pode ser reaberta no mesmo wrapper: instala uma vez só
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
@@ -0,0 +1,119 @@
+"""
+Validação de uploads enquanto os bytes chegam.
+
+`LimitedUploadHandler` entra na frente dos handlers padrão do Django e
+interrompe o upload assim que o limite de PortfolioSettings é ultrapassado
+ou quando os primeiros bytes não batem com a extensão do arquivo, sem
+esperar o corpo inteiro ser gravado em disco.
+"""
+import os
+
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+# Folga para cabeçalhos e campos do multipart além do próprio arquivo
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Bytes necessários para identificar todos os formatos abaixo
+SNIFF_LENGTH = 12
+
+EXTENSION_FORMATS = {
+    'jpg': {'jpeg'},
+    'jpeg': {'jpeg'},
+    'png': {'png'},
+    'gif': {'gif'},
+    'webp': {'webp'},
+    'mp4': {'isobmff'},
+    'mov': {'isobmff', 'quicktime'},
+    'webm': {'webm'},
+    'avi': {'avi'},
+}
+
+
+def sniff(head):
+    """Identifica o formato pelos primeiros bytes (magic numbers)"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    if head[:4] == b'RIFF' and head[8:12] == b'AVI ':
+        return 'avi'
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return 'webm'
+    if head[4:8] == b'ftyp':
+        return 'isobmff'
+    if head[4:8] in (b'moov', b'mdat', b'wide', b'free', b'skip'):
+        return 'quicktime'
+    return None
+
+
+def content_matches_extension(filename, head):
+    ext = os.path.splitext(filename)[1].lower().lstrip('.')
+    return sniff(head) in EXTENSION_FORMATS.get(ext, set())
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """Aborta uploads grandes demais ou com conteúdo que não bate com a extensão"""
+
+    def __init__(self, request, settings_obj, field_name='file'):
+        super().__init__(request)
+        self.max_bytes = settings_obj.max_file_size_mb * 1024 * 1024
+        self.max_size_mb = settings_obj.max_file_size_mb
+        self.allowed_extensions = set(
+            settings_obj.allowed_image_formats or []) | set(
+            settings_obj.allowed_video_formats or [])
+        self.field_name = field_name
+        self.error = None
+        self.status = 400
+        self._active = False
+        self._head = b''
+
+    def _abort(self, message, status):
+        self.error = message
+        self.status = status
+        # connection_reset: não lê o restante do corpo
+        raise StopUpload(connection_reset=True)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            # Content-Length já denuncia: recusa sem ler nenhum byte
+            self.error = f'Arquivo muito grande. Máximo: {self.max_size_mb}MB'
+            self.status = 413
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self._active = field_name == self.field_name
+        self._head = b''
+        if self._active and self.allowed_extensions:
+            ext = os.path.splitext(file_name)[1].lower().lstrip('.')
+            if ext not in self.allowed_extensions:
+                self._abort(f'Formato não permitido: {ext}', 400)
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self._active:
+            return raw_data
+
+        if start + len(raw_data) > self.max_bytes:
+            self._abort(
+                f'Arquivo muito grande. Máximo: {self.max_size_mb}MB', 413)
+
+        if len(self._head) < SNIFF_LENGTH:
+            self._head += raw_data[:SNIFF_LENGTH - len(self._head)]
+            if len(self._head) >= SNIFF_LENGTH and not content_matches_extension(
+                    self.file_name, self._head):
+                self._abort('Conteúdo do arquivo não corresponde ao formato', 415)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self._active and len(self._head) < SNIFF_LENGTH and not (
+                content_matches_extension(self.file_name, self._head)):
+            self._abort('Conteúdo do arquivo não corresponde ao formato', 415)
+        return None
@@ -0,0 +1,204 @@
+"""
+Upload resumível em partes.
+
+Fluxo: POST cria a sessão, PUTs enviam os bytes informando o offset
+(`Upload-Offset` ou `Content-Range`), e o finalize monta o arquivo como
+ProjectImage/ProjectVideo. Cada parte é gravada no offset informado, então
+reenviar uma parte interrompida é seguro. Sessões abandonadas são
+removidas pelo `manage.py cleanup_uploads`.
+"""
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import UploadSession, ProjectImage, ProjectVideo
+from .upload_handlers import content_matches_extension
+
+TEMP_DIR = getattr(settings, 'PORTFOLIO_UPLOAD_TEMP_DIR',
+                   os.path.join(settings.BASE_DIR, 'tmp', 'uploads'))
+CHUNK_SIZE = getattr(settings, 'PORTFOLIO_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+MAX_CHUNK_SIZE = getattr(
+    settings, 'PORTFOLIO_UPLOAD_MAX_CHUNK_SIZE', 4 * CHUNK_SIZE)
+SESSION_MAX_AGE = getattr(settings, 'PORTFOLIO_UPLOAD_SESSION_MAX_AGE', 24 * 3600)
+
+READ_BLOCK = 64 * 1024
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+class _AssembledFile(File):
+    """Arquivo já em disco: o FileSystemStorage move em vez de copiar"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def temp_path(session):
+    return os.path.join(TEMP_DIR, f"{session.pk}.part")
+
+
+def validate_upload(settings_obj, media_type, filename, size):
+    """Valida tipo, extensão e tamanho antes de aceitar qualquer byte"""
+    if media_type == 'image':
+        allowed = settings_obj.allowed_image_formats
+    elif media_type == 'video':
+        allowed = settings_obj.allowed_video_formats
+    else:
+        raise UploadError('Tipo de mídia inválido')
+
+    ext = os.path.splitext(filename)[1].lower().lstrip('.')
+    if allowed and ext not in allowed:
+        raise UploadError(f'Formato não permitido: {ext}')
+
+    if size > settings_obj.max_file_size_mb * 1024 * 1024:
+        raise UploadError(
+            f'Arquivo muito grande. Máximo: {settings_obj.max_file_size_mb}MB',
+            status=413)
+
+
+def create_session(project, media_type, filename, size, settings_obj):
+    validate_upload(settings_obj, media_type, filename, size)
+    session = UploadSession.objects.create(
+        project=project, media_type=media_type,
+        filename=os.path.basename(filename), total_size=size)
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    open(temp_path(session), 'wb').close()
+    return session
+
+
+def parse_offset(request):
+    """Offset da parte, via Upload-Offset ou Content-Range"""
+    if 'HTTP_UPLOAD_OFFSET' in request.META:
+        try:
+            return int(request.META['HTTP_UPLOAD_OFFSET'])
+        except ValueError:
+            raise UploadError('Upload-Offset inválido')
+    match = CONTENT_RANGE_RE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+    if match:
+        return int(match.group(1))
+    raise UploadError('Informe Upload-Offset ou Content-Range')
+
+
+def write_chunk(session_id, offset, stream, length):
+    """Grava `length` bytes de `stream` no offset; retorna a sessão atualizada"""
+    if length > MAX_CHUNK_SIZE:
+        raise UploadError('Parte muito grande', status=413)
+
+    session = UploadSession.objects.get(pk=session_id)
+    if session.status != 'active':
+        raise UploadError('Upload já finalizado', status=409)
+    if offset != session.received:
+        raise UploadError('Offset não confere', status=409, offset=session.received)
+    if offset + length > session.total_size:
+        raise UploadError('Parte ultrapassa o tamanho declarado')
+
+    # Os bytes são gravados sem transação nem lock de linha: uma parte lenta
+    # não segura a sessão (nem uma conexão) enquanto chega. Sem truncate: o
+    # arquivo nunca passa de total_size, e um PUT duplicado que perde a
+    # corrida não pode cortar a parte seguinte já aceita
+    written = 0
+    with open(temp_path(session), 'r+b') as f:
+        f.seek(offset)
+        if offset == 0 and length:
+            # Confere o conteúdo real antes de aceitar o resto do arquivo
+            head = stream.read(min(READ_BLOCK, length))
+            if not content_matches_extension(session.filename, head):
+                raise UploadError(
+                    'Conteúdo do arquivo não corresponde ao formato', status=415)
+            f.write(head)
+            written = len(head)
+        while written < length:
+            block = stream.read(min(READ_BLOCK, length - written))
+            if not block:
+                break
+            f.write(block)
+            written += len(block)
+
+    # Compare-and-set: o offset só avança se ninguém gravou esta parte antes
+    now = timezone.now()
+    advanced = UploadSession.objects.filter(
+        pk=session.pk, received=offset, status='active',
+    ).update(received=offset + written, updated_at=now)
+    if not advanced:
+        current = UploadSession.objects.filter(pk=session.pk).values(
+            'status', 'received').first()
+        if current is None or current['status'] != 'active':
+            raise UploadError('Upload já finalizado', status=409)
+        raise UploadError('Offset não confere', status=409, offset=current['received'])
+    session.received, session.updated_at = offset + written, now
+    return session
+
+
+def finalize(session):
+    """Monta a mídia final a partir do arquivo temporário"""
+    path = temp_path(session)
+    with transaction.atomic():
+        # Compare-and-set no banco: de dois "complete" simultâneos, só um
+        # passa daqui; o outro espera o commit e recebe 409. Qualquer erro
+        # abaixo desfaz o claim e a sessão volta a ficar ativa
+        claimed = UploadSession.objects.filter(
+            pk=session.pk, status='active', received=F('total_size'),
+        ).update(status='complete', updated_at=timezone.now())
+        if not claimed:
+            current = UploadSession.objects.filter(pk=session.pk).values(
+                'status', 'received').first()
+            if current is None or current['status'] != 'active':
+                raise UploadError('Upload já finalizado', status=409)
+            raise UploadError('Upload incompleto', status=409,
+                              offset=current['received'])
+
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            raise UploadError('Arquivo temporário do upload não encontrado', status=409)
+        with f:
+            content = _AssembledFile(f, name=session.filename)
+            if session.media_type == 'image':
+                media = ProjectImage.objects.create(
+                    project=session.project, image=content, title=session.filename)
+            else:
+                media = ProjectVideo.objects.create(
+                    project=session.project, video=content, title=session.filename)
+    session.status = 'complete'
+
+    if os.path.exists(path):
+        os.remove(path)
+    return media
+
+
+def discard(session):
+    path = temp_path(session)
+    if os.path.exists(path):
+        os.remove(path)
+    session.delete()
+
+
+def cleanup(max_age=SESSION_MAX_AGE):
+    """Remove sessões paradas há mais de `max_age` segundos e .part órfãos"""
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    removed = 0
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff):
+        discard(session)
+        removed += 1
+
+    if os.path.isdir(TEMP_DIR):
+        known = {str(pk) for pk in UploadSession.objects.values_list('pk', flat=True)}
+        for name in os.listdir(TEMP_DIR):
+            stem = name.rsplit('.', 1)[0]
+            path = os.path.join(TEMP_DIR, name)
+            if stem not in known and os.path.getmtime(path) < cutoff.timestamp():
+                os.remove(path)
+    return removed
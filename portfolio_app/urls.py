@@ -1,6 +1,18 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Sob ASGI as leituras públicas usam as views async (GET), que repassam as
+# escritas para as síncronas
+if getattr(settings, 'PORTFOLIO_ASYNC_VIEWS', False):
+    portfolio_api = views.portfolio_api_async
+    projects_api = views.projects_api_async
+    project_detail_api = views.project_detail_api_async
+else:
+    portfolio_api = views.portfolio_api
+    projects_api = views.projects_api
+    project_detail_api = views.project_detail_api
+
 urlpatterns = [
     # Páginas principais
     path('', views.home, name='home'),
@@ -9,11 +21,32 @@ urlpatterns = [
     path('admin/', views.admin_panel, name='admin_panel'),
 
     # APIs
-    path('api/portfolio/', views.portfolio_api, name='portfolio_api'),
-    path('api/projects/', views.projects_api, name='projects_api'),
-    path('api/projects/<uuid:project_id>/',
-         views.project_detail_api, name='project_detail_api'),
+    path('api/portfolio/', portfolio_api, name='portfolio_api'),
+    path('api/projects/', projects_api, name='projects_api'),
+    path('api/search/', views.search_api, name='search_api'),
+    path('api/facets/', views.facets_api, name='facets_api'),
+    path('api/projects/bulk/', views.projects_bulk_api, name='projects_bulk_api'),
+    path('api/projects/<int:project_id>/',
+         project_detail_api, name='project_detail_api'),
+    path('api/projects/<int:project_id>/move/',
+         views.project_move_api, name='project_move_api'),
+    path('api/projects/<int:project_id>/images/<int:image_id>/move/',
+         views.image_move_api, name='image_move_api'),
+    path('api/projects/<int:project_id>/videos/<int:video_id>/move/',
+         views.video_move_api, name='video_move_api'),
     path('api/upload/', views.upload_media_api, name='upload_media_api'),
+    path('api/uploads/', views.upload_session_create_api,
+         name='upload_session_create_api'),
+    path('api/uploads/<uuid:session_id>/', views.upload_session_api,
+         name='upload_session_api'),
+    path('api/uploads/<uuid:session_id>/complete/',
+         views.upload_session_complete_api, name='upload_session_complete_api'),
+    path('api/media/delete/', views.media_batch_delete_api,
+         name='media_batch_delete_api'),
+    path('api/media/image/<int:media_id>/', views.media_detail_api,
+         {'media_type': 'image'}, name='image_detail_api'),
+    path('api/media/video/<int:media_id>/', views.media_detail_api,
+         {'media_type': 'video'}, name='video_detail_api'),
     path('api/media/<path:media_path>/',
          views.delete_media_api, name='delete_media_api'),
     path('api/generate-html/', views.generate_portfolio_html,
@@ -1,21 +1,37 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
+from django.views.decorators.cache import cache_control
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.http import http_date, quote_etag
 import json
 import os
-from .models import Project, Category, ProjectImage, ProjectVideo, PortfolioSettings
-from .serializers import ProjectSerializer, CategorySerializer
-
-
+from .models import (
+    Project, Category, ProjectImage, ProjectVideo, ImageVariant, UploadSession)
+from .serializers import (
+    ProjectSerializer, CategorySerializer, PortfolioSerializer, UploadSerializer,
+    SearchResultSerializer)
+from .cache import CATALOG, get_snapshot, get_version
+from .decorators import async_cache_control, async_condition, async_reads
+from .pagination import KEYSET_ORDERING, apaginate, paginate, parse_limit
+from . import (
+    bulk, delivery, facets, media, ordering, refdata, search, streaming, timing,
+    uploads)
+from .upload_handlers import LimitedUploadHandler
+
+
+@timing.span('render')
 def home(request):
     """Página inicial"""
     return render(request, 'index.html')
 
 
+@timing.span('render')
 def test(request):
     """Página de teste"""
     return render(request, 'test.html')
@@ -23,98 +39,110 @@ def test(request):
 
 def portfolio(request):
     """Página de portfólio"""
-    projects = Project.objects.filter(
-        status='published').order_by('order', '-created_at')
-    categories = Category.objects.all().order_by('name')
+    # A capa já está no próprio projeto: basta a categoria
+    projects = Project.objects.published().select_related(
+        'category').order_by('order', '-created_at')
+    project_facets = facets.cached_facets().payload
 
     context = {
         'projects': projects,
-        'categories': categories,
+        'categories': project_facets['categories'],
+        'total_projects': project_facets['total'],
+        'image_sizes': ImageVariant.SIZES,
     }
-    return render(request, 'portfolio/portfolio.html', context)
+    # Os projetos são lidos durante a renderização: o tempo inclui o banco
+    with timing.span('render'):
+        return render(request, 'portfolio/portfolio.html', context)
 
 
+@timing.span('render')
 def admin_panel(request):
     """Renderiza o painel administrativo"""
     return render(request, 'admin.html')
 
 
+def _catalog_version(request):
+    """Versão do catálogo, lida uma única vez por request"""
+    if not hasattr(request, '_catalog_version'):
+        request._catalog_version = get_version(CATALOG)
+    return request._catalog_version
+
+
+def catalog_etag(request, *args, **kwargs):
+    """ETag derivada da versão dos dados; None fora de GET/HEAD"""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    version, _ = _catalog_version(request)
+    return f"{CATALOG}-{version}"
+
+
+def project_etag(request, project_id):
+    etag = catalog_etag(request)
+    return f"{etag}-{project_id}" if etag else None
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    _, updated_at = _catalog_version(request)
+    return updated_at
+
+
+def snapshot_response(request, snapshot, response):
+    """
+    Validadores da versão de fato servida: durante uma reconstrução o
+    snapshot é o anterior, e o ETag da versão atual faria o cliente
+    revalidar (304) um corpo antigo. Os decoradores de `condition` só
+    preenchem os headers que faltam.
+    """
+    if snapshot.version != _catalog_version(request)[0]:
+        response['ETag'] = quote_etag(f"{CATALOG}-{snapshot.version}")
+        if snapshot.updated_at:
+            response['Last-Modified'] = http_date(snapshot.updated_at.timestamp())
+    return response
+
+
+def iter_portfolio_json():
+    """Gera o JSON do catálogo público incrementalmente"""
+    projects = Project.objects.published().with_media().order_by(
+        'order', '-created_at')
+    categories = refdata.categories()
+    settings = refdata.portfolio_settings()
+
+    return streaming.iter_object([
+        ('projects', streaming.iter_array(
+            streaming.iterate(projects), PortfolioSerializer.serialize_project)),
+        ('categories', streaming.iter_array(
+            categories, CategorySerializer.serialize)),
+        ('settings', PortfolioSerializer.serialize_settings(settings)),
+    ])
+
+
+@timing.span('serialize')
+def build_portfolio_payload():
+    """Serializa o catálogo público completo (projetos, categorias e configurações)"""
+    # O snapshot vale até a próxima alteração do catálogo: as categorias não
+    # podem vir de uma cópia local ainda dentro do CHECK_INTERVAL
+    refdata.check()
+    return b''.join(iter_portfolio_json())
+
+
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cache_control(no_cache=True)
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
 def portfolio_api(request):
     """API para gerenciar dados do portfólio"""
     if request.method == 'GET':
-        projects = Project.objects.filter(
-            status='published').order_by('order', '-created_at')
-        categories = Category.objects.all().order_by('name')
-        settings = PortfolioSettings.get_settings()
-
-        data = {
-            'projects': [
-                {
-                    'id': str(project.id),
-                    'title': project.title,
-                    'slug': project.slug,
-                    'category': project.category.slug,
-                    'description': project.description,
-                    'short_description': project.short_description,
-                    'tags': project.tags,
-                    'featured': project.featured,
-                    'status': project.status,
-                    'order': project.order,
-                    'created_at': project.created_at.isoformat(),
-                    'updated_at': project.updated_at.isoformat(),
-                    'images': [
-                        {
-                            'id': str(img.id),
-                            'filename': os.path.basename(img.image.name),
-                            'path': img.image.url,
-                            'title': img.title,
-                            'alt_text': img.alt_text,
-                            'is_main': img.is_main,
-                            'order': img.order,
-                            'uploaded_at': img.uploaded_at.isoformat()
-                        }
-                        for img in project.images.all()
-                    ],
-                    'videos': [
-                        {
-                            'id': str(vid.id),
-                            'filename': os.path.basename(vid.video.name),
-                            'path': vid.video.url,
-                            'title': vid.title,
-                            'description': vid.description,
-                            'thumbnail': vid.thumbnail.url if vid.thumbnail else None,
-                            'order': vid.order,
-                            'file_size_mb': vid.file_size_mb,
-                            'uploaded_at': vid.uploaded_at.isoformat()
-                        }
-                        for vid in project.videos.all()
-                    ],
-                    'main_image': project.main_image.image.url if project.main_image else None,
-                    'thumbnail': project.thumbnail
-                }
-                for project in projects
-            ],
-            'categories': [
-                {
-                    'id': str(cat.id),
-                    'name': cat.name,
-                    'slug': cat.slug,
-                    'color': cat.color,
-                    'description': cat.description
-                }
-                for cat in categories
-            ],
-            'settings': {
-                'auto_generate_thumbnails': settings.auto_generate_thumbnails,
-                'max_file_size_mb': settings.max_file_size_mb,
-                'allowed_image_formats': settings.allowed_image_formats,
-                'allowed_video_formats': settings.allowed_video_formats
-            }
-        }
+        if request.GET.get('stream'):
+            return streaming.streaming_json_response(iter_portfolio_json())
 
-        return JsonResponse(data)
+        # ?fresh=1: o painel relendo o catálogo logo depois de salvar
+        snapshot = get_snapshot(CATALOG, build_portfolio_payload,
+                                _catalog_version(request),
+                                fresh=bool(request.GET.get('fresh')))
+        return snapshot_response(request, snapshot, HttpResponse(
+            snapshot.payload, content_type='application/json'))
 
     elif request.method == 'POST':
         try:
@@ -125,18 +153,58 @@ def portfolio_api(request):
             return JsonResponse({'error': str(e)}, status=400)
 
 
+@async_reads(portfolio_api)
+@async_cache_control(no_cache=True)
+@async_condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+async def portfolio_api_async(request):
+    """GET de portfolio_api sem prender uma thread do worker (ASGI)"""
+    if request.GET.get('stream'):
+        # As categorias e configurações são lidas já na criação do gerador
+        chunks = await sync_to_async(iter_portfolio_json)()
+        return streaming.async_streaming_json_response(chunks)
+
+    snapshot = await sync_to_async(get_snapshot)(
+        CATALOG, build_portfolio_payload, request._catalog_version,
+        fresh=bool(request.GET.get('fresh')))
+    return snapshot_response(request, snapshot, HttpResponse(
+        snapshot.payload, content_type='application/json'))
+
+
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
+@cache_control(no_cache=True)
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
 def projects_api(request):
     """API para gerenciar projetos"""
     if request.method == 'GET':
-        projects = Project.objects.all().order_by('order', '-created_at')
-        data = [ProjectSerializer.serialize(project) for project in projects]
-        return JsonResponse(data, safe=False)
+        projects = Project.objects.filter_params(request.GET).with_media()
+
+        if request.GET.get('stream'):
+            # Todos os resultados, sem paginação, lidos em blocos
+            projects = projects.order_by(*KEYSET_ORDERING)
+            return streaming.streaming_json_response(streaming.iter_object([
+                ('results', streaming.iter_array(
+                    streaming.iterate(projects), ProjectSerializer.serialize)),
+                ('next_cursor', None),
+            ]))
+
+        try:
+            limit = parse_limit(request.GET.get('limit'))
+            projects, next_cursor = paginate(
+                projects, limit, request.GET.get('cursor'))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        with timing.span('serialize'):
+            return JsonResponse({
+                'results': [ProjectSerializer.serialize(project) for project in projects],
+                'next_cursor': next_cursor,
+            })
 
     elif request.method == 'POST':
         try:
             data = json.loads(request.body)
+            facets.validate_tags(data.get('tags', []))
 
             # Criar categoria se não existir
             category_slug = data.get('category')
@@ -164,11 +232,95 @@ def projects_api(request):
             return JsonResponse({'error': str(e)}, status=400)
 
 
+@async_reads(projects_api)
+@async_cache_control(no_cache=True)
+@async_condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+async def projects_api_async(request):
+    """GET de projects_api com o ORM assíncrono (ASGI)"""
+    projects = Project.objects.filter_params(request.GET).with_media()
+
+    if request.GET.get('stream'):
+        projects = projects.order_by(*KEYSET_ORDERING)
+        return streaming.async_streaming_json_response(streaming.iter_object([
+            ('results', streaming.iter_array(
+                streaming.iterate(projects), ProjectSerializer.serialize)),
+            ('next_cursor', None),
+        ]))
+
+    try:
+        limit = parse_limit(request.GET.get('limit'))
+        projects, next_cursor = await apaginate(
+            projects, limit, request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    with timing.span('serialize'):
+        return JsonResponse({
+            'results': [ProjectSerializer.serialize(project) for project in projects],
+            'next_cursor': next_cursor,
+        })
+
+
+@require_http_methods(["GET"])
+def search_api(request):
+    """API de busca textual nos projetos publicados (o último termo é prefixo)"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = parse_limit(request.GET.get('limit'), search.DEFAULT_LIMIT)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    hits = search.search_projects(query, limit=limit) if query else []
+    projects = Project.objects.select_related('category').in_bulk(
+        [pk for pk, _, _ in hits])
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {**SearchResultSerializer.serialize(projects[pk]),
+             'rank': rank,
+             'snippet': snippet if snippet is not None
+             else search.project_snippet(projects[pk], query)}
+            for pk, rank, snippet in hits if pk in projects
+        ],
+    })
+
+
+@require_http_methods(["GET"])
+@cache_control(no_cache=True)
+@condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)
+def facets_api(request):
+    """API com a contagem de projetos publicados por categoria e por tag"""
+    snapshot = facets.cached_facets(_catalog_version(request))
+    return snapshot_response(request, snapshot, JsonResponse(snapshot.payload))
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def projects_bulk_api(request):
+    """API para criar, editar e remover vários projetos numa transação"""
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+
+    try:
+        results = bulk.apply(data.get('operations') if isinstance(data, dict) else None)
+    except bulk.BulkError as e:
+        payload = {'error': str(e)}
+        if e.results is not None:
+            payload['results'] = e.results
+        return JsonResponse(payload, status=e.status)
+
+    return JsonResponse({'results': results})
+
+
 @csrf_exempt
 @require_http_methods(["GET", "PUT", "DELETE"])
+@cache_control(no_cache=True)
+@condition(etag_func=project_etag, last_modified_func=catalog_last_modified)
 def project_detail_api(request, project_id):
     """API para gerenciar um projeto específico"""
-    project = get_object_or_404(Project, id=project_id)
+    project = get_object_or_404(Project.objects.with_media(), id=project_id)
 
     if request.method == 'GET':
         data = ProjectSerializer.serialize(project)
@@ -177,6 +329,8 @@ def project_detail_api(request, project_id):
     elif request.method == 'PUT':
         try:
             data = json.loads(request.body)
+            if 'tags' in data:
+                facets.validate_tags(data['tags'])
 
             # Atualizar campos
             project.title = data.get('title', project.title)
@@ -210,16 +364,80 @@ def project_detail_api(request, project_id):
         return JsonResponse({'status': 'deleted'})
 
 
+@async_reads(project_detail_api)
+@async_cache_control(no_cache=True)
+@async_condition(etag_func=project_etag, last_modified_func=catalog_last_modified)
+async def project_detail_api_async(request, project_id):
+    """GET de project_detail_api com o ORM assíncrono (ASGI)"""
+    try:
+        project = await Project.objects.with_media().aget(id=project_id)
+    except Project.DoesNotExist:
+        raise Http404('Projeto não encontrado')
+    return JsonResponse(ProjectSerializer.serialize(project))
+
+
+def _move(request, obj, queryset):
+    """Move `obj` para entre os itens `after` e `before` (ids) do corpo"""
+    try:
+        data = json.loads(request.body)
+        neighbors = {}
+        for name in ('after', 'before'):
+            if data.get(name) is not None:
+                neighbors[name] = queryset.get(pk=data[name])
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+    except ObjectDoesNotExist:
+        return JsonResponse({'error': 'Vizinho não encontrado'}, status=404)
+
+    try:
+        order = ordering.move(obj, **neighbors)
+    except ordering.MoveError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    return JsonResponse({'id': str(obj.pk), 'order': order})
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def project_move_api(request, project_id):
+    """API para mover um projeto na ordenação do portfólio"""
+    project = get_object_or_404(Project, id=project_id)
+    return _move(request, project, Project.objects.all())
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def image_move_api(request, project_id, image_id):
+    """API para mover uma imagem dentro do projeto"""
+    images = ProjectImage.objects.filter(project_id=project_id)
+    return _move(request, get_object_or_404(images, id=image_id), images)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def video_move_api(request, project_id, video_id):
+    """API para mover um vídeo dentro do projeto"""
+    videos = ProjectVideo.objects.filter(project_id=project_id)
+    return _move(request, get_object_or_404(videos, id=video_id), videos)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def upload_media_api(request):
     """API para upload de mídia"""
     if request.method == 'POST':
         try:
+            # Lido uma vez: alimenta o handler que valida durante o envio
+            settings_obj = refdata.portfolio_settings()
+            handler = LimitedUploadHandler(request, settings_obj)
+            request.upload_handlers.insert(0, handler)
+
             file = request.FILES.get('file')
             project_id = request.POST.get('project_id')
             media_type = request.POST.get('type', 'image')
 
+            if handler.error:
+                return JsonResponse({'error': handler.error}, status=handler.status)
+
             if not file:
                 return JsonResponse({'error': 'Nenhum arquivo fornecido'}, status=400)
 
@@ -229,7 +447,6 @@ def upload_media_api(request):
             project = get_object_or_404(Project, id=project_id)
 
             # Validar tamanho do arquivo
-            settings_obj = PortfolioSettings.get_settings()
             file_size_mb = file.size / (1024 * 1024)
             if file_size_mb > settings_obj.max_file_size_mb:
                 return JsonResponse({
@@ -243,15 +460,8 @@ def upload_media_api(request):
                     image=file,
                     title=file.name
                 )
-
-                return JsonResponse({
-                    'id': str(project_image.id),
-                    'filename': os.path.basename(project_image.image.name),
-                    'path': project_image.image.url,
-                    'title': project_image.title,
-                    'is_main': project_image.is_main,
-                    'uploaded_at': project_image.uploaded_at.isoformat()
-                })
+                with timing.span('serialize'):
+                    return JsonResponse(UploadSerializer.serialize(project_image))
 
             elif media_type == 'video':
                 project_video = ProjectVideo.objects.create(
@@ -259,15 +469,8 @@ def upload_media_api(request):
                     video=file,
                     title=file.name
                 )
-
-                return JsonResponse({
-                    'id': str(project_video.id),
-                    'filename': os.path.basename(project_video.video.name),
-                    'path': project_video.video.url,
-                    'title': project_video.title,
-                    'file_size_mb': project_video.file_size_mb,
-                    'uploaded_at': project_video.uploaded_at.isoformat()
-                })
+                with timing.span('serialize'):
+                    return JsonResponse(UploadSerializer.serialize(project_video))
 
             else:
                 return JsonResponse({'error': 'Tipo de mídia inválido'}, status=400)
@@ -276,50 +479,142 @@ def upload_media_api(request):
             return JsonResponse({'error': str(e)}, status=400)
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def upload_session_create_api(request):
+    """Inicia um upload em partes"""
+    try:
+        data = json.loads(request.body)
+        project = get_object_or_404(Project, id=data.get('project_id'))
+        session = uploads.create_session(
+            project,
+            data.get('type', 'image'),
+            data.get('filename') or '',
+            int(data.get('size') or 0),
+            refdata.portfolio_settings(),
+        )
+    except uploads.UploadError as e:
+        return JsonResponse({'error': str(e), **e.extra}, status=e.status)
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    data = UploadSerializer.serialize_session(session)
+    data['chunk_size'] = uploads.CHUNK_SIZE
+    return JsonResponse(data, status=201)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT", "DELETE"])
+def upload_session_api(request, session_id):
+    """Consulta o offset (GET), envia uma parte (PUT) ou cancela (DELETE)"""
+    session = get_object_or_404(UploadSession, id=session_id)
+
+    if request.method == 'GET':
+        return JsonResponse(UploadSerializer.serialize_session(session))
+
+    elif request.method == 'PUT':
+        try:
+            offset = uploads.parse_offset(request)
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+            session = uploads.write_chunk(session.pk, offset, request, length)
+        except uploads.UploadError as e:
+            return JsonResponse({'error': str(e), **e.extra}, status=e.status)
+        return JsonResponse(UploadSerializer.serialize_session(session))
+
+    elif request.method == 'DELETE':
+        uploads.discard(session)
+        return JsonResponse({'status': 'deleted'})
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def upload_session_complete_api(request, session_id):
+    """Finaliza o upload em partes e cria a mídia no projeto"""
+    session = get_object_or_404(
+        UploadSession.objects.select_related('project'), id=session_id)
+    try:
+        uploaded = uploads.finalize(session)
+    except uploads.UploadError as e:
+        return JsonResponse({'error': str(e), **e.extra}, status=e.status)
+    return JsonResponse(UploadSerializer.serialize(uploaded), status=201)
+
+
+def _delete_media(**lookup):
+    try:
+        result = media.delete(**lookup)
+    except media.MediaError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    if not any(result['deleted'].values()):
+        return JsonResponse({'error': 'Arquivo não encontrado', **result}, status=404)
+    return JsonResponse({'status': 'deleted', **result})
+
+
 @csrf_exempt
 @require_http_methods(["DELETE"])
 def delete_media_api(request, media_path):
-    """API para deletar mídia"""
+    """API para deletar mídia pelo caminho do arquivo (busca exata, ?project_id=)"""
+    project_id = request.GET.get('project_id')
+    if project_id is not None and not project_id.isdigit():
+        return JsonResponse({'error': 'project_id inválido'}, status=400)
+    return _delete_media(paths=[media.name_from_path(media_path)],
+                         project_id=int(project_id) if project_id else None)
+
+
+@csrf_exempt
+@require_http_methods(["DELETE"])
+def media_detail_api(request, media_type, media_id):
+    """API para deletar uma imagem ou vídeo pelo id"""
+    return _delete_media(**{f'{media_type}s': [media_id]})
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def media_batch_delete_api(request):
+    """API para deletar várias mídias (ids ou hashes) numa requisição"""
     try:
-        # Decodificar o caminho
-        decoded_path = media_path.replace('%2F', '/')
+        data = json.loads(request.body)
+        lookup = {key: data.get(key) or [] for key in ('images', 'videos', 'hashes')}
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+    if not isinstance(data.get('project_id'), (int, type(None))):
+        return JsonResponse({'error': 'project_id inválido'}, status=400)
+    return _delete_media(project_id=data.get('project_id'), **lookup)
 
-        # Procurar e deletar o arquivo
-        project_image = ProjectImage.objects.filter(
-            image__icontains=decoded_path).first()
-        if project_image:
-            project_image.delete()
-            return JsonResponse({'status': 'deleted'})
 
-        project_video = ProjectVideo.objects.filter(
-            video__icontains=decoded_path).first()
-        if project_video:
-            project_video.delete()
-            return JsonResponse({'status': 'deleted'})
+@require_http_methods(["GET", "HEAD"])
+def serve_media(request, path):
+    """Serve arquivos de mídia com suporte a Range e cache condicional"""
+    return delivery.serve(request, path)
 
-        return JsonResponse({'error': 'Arquivo não encontrado'}, status=404)
 
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=400)
+@async_reads(serve_media, methods=('GET', 'HEAD'))
+async def serve_media_async(request, path):
+    """serve_media com o arquivo enviado sem prender uma thread (ASGI)"""
+    return await delivery.aserve(request, path)
 
 
 def generate_portfolio_html(request):
     """Gera HTML do portfólio para o carrossel"""
-    projects = Project.objects.filter(
-        status='published').order_by('order', '-created_at')
+    projects = Project.objects.published().select_related(
+        'category').order_by('order', '-created_at')
 
     html_parts = []
     for i, project in enumerate(projects):
-        main_image = project.main_image
-        image_url = main_image.image.url if main_image else ''
+        image_url = project.cover_url
 
         tags_html = ''.join(
             [f'<span class="tag">{tag}</span>' for tag in project.tags])
+        sources_html = ''.join(
+            [f'<source type="{source["type"]}" srcset="{source["srcset"]}" sizes="{ImageVariant.SIZES}" />'
+             for source in project.cover_sources])
 
         project_html = f'''
         <div class="portfolio-card" data-category="{project.category.slug}">
             <div class="card-image">
-                <img src="{image_url}" alt="{project.title}" loading="lazy" />
+                <picture>
+                    {sources_html}
+                    <img src="{image_url}" alt="{project.title}" loading="lazy" />
+                </picture>
                 <div class="card-overlay">
                     <div class="overlay-content">
                         <div class="project-number">{(i + 1):02d}</div>
@@ -21,7 +21,8 @@ class AdminPanel {
     
     async loadData() {
         try {
-            const response = await fetch('/api/portfolio');
+            // fresh=1 passa direto pela cópia publicada (ver publish.PublishedSite)
+            const response = await fetch('/api/portfolio/?fresh=1');
             this.portfolioData = await response.json();
         } catch (error) {
             console.error('Erro ao carregar dados:', error);
@@ -176,7 +177,7 @@ class AdminPanel {
                     <div class="media-size">${media.size_mb}MB</div>
                 </div>
                 <div class="media-actions">
-                    <button onclick="adminPanel.deleteMedia('${media.path}')">
+                    <button onclick="adminPanel.deleteMedia('${media.type}', ${media.id})">
                         <i class="fas fa-trash"></i>
                     </button>
                 </div>
@@ -409,12 +410,12 @@ class AdminPanel {
         }
     }
     
-    async deleteMedia(mediaPath) {
+    async deleteMedia(mediaType, mediaId) {
         if (confirm('Tem certeza que deseja deletar este arquivo?')) {
             try {
                 this.showLoading(true);
                 
-                const response = await fetch(`/api/media/${encodeURIComponent(mediaPath)}`, {
+                const response = await fetch(`/api/media/${mediaType}/${mediaId}/`, {
                     method: 'DELETE'
                 });
                 
@@ -256,11 +256,10 @@ class PortfolioAdmin:
     
     def reorder_projects(self, project_ids: List[str]):
         """Reordena os projetos"""
-        for i, project_id in enumerate(project_ids):
-            for project in self.portfolio_data["projects"]:
-                if project["id"] == project_id:
-                    project["order"] = i
-                    break
+        positions = {project_id: i for i, project_id in enumerate(project_ids)}
+        for project in self.portfolio_data["projects"]:
+            if project["id"] in positions:
+                project["order"] = positions[project["id"]]
         
         self._save_portfolio_data()
     